@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Single-pass release builds: print PDF, EPUB and web bundle from one load.
+
+The separate generators each load the book JSON, resolve page images and
+read every image from disk on their own. This assembler does it once:
+
+1. layout_book() loads the book and builds a BookLayout: which pages carry
+   an image, a word list or text only, and the image sizes for print
+   (placement at PRINT_SPECS dpi) and screen (DELIVERY_SPECS).
+2. load_assets() reads each source image once, in a process pool, and
+   feeds the same bytes to the print resampler (image_prep) and the screen
+   encoder (delivery: JPEG for the EPUB, DELIVERY_SPECS format for the
+   web bundle), both of which cache by content hash.
+3. The PDF, EPUB and web bundle are written from the layout and assets,
+   in parallel processes unless parallel=False.
+
+Output:
+    output/release/<book>/<book>_print.pdf    (<book>_pdfx.pdf in CMYK mode)
+    output/release/<book>/<book>.epub         JPEG screen images
+    output/release/web/<book>/                WebP delivery images + manifest.json
+                                              (web_dir=web/books/delivery to publish)
+
+Usage:
+    from assemble import assemble_book
+
+    summary = assemble_book("web/books/volcano_v2.json")
+
+    python src/assemble.py volcano_v2 castle_rats
+    python src/assemble.py volcano_story --formats epub,web --web-dir web/books/delivery
+    python src/assemble.py volcano_v2 --cmyk --icc-profile profiles/coated_fogra39.icc
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from config import PRINT_SPECS, CMYK_SPECS, DELIVERY_SPECS, BRAND
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / "web" / "books"
+RELEASE_DIR = ROOT_DIR / "output" / "release"
+
+# Formats assemble_book() can write
+FORMATS = ("pdf", "epub", "web")
+
+# Page types laid out without art, even when an image exists
+TEXT_PAGE_TYPES = ["wordlist"]
+
+# EPUB pages whose text is centred rather than under the image
+CENTERED_PAGE_TYPES = ["cover", "wordlist", "wordlist_title", "copyright"]
+
+
+@dataclass
+class PageLayout:
+    index: int                    # Position in the book JSON
+    number: int
+    page_type: str
+    text: str
+    kind: str                     # "image", "wordlist" or "text"
+    image: Optional[str] = None   # Source image (kind "image")
+
+
+@dataclass
+class BookLayout:
+    name: str                     # Book JSON stem
+    title: str
+    word_list: dict
+    pages: List[PageLayout] = field(default_factory=list)
+    image_mm: tuple = ()          # Image placement on the print page
+    print_px: tuple = ()          # Print image size at PRINT_SPECS dpi
+    screen_px: tuple = ()         # Largest EPUB/web image size
+
+    def images(self) -> dict:
+        """{page number: source image} for pages laid out with an image."""
+        return {p.number: p.image for p in self.pages if p.kind == "image"}
+
+
+def layout_book(book_path: str, books_dir: Path = BOOKS_DIR) -> BookLayout:
+    """Load a book JSON and resolve its page images into a BookLayout."""
+    from preflight import resolve_page_images
+    from pdf_generator import IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM
+    from image_prep import placement_pixels
+
+    book_path = Path(book_path)
+    with open(book_path) as f:
+        book = json.load(f)
+    if not isinstance(book, dict) or not isinstance(book.get("pages"), list):
+        raise ValueError(f"Not a book JSON: {book_path}")
+    images = resolve_page_images(book_path, book, books_dir)
+
+    pages = []
+    for index, page in enumerate(book["pages"]):
+        number = page.get("page", index + 1)
+        page_type = page.get("type", "story")
+        if page_type in TEXT_PAGE_TYPES:
+            kind = page_type
+        elif number in images:
+            kind = "image"
+        else:
+            kind = "text"
+        pages.append(PageLayout(
+            index=index,
+            number=number,
+            page_type=page_type,
+            text=page.get("text", ""),
+            kind=kind,
+            image=str(images[number]) if kind == "image" else None,
+        ))
+
+    return BookLayout(
+        name=book_path.stem,
+        title=book.get("title", "Untitled"),
+        word_list=book.get("word_list", {}),
+        pages=pages,
+        image_mm=(IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM),
+        print_px=placement_pixels(IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM, PRINT_SPECS["dpi"]),
+        screen_px=(DELIVERY_SPECS["max_width_px"], DELIVERY_SPECS["max_height_px"]),
+    )
+
+
+def _asset_task(args: tuple) -> tuple:
+    """Pool task: read one source image once; prepare it for print and measure it for screen."""
+    from image_prep import prepare_image
+    from delivery import measure_image
+
+    source, print_px, screen_px, screen_formats, cmyk_profile, intent, want_print = args
+    try:
+        data = Path(source).read_bytes()
+        prepared = prepare_image(source, print_px, cmyk_profile=cmyk_profile, intent=intent,
+                                 data=data) if want_print else None
+        measured = {fmt: measure_image(source, screen_px, fmt, data=data) for fmt in screen_formats}
+        return source, prepared, measured, len(data), None
+    except Exception as e:
+        return source, None, None, 0, str(e)
+
+
+def load_assets(layout: BookLayout, formats: tuple = FORMATS, workers: Optional[int] = None,
+                cmyk_profile: Optional[str] = None, intent: str = CMYK_SPECS["rendering_intent"],
+                fmt: str = DELIVERY_SPECS["format"], budget_bytes: Optional[int] = None) -> dict:
+    """
+    Read every page image once and derive the print and screen versions.
+
+    Screen images are encoded as DELIVERY_SPECS["epub_format"] for the EPUB
+    and as fmt for the web bundle (once, if they are the same).
+
+    Returns:
+        {"print": {source: prepared image},
+         "screen": {format: {source: choose_qualities() entry}},
+         "bytes_read": source bytes read}. Images that fail are left out
+         (emitters fall back to the source).
+    """
+    from delivery import choose_qualities
+
+    if cmyk_profile:
+        from image_prep import cmyk_transform
+        cmyk_transform(cmyk_profile, intent)  # Fail early on a bad profile
+    if budget_bytes is None:
+        budget_bytes = DELIVERY_SPECS["book_budget_kb"] * 1000
+
+    want_print = "pdf" in formats
+    screen_formats = []
+    if "epub" in formats:
+        screen_formats.append(DELIVERY_SPECS["epub_format"])
+    if "web" in formats and fmt not in screen_formats:
+        screen_formats.append(fmt)
+    sources = list(dict.fromkeys(layout.images().values()))
+    tasks = [(source, layout.print_px, layout.screen_px, tuple(screen_formats), cmyk_profile, intent, want_print)
+             for source in sources]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_asset_task, tasks))
+    else:
+        results = [_asset_task(task) for task in tasks]
+
+    prepared, bytes_read = {}, 0
+    measured = {screen_format: [] for screen_format in screen_formats}
+    for source, print_path, screen, size, error in results:
+        if error:
+            print(f"Warning: Could not load image {source}: {error}")
+            continue
+        bytes_read += size
+        if print_path:
+            prepared[source] = print_path
+        for screen_format, measurement in screen.items():
+            measured[screen_format].append((source, measurement))
+
+    return {
+        "print": prepared,
+        "screen": {screen_format: choose_qualities(entries, budget_bytes)
+                   for screen_format, entries in measured.items()},
+        "bytes_read": bytes_read,
+    }
+
+
+def emit_pdf(layout: BookLayout, assets: dict, output_path: str,
+             cmyk_profile: Optional[str] = None, intent: str = CMYK_SPECS["rendering_intent"]) -> str:
+    """Write the print PDF (see pdf_generator.write_print_pdf)."""
+    from pdf_generator import write_print_pdf
+
+    pages = [{"type": p.page_type, "text": p.text} for p in layout.pages]
+    page_images = {
+        i: assets["print"].get(p.image, p.image)
+        for i, p in enumerate(layout.pages) if p.kind == "image"
+    }
+    return write_print_pdf(layout.title, layout.word_list, pages, page_images, output_path,
+                           cmyk_profile, intent)
+
+
+def emit_epub(layout: BookLayout, assets: dict, output_dir: str) -> str:
+    """Write the fixed-layout EPUB with JPEG screen images (see epub_generator)."""
+    from epub_generator import Book, Page, FixedLayoutEPUB
+
+    screen_images = assets["screen"].get(DELIVERY_SPECS["epub_format"], {})
+    pages = []
+    for p in layout.pages:
+        image = ""
+        if p.kind == "image":
+            screen = screen_images.get(p.image)
+            image = screen["path"] if screen else p.image
+        pages.append(Page(
+            number=p.number,
+            image_path=image,
+            text=p.text,
+            page_type=p.page_type,
+            text_position="center" if p.page_type in CENTERED_PAGE_TYPES else "bottom",
+        ))
+    book = Book(title=layout.title, author=BRAND["name"], pages=pages,
+                word_list=layout.word_list if isinstance(layout.word_list, list) else [])
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    return FixedLayoutEPUB(book, output_dir=str(output_dir), filename=layout.name).generate()
+
+
+def emit_web(layout: BookLayout, assets: dict, web_dir: str, fmt: str = DELIVERY_SPECS["format"],
+             budget_bytes: Optional[int] = None) -> str:
+    """Write the web reader bundle (see delivery.write_bundle). Returns its directory."""
+    from delivery import write_bundle
+
+    if budget_bytes is None:
+        budget_bytes = DELIVERY_SPECS["book_budget_kb"] * 1000
+    write_bundle(layout.name, layout.images(), assets["screen"].get(fmt, {}), Path(web_dir), fmt, budget_bytes)
+    return str(Path(web_dir) / layout.name)
+
+
+def _emit_task(args: tuple) -> tuple:
+    """Pool task: write one output format. Returns (format, output, error)."""
+    name, layout, assets, options = args
+    emit = {"pdf": emit_pdf, "epub": emit_epub, "web": emit_web}[name]
+    try:
+        return name, emit(layout, assets, **options), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def assemble_book(book_path: str, formats: tuple = FORMATS, output_dir: Path = RELEASE_DIR,
+                  web_dir: Optional[Path] = None, books_dir: Path = BOOKS_DIR,
+                  workers: Optional[int] = None, parallel: bool = True,
+                  cmyk_profile: Optional[str] = None, intent: str = CMYK_SPECS["rendering_intent"],
+                  fmt: str = DELIVERY_SPECS["format"], budget_bytes: Optional[int] = None) -> dict:
+    """
+    Build a book's release formats from a single load of the book and its images.
+
+    Args:
+        book_path: Book JSON
+        formats: Any of "pdf", "epub", "web"
+        output_dir: PDF and EPUB go to output_dir/<book>/
+        web_dir: Where the web bundle's <book>/ directory goes (default: output_dir/web)
+        books_dir: Where page images are looked up (see preflight.resolve_page_images)
+        workers: Process pool size for the images (default: CPU count, 1 = no pool)
+        parallel: Write the formats in parallel processes
+        cmyk_profile: ICC profile for a CMYK PDF/X (<book>_pdfx.pdf)
+        intent: Rendering intent for the CMYK conversion
+        fmt: Web bundle image format, "webp" or "jpeg" (the EPUB always gets JPEG)
+        budget_bytes: Screen image budget for the book (default: DELIVERY_SPECS)
+
+    Returns:
+        Summary dict: book, outputs {format: path}, errors {format: message},
+        pages, images, bytes_read, seconds
+    """
+    start = time.perf_counter()
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown format: {', '.join(unknown)} (use {', '.join(FORMATS)})")
+
+    layout = layout_book(book_path, books_dir)
+    assets = load_assets(layout, formats, workers, cmyk_profile, intent, fmt, budget_bytes)
+
+    book_dir = Path(output_dir) / layout.name
+    suffix = "pdfx" if cmyk_profile else "print"
+    options = {
+        "pdf": {"output_path": str(book_dir / f"{layout.name}_{suffix}.pdf"),
+                "cmyk_profile": cmyk_profile, "intent": intent},
+        "epub": {"output_dir": str(book_dir)},
+        "web": {"web_dir": str(web_dir or Path(output_dir) / "web"), "fmt": fmt,
+                "budget_bytes": budget_bytes},
+    }
+    tasks = [(name, layout, assets, options[name]) for name in FORMATS if name in formats]
+
+    workers = workers or os.cpu_count() or 1
+    if parallel and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_emit_task, tasks))
+    else:
+        results = [_emit_task(task) for task in tasks]
+
+    return {
+        "book": layout.name,
+        "outputs": {name: output for name, output, error in results if not error},
+        "errors": {name: error for name, _, error in results if error},
+        "pages": len(layout.pages),
+        "images": len(layout.images()),
+        "bytes_read": assets["bytes_read"],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build print PDF, EPUB and web bundle in one pass.")
+    parser.add_argument("books", nargs="+", help="Book names or JSON paths (e.g. volcano_v2)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated: pdf,epub,web")
+    parser.add_argument("--output-dir", default=str(RELEASE_DIR), help="Where PDFs and EPUBs are written")
+    parser.add_argument("--web-dir", default=None, help="Where web bundles go (default: OUTPUT_DIR/web)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--serial", action="store_true", help="Write the formats one after another")
+    parser.add_argument("--cmyk", action="store_true", help="CMYK output through an ICC profile (PDF/X-3 with FUNBOOKIES_PDF_FONT set)")
+    parser.add_argument("--icc-profile", default=CMYK_SPECS["icc_profile"],
+                        help="CMYK ICC profile (default: $FUNBOOKIES_CMYK_PROFILE)")
+    parser.add_argument("--intent", default=CMYK_SPECS["rendering_intent"],
+                        choices=["perceptual", "relative_colorimetric", "saturation", "absolute_colorimetric"],
+                        help="Rendering intent for CMYK conversion")
+    args = parser.parse_args()
+
+    if args.cmyk and not args.icc_profile:
+        parser.error("--cmyk needs an ICC profile: pass --icc-profile or set FUNBOOKIES_CMYK_PROFILE")
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+
+    failed = False
+    for name in args.books:
+        book_path = Path(name) if name.endswith(".json") else BOOKS_DIR / f"{name}.json"
+        if not book_path.exists():
+            print(f"Not found: {book_path}")
+            sys.exit(1)
+        try:
+            summary = assemble_book(
+                book_path, formats, Path(args.output_dir),
+                web_dir=Path(args.web_dir) if args.web_dir else None,
+                workers=args.workers, parallel=not args.serial,
+                cmyk_profile=args.icc_profile if args.cmyk else None, intent=args.intent,
+            )
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+        print(f"{summary['book']}: {summary['pages']} pages, {summary['images']} images "
+              f"({summary['bytes_read'] / 1e6:.1f} MB read) in {summary['seconds']:.2f}s")
+        for fmt_name, output in summary["outputs"].items():
+            print(f"  {fmt_name:<5} {output}")
+        for fmt_name, error in summary["errors"].items():
+            print(f"  {fmt_name:<5} FAILED: {error}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
@@ -10,15 +10,16 @@ from typing import Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
-from config import BOOK_SPECS, BRAND, IMAGE_DEFAULTS
+from config import BOOK_SPECS, BRAND, IMAGE_DEFAULTS, LEVELS
 from story_gen import StoryGenerator
 from image_gen import ImageGenerator
 from epub_generator import Book, Page, FixedLayoutEPUB
+from story_validator import validate_story
 from word_banks import WordBanks
 
 load_dotenv()
 
-# Initialize word banks for phonics validation
+# Word banks for phonics validation (loaded on first use)
 WORD_BANKS = WordBanks()
 
 
@@ -119,12 +120,52 @@ class BookMaker:
         print(f"Book complete: {epub_path}")
         return epub_path
 
-    def _generate_story_with_wordlist(self, config: BookConfig) -> dict:
-        """Generate story with vocabulary word list for beginning readers."""
-        import httpx
+    def create_leveled_series(self, config: BookConfig, levels: list = None) -> dict:
+        """
+        Create one book at several phonics levels sharing one set of illustrations.
 
-        cfg = self.story_gen.configs[self.backend]
+        The story skeleton is generated once at ``config.phonics_level`` and
+        illustrated once; every other level only gets a text rewrite,
+        validated against that level's word banks.
+
+        Returns dict mapping level to path of the generated EPUB.
+        """
+        levels = levels or LEVELS
+        print(f"Creating leveled series about: {config.topic} ({', '.join(levels)})")
+
+        # 1. Generate the skeleton story once
+        print(f"Generating skeleton story ({config.phonics_level})...")
+        skeleton = self._generate_story_with_wordlist(config)
+        book_name = self._safe_name(skeleton["title"])
+
+        # 2. Illustrate the skeleton once - every variant reuses these images
+        print("Generating images...")
+        image_paths = self._generate_images(skeleton)
+
+        # 3. Rewrite the text per level and assemble each variant
+        epub_paths = {}
+        for level in levels:
+            print(f"\nBuilding {level} variant...")
+            try:
+                if level == config.phonics_level:
+                    variant = skeleton
+                else:
+                    variant = self._generate_level_variant(skeleton, level, config)
+
+                story_path = self.output_dir / f"{book_name}_{level}_story.json"
+                with open(story_path, "w") as f:
+                    json.dump(variant, f, indent=2)
+                print(f"Story saved: {story_path}")
+
+                epub_paths[level] = self._create_epub(variant, image_paths, filename=f"{book_name}_{level}")
+                print(f"Variant complete: {epub_paths[level]}")
+            except Exception as e:
+                print(f"Failed {level} variant: {e}")
+
+        return epub_paths
 
+    def _generate_story_with_wordlist(self, config: BookConfig) -> dict:
+        """Generate story with vocabulary word list for beginning readers."""
         # Get phonics level constraints
         phonics_constraints = PHONICS_LEVEL_PROMPTS.get(config.phonics_level, PHONICS_LEVEL_PROMPTS["orange"])
 
@@ -233,6 +274,100 @@ CRITICAL RULES:
 6. End with character safe, happy, and proud
 7. Page 24 MUST be copyright page"""
 
+        story = self._chat_json(system_prompt, user_prompt, temperature=0.7, max_tokens=5000)
+
+        # Add phonics level and config metadata
+        story["phonics_level"] = config.phonics_level
+        story["age_range"] = config.age_range
+
+        # Enhance image prompts with consistent style
+        for page in story["pages"]:
+            if "image_prompt" in page:
+                page["image_prompt"] = f"{page['image_prompt']}, {config.art_style}, no text in image"
+
+        # Validate phonics level compliance
+        self._validate_story(story, config.phonics_level, config)
+
+        return story
+
+    def _generate_level_variant(self, skeleton: dict, level: str, config: BookConfig) -> dict:
+        """
+        Rewrite a story skeleton's text for another phonics level.
+
+        Page numbers, page types and image prompts are kept from the skeleton
+        so the variant can reuse the skeleton's illustrations.
+        """
+        phonics_constraints = PHONICS_LEVEL_PROMPTS.get(level, PHONICS_LEVEL_PROMPTS["orange"])
+
+        sample_words = WORD_BANKS.get_words_for_story(level, count=15)
+        decodable_examples = ", ".join(sample_words["decodable"][:12])
+        sight_examples = ", ".join(sample_words["sight"][:10])
+
+        system_prompt = f"""You are an expert children's book author rewriting a beginning reader book for a different phonics level, ages {config.age_range}.
+
+{phonics_constraints}
+
+APPROVED WORD EXAMPLES FOR THIS LEVEL:
+- Decodable: {decodable_examples}
+- Sight words: {sight_examples}
+
+RULES:
+1. Keep EVERY page: same page numbers, same page types
+2. Keep the same events on each page - the illustrations are already drawn
+3. Only change the words so they fit this phonics level
+4. Keep the character names, catchphrases and sound words where the level allows"""
+
+        skeleton_pages = [
+            {
+                "page": page["page"],
+                "type": page.get("type", "story"),
+                "text": page.get("text", ""),
+                "scene": page.get("beat") or page.get("image_prompt", ""),
+            }
+            for page in skeleton["pages"]
+        ]
+
+        user_prompt = f"""Rewrite this book for phonics level {level.upper()}: {skeleton["title"]}
+
+Character: {skeleton.get("character", "")}
+
+Current pages:
+{json.dumps(skeleton_pages, indent=2)}
+
+Return JSON:
+{{
+  "word_list": {{
+    "sound_out": ["every decodable word in the new text"],
+    "sight": ["every sight word in the new text"],
+    "new": ["topic words and character names"]
+  }},
+  "pages": [
+    {{"page": 1, "text": "Rewritten text"}},
+    ... one entry for every page above ...
+  ]
+}}"""
+
+        rewrite = self._chat_json(system_prompt, user_prompt, temperature=0.5, max_tokens=4000)
+        new_text = {page["page"]: page.get("text", "") for page in rewrite.get("pages", [])}
+
+        variant = json.loads(json.dumps(skeleton))  # Deep copy, keeps image prompts
+        variant.pop("validation", None)
+        variant["phonics_level"] = level
+        variant["word_list"] = rewrite.get("word_list", skeleton.get("word_list", {}))
+        for page in variant["pages"]:
+            # Fixed pages (copyright etc.) keep their text if the LLM drops them
+            page["text"] = new_text.get(page["page"], page.get("text", ""))
+
+        self._validate_story(variant, level, config)
+        return variant
+
+    def _chat_json(self, system_prompt: str, user_prompt: str,
+                   temperature: float = 0.7, max_tokens: int = 5000) -> dict:
+        """Send a chat completion request and parse the JSON reply."""
+        import httpx
+
+        cfg = self.story_gen.configs[self.backend]
+
         headers = {
             "Authorization": f"Bearer {cfg['api_key']}",
             "Content-Type": "application/json",
@@ -246,8 +381,8 @@ CRITICAL RULES:
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            "temperature": 0.7,
-            "max_tokens": 5000,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
         }
 
         with httpx.Client(timeout=90.0) as client:
@@ -267,27 +402,20 @@ CRITICAL RULES:
         elif "```" in content:
             content = content.split("```")[1].split("```")[0]
 
-        story = json.loads(content.strip())
+        return json.loads(content.strip())
 
-        # Add phonics level and config metadata
-        story["phonics_level"] = config.phonics_level
-        story["age_range"] = config.age_range
-
-        # Enhance image prompts with consistent style
-        for page in story["pages"]:
-            if "image_prompt" in page:
-                page["image_prompt"] = f"{page['image_prompt']}, {config.art_style}, no text in image"
-
-        # Validate phonics level compliance
-        validation = WORD_BANKS.validate_story_words(
+    def _validate_story(self, story: dict, level: str, config: BookConfig) -> dict:
+        """Validate a story against a phonics level and attach the summary."""
+        validation = validate_story(
             story,
-            level=config.phonics_level,
+            level=level,
+            word_banks=WORD_BANKS,
             character_names=config.character_names if config.character_names else None,
             topic_words=config.topic_vocabulary if config.topic_vocabulary else None
         )
 
         story["validation"] = {
-            "phonics_level": config.phonics_level,
+            "phonics_level": level,
             "accessible_percent": validation["accessible_percent"],
             "strict_decodable_percent": validation["strict_decodable_percent"],
             "valid": validation["valid"],
@@ -301,11 +429,12 @@ CRITICAL RULES:
                 "vocabulary": validation["vocabulary_count"],
                 "unknown": validation["unknown_count"]
             },
+            "template": validation["template"],
             "issues": validation["issues"]
         }
 
         # Print validation summary
-        print(f"\n  Phonics Validation ({config.phonics_level} level):")
+        print(f"\n  Phonics Validation ({level} level):")
         print(f"    Accessible: {validation['accessible_percent']:.1f}%")
         print(f"    Valid: {validation['valid']}")
         if validation["issues"]:
@@ -314,7 +443,7 @@ CRITICAL RULES:
                 if issue["word"]:
                     print(f"      - '{issue['word']}': {issue['issue']}")
 
-        return story
+        return validation
 
     def _generate_images(self, story: dict) -> dict:
         """Generate images for all pages."""
@@ -339,7 +468,7 @@ CRITICAL RULES:
 
         return image_paths
 
-    def _create_epub(self, story: dict, image_paths: dict) -> str:
+    def _create_epub(self, story: dict, image_paths: dict, filename: str = None) -> str:
         """Assemble story and images into EPUB."""
         pages = []
 
@@ -358,7 +487,8 @@ CRITICAL RULES:
             pages=pages,
         )
 
-        generator = FixedLayoutEPUB(book, output_dir=str(self.output_dir))
+        generator = FixedLayoutEPUB(book, output_dir=str(self.output_dir), filename=filename,
+                                    optimize_images=True)
         return generator.generate()
 
     def _safe_name(self, name: str) -> str:
@@ -3,6 +3,8 @@ Funbookies Print Specifications
 Based on Pixi book format (10x10cm, 24 pages, saddle-stitch)
 """
 
+import os
+
 # Print dimensions in mm
 PRINT_SPECS = {
     "trim_width_mm": 100,
@@ -26,6 +28,33 @@ PRINT_SPECS = {
     "safe_height_px": 1110,
 }
 
+# CMYK print output (PDF/X). The ICC profile characterizes the printer's
+# press and paper; point FUNBOOKIES_CMYK_PROFILE at it (or pass --icc-profile).
+# The output condition is read from the profile's description. PDF/X needs
+# every font embedded: without a bold TTF in FUNBOOKIES_PDF_FONT the CMYK
+# PDF uses the (unembedded) core Helvetica and is not marked PDF/X.
+CMYK_SPECS = {
+    "icc_profile": os.environ.get("FUNBOOKIES_CMYK_PROFILE", ""),
+    "font": os.environ.get("FUNBOOKIES_PDF_FONT", ""),
+    "rendering_intent": "perceptual",  # or relative_colorimetric, saturation
+    "registry_name": "http://www.color.org",
+    "pdfx_version": "PDF/X-3:2003",
+}
+
+# Screen delivery (EPUB and web reader): images are re-encoded to fit a
+# per-book byte budget without visible loss (see src/delivery.py)
+DELIVERY_SPECS = {
+    "format": "webp",           # web reader; or jpeg
+    "epub_format": "jpeg",      # EPUB 3 core media types have no WebP
+    "max_width_px": 1181,       # EPUB page width (trim_width_px)
+    "max_height_px": 1181,
+    "book_budget_kb": 1000,     # all page images of one book
+    "max_distance": 0.03,       # 1 - SSIM against the resized original
+}
+
+# Phonics levels, from easiest to hardest
+LEVELS = ["yellow", "orange", "red", "purple"]
+
 # Book structure
 BOOK_SPECS = {
     "total_pages": 24,
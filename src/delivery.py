@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Size-budgeted image optimization for EPUB and web delivery.
+
+Print PNGs are several megabytes each, far more than a phone needs. This
+stage resizes page images to the EPUB page size and re-encodes them as WebP
+for the web reader (JPEG for EPUBs, whose core media types exclude WebP),
+choosing a quality per image so that a whole book fits a byte budget while
+every image stays within a perceptual-difference threshold.
+
+Each image is encoded once per step of QUALITY_LADDER and compared with the
+resized original (1 - SSIM on luminance, in NumPy). The budget is then
+spent greedily: starting from the best quality everywhere, the image whose
+next step down saves the most bytes per unit of added distance steps down,
+until the book fits or no image can go lower without crossing the threshold.
+
+Measurements run across a process pool and are cached (with every
+encoded step) by source content hash, size and format, so re-running after
+a budget change only copies files.
+
+Output for the web reader (web/index.html):
+    web/books/delivery/<book>/pageNN.webp
+    web/books/delivery/<book>/manifest.json    file, quality, bytes per page
+
+Usage:
+    from delivery import optimize_images, optimize_book
+
+    chosen = optimize_images(paths, budget_bytes=1_000_000)
+    summary = optimize_book("web/books/volcano_story.json")
+
+    python src/delivery.py volcano_story jungle_story
+    python src/delivery.py web/books/volcano_v2.json --budget-kb 1500 --format jpeg
+"""
+
+import io
+import os
+import sys
+import json
+import heapq
+import shutil
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from config import DELIVERY_SPECS
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / "web" / "books"
+OUTPUT_DIR = BOOKS_DIR / "delivery"
+CACHE_DIR = ROOT_DIR / "output" / ".delivery_cache"
+
+# Bump when the resizing, encoding or metric changes, to invalidate the cache
+DELIVERY_VERSION = 1
+
+# Qualities tried per image, best first
+QUALITY_LADDER = (90, 80, 70, 60, 50, 40)
+
+# Encoder settings per format: (PIL format, file suffix, extra save options)
+FORMATS = {
+    "webp": ("WEBP", ".webp", {"method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"optimize": True, "progressive": True}),
+}
+
+# SSIM window (pixels) and constants for 8-bit luminance
+SSIM_WINDOW = 8
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _box_mean(a: np.ndarray, k: int) -> np.ndarray:
+    """Mean over every k x k window (valid positions only), via an integral image."""
+    s = np.pad(a.astype(np.float64), ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def _ssim_stats(rgb: np.ndarray) -> tuple:
+    """Luminance, window means and variances of an HxWx3 uint8 image."""
+    x = rgb.astype(np.float32) @ LUMA
+    k = min(SSIM_WINDOW, *x.shape)
+    mx = _box_mean(x, k)
+    return x, mx, _box_mean(x * x, k) - mx * mx
+
+
+def ssim_distance(reference, candidate: np.ndarray) -> float:
+    """
+    1 - mean SSIM between two HxWx3 uint8 images (0 = identical).
+
+    reference may also be _ssim_stats() of the reference image, to compare
+    several candidates against it.
+    """
+    x, mx, vx = _ssim_stats(reference) if isinstance(reference, np.ndarray) else reference
+    y, my, vy = _ssim_stats(candidate)
+    k = min(SSIM_WINDOW, *x.shape)
+    cov = _box_mean(x * y, k) - mx * my
+    ssim = ((2 * mx * my + SSIM_C1) * (2 * cov + SSIM_C2)) / \
+        ((mx * mx + my * my + SSIM_C1) * (vx + vy + SSIM_C2))
+    return max(0.0, 1.0 - float(ssim.mean()))
+
+
+def _load_resized(data: bytes, max_size: tuple) -> Image.Image:
+    """An image file's contents as RGB on white, shrunk to fit max_size (never upscaled)."""
+    with Image.open(io.BytesIO(data)) as img:
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            paper = Image.new("RGB", img.size, (255, 255, 255))
+            paper.paste(img, mask=img.getchannel("A"))
+            img = paper
+        else:
+            img = img.convert("RGB")
+        img.thumbnail(max_size, Image.LANCZOS)
+        return img
+
+
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    pil_format, _, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    img.save(buffer, pil_format, quality=quality, **options)
+    return buffer.getvalue()
+
+
+def _cache_key(data: bytes, max_size: tuple, fmt: str) -> str:
+    source_hash = hashlib.sha256(data).hexdigest()
+    return f"{source_hash[:24]}_{max_size[0]}x{max_size[1]}_{fmt}_v{DELIVERY_VERSION}"
+
+
+def measure_image(source: str, max_size: tuple, fmt: str, cache_dir: Path = CACHE_DIR,
+                  data: Optional[bytes] = None) -> dict:
+    """
+    Encode an image at every ladder quality and measure size and distance.
+
+    data is the source file's contents, if already read (it is then not
+    read again).
+
+    Returns:
+        {"width", "height", "ladder": [[quality, bytes, distance, encoded path], ...]}
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown delivery format: {fmt} (use {', '.join(FORMATS)})")
+    cache_dir = Path(cache_dir)
+    if data is None:
+        data = Path(source).read_bytes()
+    key = _cache_key(data, max_size, fmt)
+    cache_path = cache_dir / f"{key}.json"
+    if cache_path.exists():
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if [step[0] for step in cached["ladder"]] == list(QUALITY_LADDER) and \
+                all(Path(step[3]).exists() for step in cached["ladder"]):
+            return cached
+
+    img = _load_resized(data, max_size)
+    reference = _ssim_stats(np.asarray(img))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ladder = []
+    for quality in QUALITY_LADDER:
+        data = _encode(img, fmt, quality)
+        with Image.open(io.BytesIO(data)) as decoded:
+            distance = ssim_distance(reference, np.asarray(decoded.convert("RGB")))
+        path = cache_dir / f"{key}_q{quality}{FORMATS[fmt][1]}"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        ladder.append([quality, len(data), round(distance, 5), str(path)])
+
+    result = {"width": img.width, "height": img.height, "ladder": ladder}
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, cache_path)
+    return result
+
+
+def allocate_budget(ladders: list, budget_bytes: int, max_distance: float) -> tuple:
+    """
+    Choose one ladder step per image to fit a byte budget.
+
+    Steps above max_distance are never used (except an image's best step,
+    when even that is above it). Starting from the best step everywhere,
+    the step down that saves the most bytes per unit of added distance is
+    taken until the total fits the budget.
+
+    Args:
+        ladders: Per image, [[quality, bytes, distance, ...], ...] best quality first
+
+    Returns:
+        (chosen step index per image, total bytes)
+    """
+    allowed = [
+        [step for step in ladder if step[2] <= max_distance] or ladder[:1]
+        for ladder in ladders
+    ]
+    chosen = [0] * len(ladders)
+    total = sum(steps[0][1] for steps in allowed)
+
+    def push(i):
+        steps, j = allowed[i], chosen[i]
+        if j + 1 < len(steps):
+            saved = steps[j][1] - steps[j + 1][1]
+            added = max(steps[j + 1][2] - steps[j][2], 1e-6)
+            heapq.heappush(heap, (-saved / added, i))
+
+    heap = []
+    for i in range(len(ladders)):
+        push(i)
+    while total > budget_bytes and heap:
+        _, i = heapq.heappop(heap)
+        steps, j = allowed[i], chosen[i]
+        total -= steps[j][1] - steps[j + 1][1]
+        chosen[i] = j + 1
+        push(i)
+
+    # Map back to indices into the full ladders
+    indices = [ladders[i].index(allowed[i][chosen[i]]) for i in range(len(ladders))]
+    return indices, total
+
+
+def _measure_task(args: tuple) -> tuple:
+    source, max_size, fmt, cache_dir = args
+    try:
+        return source, measure_image(source, max_size, fmt, cache_dir), None
+    except Exception as e:
+        return source, None, str(e)
+
+
+def optimize_images(sources: list, budget_bytes: Optional[int] = None,
+                    fmt: str = DELIVERY_SPECS["format"],
+                    max_distance: float = DELIVERY_SPECS["max_distance"],
+                    max_size: tuple = (DELIVERY_SPECS["max_width_px"], DELIVERY_SPECS["max_height_px"]),
+                    cache_dir: Path = CACHE_DIR, workers: Optional[int] = None) -> dict:
+    """
+    Re-encode a set of images (e.g. one book's pages) to fit a byte budget.
+
+    Args:
+        sources: Source image paths
+        budget_bytes: Total for all images (default: DELIVERY_SPECS book_budget_kb)
+        fmt: "webp" or "jpeg"
+        max_distance: Largest 1 - SSIM accepted for any image
+        max_size: Images are shrunk to fit this (width, height)
+        cache_dir: Measurement and encode cache
+        workers: Process pool size (default: CPU count, 1 = no pool)
+
+    Returns:
+        {source: {"path", "quality", "bytes", "distance", "width", "height"}}.
+        Images that fail to load are left out (callers fall back to the source).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown delivery format: {fmt} (use {', '.join(FORMATS)})")
+    if budget_bytes is None:
+        budget_bytes = DELIVERY_SPECS["book_budget_kb"] * 1000
+    sources = list(dict.fromkeys(map(str, sources)))
+    workers = workers or os.cpu_count() or 1
+    max_size = tuple(max_size)
+
+    tasks = [(source, max_size, fmt, Path(cache_dir)) for source in sources]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_measure_task, tasks))
+    else:
+        results = [_measure_task(task) for task in tasks]
+
+    measured = []
+    for source, result, error in results:
+        if error:
+            print(f"Warning: Could not optimize image {source}: {error}")
+        else:
+            measured.append((source, result))
+    return choose_qualities(measured, budget_bytes, max_distance)
+
+
+def choose_qualities(measured: list, budget_bytes: int,
+                     max_distance: float = DELIVERY_SPECS["max_distance"]) -> dict:
+    """
+    Pick each image's encode from its measure_image() result (see allocate_budget).
+
+    Args:
+        measured: [(source, measure_image result), ...]
+
+    Returns:
+        {source: {"path", "quality", "bytes", "distance", "width", "height"}}
+    """
+    if not measured:
+        return {}
+    indices, _ = allocate_budget([m["ladder"] for _, m in measured], budget_bytes, max_distance)
+    steps = [m["ladder"][i] for (_, m), i in zip(measured, indices)]
+    return {
+        source: {
+            "path": step[3],
+            "quality": step[0],
+            "bytes": step[1],
+            "distance": step[2],
+            "width": m["width"],
+            "height": m["height"],
+        }
+        for (source, m), step in zip(measured, steps)
+    }
+
+
+def optimize_book(book_path: str, output_dir: Path = OUTPUT_DIR, books_dir: Path = BOOKS_DIR,
+                  budget_bytes: Optional[int] = None, fmt: str = DELIVERY_SPECS["format"],
+                  cache_dir: Path = CACHE_DIR, workers: Optional[int] = None) -> dict:
+    """
+    Optimize a book's page images and write them with a manifest for the web reader.
+
+    Files go to output_dir/<book>/pageNN<suffix>, plus manifest.json.
+
+    Returns:
+        The manifest: book, format, budget_bytes, bytes, source_bytes, pages
+        ({page number: {"file", "quality", "bytes", "distance", "width", "height"}})
+    """
+    from preflight import resolve_page_images
+
+    book_path = Path(book_path)
+    with open(book_path) as f:
+        book = json.load(f)
+    images = resolve_page_images(book_path, book, books_dir)
+    if not images:
+        raise ValueError(f"No page images found for {book_path.stem}")
+
+    if budget_bytes is None:
+        budget_bytes = DELIVERY_SPECS["book_budget_kb"] * 1000
+    optimized = optimize_images(list(images.values()), budget_bytes, fmt,
+                                cache_dir=cache_dir, workers=workers)
+    return write_bundle(book_path.stem, images, optimized, output_dir, fmt, budget_bytes)
+
+
+def write_bundle(name: str, images: dict, optimized: dict, output_dir: Path = OUTPUT_DIR,
+                 fmt: str = DELIVERY_SPECS["format"],
+                 budget_bytes: int = DELIVERY_SPECS["book_budget_kb"] * 1000) -> dict:
+    """
+    Write a book's optimized images and manifest.json to output_dir/<name>/.
+
+    Args:
+        name: Book name (the JSON file's stem)
+        images: {page number: source image path}
+        optimized: optimize_images() / choose_qualities() result
+
+    Returns:
+        The manifest
+    """
+    book_dir = Path(output_dir) / name
+    book_dir.mkdir(parents=True, exist_ok=True)
+    suffix = FORMATS[fmt][1]
+    pages = {}
+    for page, source in sorted(images.items()):
+        result = optimized.get(str(source))
+        if result is None:
+            continue
+        filename = f"page{page:02d}{suffix}"
+        tmp_path = book_dir / f"{filename}.{os.getpid()}.tmp"
+        shutil.copyfile(result["path"], tmp_path)
+        os.replace(tmp_path, book_dir / filename)
+        pages[str(page)] = {"file": filename, **{k: v for k, v in result.items() if k != "path"}}
+
+    # Drop files left over from an earlier run (other format, removed pages)
+    keep = {p["file"] for p in pages.values()} | {"manifest.json"}
+    for old in book_dir.iterdir():
+        if old.is_file() and old.name not in keep:
+            old.unlink()
+
+    manifest = {
+        "book": name,
+        "format": fmt,
+        "budget_bytes": budget_bytes,
+        "bytes": sum(p["bytes"] for p in pages.values()),
+        "source_bytes": sum(os.path.getsize(images[int(n)]) for n in pages),
+        "pages": pages,
+    }
+    manifest_path = book_dir / "manifest.json"
+    tmp_path = manifest_path.with_name(f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-encode book images for EPUB and web delivery.")
+    parser.add_argument("books", nargs="+", help="Book names or JSON paths (e.g. volcano_story)")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR), help="Where optimized images are written")
+    parser.add_argument("--budget-kb", type=int, default=DELIVERY_SPECS["book_budget_kb"],
+                        help="Byte budget per book, in kB")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=DELIVERY_SPECS["format"])
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    for name in args.books:
+        book_path = Path(name) if name.endswith(".json") else BOOKS_DIR / f"{name}.json"
+        if not book_path.exists():
+            print(f"Not found: {book_path}")
+            sys.exit(1)
+        start = time.perf_counter()
+        try:
+            manifest = optimize_book(book_path, Path(args.output_dir), budget_bytes=args.budget_kb * 1000,
+                                     fmt=args.format, workers=args.workers)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+        pages = manifest["pages"].values()
+        fits = "within" if manifest["bytes"] <= manifest["budget_bytes"] else "OVER"
+        print(f"{manifest['book']}: {len(manifest['pages'])} images in {time.perf_counter() - start:.2f}s")
+        print(f"  {manifest['source_bytes'] / 1e6:.1f} MB -> {manifest['bytes'] / 1e6:.2f} MB "
+              f"({fits} {manifest['budget_bytes'] / 1e6:.2f} MB budget)")
+        if pages:
+            print(f"  quality {min(p['quality'] for p in pages)}-{max(p['quality'] for p in pages)}, "
+                  f"max distance {max(p['distance'] for p in pages):.4f}")
@@ -1,6 +1,12 @@
 """
 Fixed-layout EPUB generator for Funbookies minibooks.
 Creates print-ready EPUBs that maintain exact positioning.
+
+Page images are looked up once per build and streamed into the archive
+from disk. PNG/JPEG/WebP data is already compressed, so it is stored as is
+rather than deflated again. With optimize_images=True the print images are
+first re-encoded as JPEG to the book's delivery budget (see delivery.py;
+WebP is not an EPUB 3 core media type).
 """
 
 import os
@@ -8,7 +14,10 @@ import zipfile
 from pathlib import Path
 from typing import List, Optional
 from dataclasses import dataclass, field
-from config import PRINT_SPECS, BOOK_SPECS, BRAND
+from config import PRINT_SPECS, BOOK_SPECS, BRAND, DELIVERY_SPECS
+
+# Media that is already compressed: stored in the archive without deflate
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
 
 
 @dataclass
@@ -32,46 +41,78 @@ class Book:
 class FixedLayoutEPUB:
     """Generate fixed-layout EPUB 3.0 for print-ready minibooks."""
 
-    def __init__(self, book: Book, output_dir: str = "output"):
+    def __init__(self, book: Book, output_dir: str = "output", filename: Optional[str] = None,
+                 optimize_images: bool = False):
         self.book = book
+        self.filename = filename  # Defaults to the book title
+        self.optimize_images = optimize_images  # Re-encode images for screens (delivery.py)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
 
         self.width = PRINT_SPECS["trim_width_px"]
         self.height = PRINT_SPECS["trim_height_px"]
 
+        self._images = None  # page number -> image file, see _image_files()
+
     def generate(self) -> str:
         """Generate the EPUB file and return its path."""
-        epub_path = self.output_dir / f"{self._safe_filename(self.book.title)}.epub"
-
-        with zipfile.ZipFile(epub_path, 'w', zipfile.ZIP_DEFLATED) as epub:
-            epub.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
-            epub.writestr('META-INF/container.xml', self._container_xml())
-            epub.writestr('OEBPS/content.opf', self._content_opf())
-            epub.writestr('OEBPS/toc.ncx', self._toc_ncx())
-            epub.writestr('OEBPS/nav.xhtml', self._nav_xhtml())
-            epub.writestr('OEBPS/styles.css', self._styles_css())
-
-            for page in self.book.pages:
-                epub.writestr(f'OEBPS/page{page.number:02d}.xhtml', self._page_xhtml(page))
-
-                if page.image_path and os.path.exists(page.image_path):
-                    ext = Path(page.image_path).suffix.lower()
-                    with open(page.image_path, 'rb') as img:
-                        epub.writestr(f'OEBPS/images/page{page.number:02d}{ext}', img.read())
+        epub_path = self.output_dir / f"{self._safe_filename(self.filename or self.book.title)}.epub"
+        tmp_path = epub_path.with_name(f"{epub_path.name}.{os.getpid()}.tmp")
+        self._images = None  # Look images up again for this build
+
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as epub:
+                epub.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+                epub.writestr('META-INF/container.xml', self._container_xml())
+                epub.writestr('OEBPS/content.opf', self._content_opf())
+                epub.writestr('OEBPS/toc.ncx', self._toc_ncx())
+                epub.writestr('OEBPS/nav.xhtml', self._nav_xhtml())
+                epub.writestr('OEBPS/styles.css', self._styles_css())
+
+                images = self._image_files()
+                for page in self.book.pages:
+                    epub.writestr(f'OEBPS/page{page.number:02d}.xhtml', self._page_xhtml(page))
+
+                    image = images.get(page.number)
+                    if image:
+                        # ZipFile.write copies the file in chunks
+                        ext = self._get_image_ext(page)
+                        compress = zipfile.ZIP_STORED if ext in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                        epub.write(image, f'OEBPS/images/page{page.number:02d}{ext}', compress_type=compress)
+            os.replace(tmp_path, epub_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
         return str(epub_path)
 
+    def _image_files(self) -> dict:
+        """Image file per page number, for pages whose image exists (resolved once per build)."""
+        if self._images is None:
+            self._images = {
+                page.number: page.image_path
+                for page in self.book.pages
+                if page.image_path and os.path.isfile(page.image_path)
+            }
+            if self.optimize_images and self._images:
+                from delivery import optimize_images
+                optimized = optimize_images(list(self._images.values()), fmt=DELIVERY_SPECS["epub_format"])
+                self._images = {
+                    number: optimized[str(path)]["path"] if str(path) in optimized else path
+                    for number, path in self._images.items()
+                }
+        return self._images
+
     def _safe_filename(self, name: str) -> str:
         return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
 
     def _get_image_ext(self, page: Page) -> str:
-        if page.image_path and os.path.exists(page.image_path):
-            return Path(page.image_path).suffix.lower()
-        return ".png"
+        image = self._image_files().get(page.number)
+        return Path(image).suffix.lower() if image else ".png"
 
     def _get_mime_type(self, ext: str) -> str:
-        return {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}.get(ext.lstrip('.'), "image/png")
+        return {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg",
+                "webp": "image/webp"}.get(ext.lstrip('.'), "image/png")
 
     def _container_xml(self) -> str:
         return '''<?xml version="1.0" encoding="UTF-8"?>
@@ -95,7 +136,7 @@ class FixedLayoutEPUB:
             manifest_items.append(
                 f'<item id="{page_id}" href="{page_id}.xhtml" media-type="application/xhtml+xml" properties="rendition:layout-pre-paginated"/>'
             )
-            if page.image_path and os.path.exists(page.image_path):
+            if page.number in self._image_files():
                 ext = self._get_image_ext(page)
                 mime = self._get_mime_type(ext)
                 manifest_items.append(f'<item id="img{page.number:02d}" href="images/{page_id}{ext}" media-type="{mime}"/>')
@@ -165,7 +206,7 @@ html, body {{ margin: 0; padding: 0; width: {self.width}px; height: {self.height
 '''
 
     def _page_xhtml(self, page: Page) -> str:
-        has_image = page.image_path and os.path.exists(page.image_path)
+        has_image = page.number in self._image_files()
         ext = self._get_image_ext(page) if has_image else ""
 
         # Background color based on page type
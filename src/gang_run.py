@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Gang-run press sheets: many short-run books printed together on SRA3.
+
+Each saddle-stitched book is a set of folded sheets (see imposition.py); a
+book ordered in quantity q needs each of its folded sheets printed q times.
+A gang run puts folded sheets from different books side by side on one
+press sheet, so a run of 100 press sheets with four slots yields 100 copies
+of four different folded sheets.
+
+Placement is greedy by remaining quantity: each form (one press sheet
+layout, printed `run` times) takes the folded sheets that still need the
+most copies, spare slots go to the ones with the most copies per slot, and
+the run is the longest that finishes some of its folded sheets while
+keeping spare copies under MAX_OVERRUN of the form's output. Every form
+finishes at least one folded sheet, so there are at most as many forms as
+folded sheets and planning is O(tiles x slots x log tiles) - hundreds of
+titles plan in milliseconds.
+
+The combined PDF is streamed with imposition.StreamingPDFWriter: each book
+page becomes one form XObject, and its images are copied once however many
+forms use it. A JSON job ticket describing every form is written next to it.
+
+Usage:
+    from gang_run import GangJob, build_gang_run
+
+    ticket = build_gang_run(
+        [GangJob("output/print/castle_rats_print.pdf", 200),
+         GangJob("output/print/jungle_zee_print.pdf", 50)],
+        "output/print/gang_run.pdf",
+    )
+
+    python src/gang_run.py output/print/castle_rats_print.pdf:200 \\
+        output/print/jungle_zee_print.pdf:50 -o output/print/gang_run.pdf
+"""
+
+import os
+import sys
+import json
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from config import PRINT_SPECS
+from imposition import (
+    MM, MARK_LENGTH_MM, MARK_WIDTH_PT, StreamingPDFWriter, fold_marks, label,
+    place_spread, registration_mark, saddle_stitch_order,
+)
+
+# Press sheet, portrait (width, height) in mm; both orientations are tried
+SRA3_MM = (320, 450)
+
+# Sheet furniture, in mm
+MARGIN_MM = 10   # Gripper edge and marks around the grid
+GUTTER_MM = 4    # Between the bleed boxes of neighbouring slots
+
+# Share of a form's output that may be spare copies (saves extra forms)
+MAX_OVERRUN = 0.1
+
+# Source PDFs kept open at once (pypdf holds each one in memory)
+MAX_OPEN_READERS = 16
+
+
+@dataclass
+class GangJob:
+    """One title in a gang run."""
+    pdf: str
+    quantity: int
+    name: str = ""
+
+    def __post_init__(self):
+        if self.quantity < 1:
+            raise ValueError(f"Quantity must be at least 1: {self.pdf} ({self.quantity})")
+        self.name = self.name or Path(self.pdf).stem.replace("_print", "")
+
+
+@dataclass
+class Tile:
+    """One folded sheet of one book: a front and a back spread."""
+    job: int
+    sheet: int
+    front: tuple
+    back: tuple
+    demand: int
+
+
+def sheet_layout(tile_mm: tuple, sheet_mm: tuple = SRA3_MM, margin_mm: float = MARGIN_MM,
+                 gutter_mm: float = GUTTER_MM) -> dict:
+    """
+    Best grid of tiles on a press sheet, trying both sheet orientations.
+
+    Args:
+        tile_mm: (width, height) of a spread including bleed
+        sheet_mm: Press sheet size
+
+    Returns:
+        {"sheet_mm": (w, h), "columns": int, "rows": int,
+         "origins_mm": [(x, y) of each slot's bleed box, row by row from the top],
+         "back_side": how the sheet is turned for the back}
+
+    Backs are imposed for a turn about the sheet's vertical edge (each
+    slot's back is its mirror column, upright). That is the long edge of a
+    portrait sheet and the short edge of a landscape one.
+    """
+    tile_w, tile_h = tile_mm
+    best = None
+    for sheet_w, sheet_h in (tuple(sheet_mm), tuple(sheet_mm)[::-1]):
+        columns = int((sheet_w - 2 * margin_mm + gutter_mm) // (tile_w + gutter_mm))
+        rows = int((sheet_h - 2 * margin_mm + gutter_mm) // (tile_h + gutter_mm))
+        if best is None or columns * rows > best["columns"] * best["rows"]:
+            best = {"sheet_mm": (sheet_w, sheet_h), "columns": columns, "rows": rows}
+
+    if best["columns"] * best["rows"] == 0:
+        raise ValueError(f"A {tile_w:.0f} x {tile_h:.0f} mm spread does not fit on "
+                         f"a {sheet_mm[0]} x {sheet_mm[1]} mm sheet")
+
+    # Centre the grid on the sheet
+    sheet_w, sheet_h = best["sheet_mm"]
+    grid_w = best["columns"] * (tile_w + gutter_mm) - gutter_mm
+    grid_h = best["rows"] * (tile_h + gutter_mm) - gutter_mm
+    left = (sheet_w - grid_w) / 2
+    top = (sheet_h + grid_h) / 2
+    best["back_side"] = "turn on long edge" if sheet_h >= sheet_w else "turn on short edge"
+    best["origins_mm"] = [
+        (left + column * (tile_w + gutter_mm), top - (row + 1) * tile_h - row * gutter_mm)
+        for row in range(best["rows"]) for column in range(best["columns"])
+    ]
+    return best
+
+
+def plan_forms(demands: list, slots: int, max_overrun: float = MAX_OVERRUN) -> list:
+    """
+    Assign tiles to press sheet forms.
+
+    Args:
+        demands: Copies needed of each tile
+        slots: Slots per press sheet side
+        max_overrun: Share of a form's printed slots that may be spare copies,
+                     spent on finishing more of its tiles in one run
+
+    Returns:
+        [{"run": press sheets, "slots": [tile index per slot]}, ...]
+    """
+    # Largest remaining demand first; ties keep tiles of one book together
+    heap = [(-demand, index) for index, demand in enumerate(demands) if demand > 0]
+    heapq.heapify(heap)
+    forms = []
+
+    while heap:
+        group = [heapq.heappop(heap) for _ in range(min(slots, len(heap)))]
+        remaining = {index: -negative for negative, index in group}
+        counts = {index: 1 for index in remaining}
+
+        # Spare slots go to the tiles needing the most copies per slot
+        for _ in range(slots - len(group)):
+            index = max(counts, key=lambda i: (-(-remaining[i] // counts[i]), -i))
+            counts[index] += 1
+
+        # The shortest run finishes one tile; a longer one may finish more
+        # if the copies it overprints stay within the allowance
+        runs = sorted({-(-remaining[i] // counts[i]) for i in counts})
+        run = runs[0]
+        for candidate in runs[1:]:
+            spare = sum(max(0, candidate * counts[i] - remaining[i]) for i in counts)
+            if spare <= max_overrun * candidate * slots:
+                run = candidate
+        forms.append({
+            "run": run,
+            "slots": [index for index in counts for _ in range(counts[index])],
+        })
+
+        for index, count in counts.items():
+            left = remaining[index] - run * count
+            if left > 0:
+                heapq.heappush(heap, (-left, index))
+
+    return forms
+
+
+def _tiles(jobs: list, readers) -> list:
+    tiles = []
+    for job_index, job in enumerate(jobs):
+        page_count = len(readers(job_index).pages)
+        if page_count == 0:
+            raise ValueError(f"No pages in {job.pdf}")
+        for sheet_index, (front, back) in enumerate(saddle_stitch_order(page_count), 1):
+            tiles.append(Tile(job_index, sheet_index, front, back, job.quantity))
+    return tiles
+
+
+def _pages_label(pair: tuple) -> str:
+    return f"{pair[0] or 'blank'}|{pair[1] or 'blank'}"
+
+
+def _sheet_marks(layout: dict, tile_pt: tuple, trim_w: float, trim_h: float, bleed: float) -> str:
+    """Crop and fold marks in the sheet margins along every cut and fold line of the grid."""
+    sheet_w, sheet_h = (v * MM for v in layout["sheet_mm"])
+    origins = [(x * MM, y * MM) for x, y in layout["origins_mm"]]
+    length = MARK_LENGTH_MM * MM
+    grid_x0 = min(x for x, _ in origins)
+    grid_y0 = min(y for _, y in origins)
+    grid_x1 = grid_x0 + layout["columns"] * tile_pt[0] + (layout["columns"] - 1) * GUTTER_MM * MM
+    grid_y1 = grid_y0 + layout["rows"] * tile_pt[1] + (layout["rows"] - 1) * GUTTER_MM * MM
+
+    cuts_x = sorted({x + bleed for x, _ in origins} | {x + bleed + 2 * trim_w for x, _ in origins})
+    cuts_y = sorted({y + bleed for _, y in origins} | {y + bleed + trim_h for _, y in origins})
+    ops = []
+    for x in cuts_x:
+        ops.append(f"{x:.3f} {grid_y0 - bleed:.3f} m {x:.3f} {grid_y0 - bleed - length:.3f} l S")
+        ops.append(f"{x:.3f} {grid_y1 + bleed:.3f} m {x:.3f} {grid_y1 + bleed + length:.3f} l S")
+    for y in cuts_y:
+        ops.append(f"{grid_x0 - bleed:.3f} {y:.3f} m {grid_x0 - bleed - length:.3f} {y:.3f} l S")
+        ops.append(f"{grid_x1 + bleed:.3f} {y:.3f} m {grid_x1 + bleed + length:.3f} {y:.3f} l S")
+    for spine in sorted({x + bleed + trim_w for x, _ in origins}):
+        ops.append(fold_marks(spine, grid_y0, grid_y1, bleed).strip())
+
+    margin = MARGIN_MM * MM
+    for cx, cy in ((sheet_w / 2, margin / 2), (sheet_w / 2, sheet_h - margin / 2),
+                   (margin / 2, sheet_h / 2), (sheet_w - margin / 2, sheet_h / 2)):
+        ops.append(registration_mark(cx, cy).strip())
+    return "\n".join(ops) + "\n"
+
+
+def _write_ticket(ticket: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(ticket, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_gang_run(jobs: list, output_pdf: str, ticket_path: str = None,
+                   sheet_mm: tuple = SRA3_MM, bleed_mm: float = PRINT_SPECS["bleed_mm"],
+                   marks: bool = True, max_overrun: float = MAX_OVERRUN) -> dict:
+    """
+    Plan a gang run and write its press sheet PDF and job ticket.
+
+    Args:
+        jobs: GangJob per title; page PDFs in reading order (create_print_pdf),
+              all with the same page size
+        output_pdf: Combined PDF path (front and back page per form)
+        ticket_path: Job ticket JSON path (default: output_pdf with .json)
+        sheet_mm: Press sheet size
+        bleed_mm: Bleed around each source page's trim box
+        marks: Draw crop, fold and registration marks and slot labels
+        max_overrun: Spare-copy allowance per form (see plan_forms)
+
+    Returns:
+        The job ticket dict
+    """
+    if not jobs:
+        raise ValueError("No books in gang run")
+
+    open_readers = OrderedDict()
+
+    def reader_for(job_index: int) -> PdfReader:
+        # A bounded set of open sources; objects already copied are memoized
+        # by the writer, so reopening a book never re-embeds anything
+        reader = open_readers.pop(job_index, None)
+        if reader is None:
+            reader = PdfReader(jobs[job_index].pdf)
+            if len(open_readers) >= MAX_OPEN_READERS:
+                open_readers.popitem(last=False)
+        open_readers[job_index] = reader
+        return reader
+
+    # Page geometry from the first book, in points
+    x0, y0, x1, y1 = (float(v) for v in reader_for(0).pages[0].mediabox)
+    page_size = (x1 - x0, y1 - y0)
+    bleed = bleed_mm * MM
+    trim_w, trim_h = page_size[0] - 2 * bleed, page_size[1] - 2 * bleed
+    tile_pt = (2 * trim_w + 2 * bleed, trim_h + 2 * bleed)
+
+    tiles = _tiles(jobs, reader_for)
+    for job_index, job in enumerate(jobs):
+        box = reader_for(job_index).pages[0].mediabox
+        if abs(float(box.width) - page_size[0]) > 0.5 or abs(float(box.height) - page_size[1]) > 0.5:
+            raise ValueError(f"{job.pdf} has a different page size from {jobs[0].pdf}")
+
+    layout = sheet_layout((tile_pt[0] / MM, tile_pt[1] / MM), sheet_mm)
+    slots = layout["columns"] * layout["rows"]
+    forms = plan_forms([tile.demand for tile in tiles], slots, max_overrun)
+
+    sheet_w, sheet_h = (v * MM for v in layout["sheet_mm"])
+    produced = [0] * len(tiles)
+    ticket_forms = []
+
+    with StreamingPDFWriter(output_pdf) as writer:
+        for form_number, form in enumerate(forms, 1):
+            for side_name in ("front", "back"):
+                ops = []
+                xobjects = {}
+                for slot, tile_index in enumerate(form["slots"]):
+                    tile = tiles[tile_index]
+                    row, column = divmod(slot, layout["columns"])
+                    if side_name == "back":
+                        # Turned about the vertical edge (layout["back_side"]):
+                        # the back of a slot is its mirror column
+                        column = layout["columns"] - 1 - column
+                    ox, oy = layout["origins_mm"][row * layout["columns"] + column]
+                    tx0, ty0 = ox * MM + bleed, oy * MM + bleed
+                    pair = tile.front if side_name == "front" else tile.back
+                    ops.append(place_spread(writer, reader_for(tile.job), jobs[tile.job].pdf, pair,
+                                            tx0, ty0, trim_w, trim_h, bleed, xobjects,
+                                            prefix=f"B{tile.job}P"))
+                    if marks:
+                        text = f"{jobs[tile.job].name}  sheet {tile.sheet} {side_name}  pages {_pages_label(pair)}"
+                        ops.append("q 1 1 1 1 k " + label(text, tx0, ty0 + trim_h + bleed + 1.5) + "Q\n")
+
+                if marks:
+                    ops.append(f"q {MARK_WIDTH_PT} w 1 1 1 1 K 1 1 1 1 k\n")
+                    ops.append(_sheet_marks(layout, tile_pt, trim_w, trim_h, bleed))
+                    ops.append(label(f"Gang run  form {form_number}/{len(forms)} {side_name}  "
+                                     f"run {form['run']}", MARGIN_MM * MM, 3 * MM))
+                    ops.append("Q\n")
+
+                writer.add_page(
+                    sheet_w, sheet_h, "".join(ops).encode("latin-1"), xobjects,
+                    fonts={"F1": writer.label_font()} if marks else None,
+                )
+
+            # The form is written; let the open readers drop parsed objects
+            for reader in open_readers.values():
+                reader.resolved_objects.clear()
+
+            for tile_index in form["slots"]:
+                produced[tile_index] += form["run"]
+            ticket_forms.append({
+                "form": form_number,
+                "run": form["run"],
+                "slots": [{
+                    "slot": slot + 1,
+                    "book": jobs[tiles[i].job].name,
+                    "sheet": tiles[i].sheet,
+                    "front": _pages_label(tiles[i].front),
+                    "back": _pages_label(tiles[i].back),
+                } for slot, i in enumerate(form["slots"])],
+            })
+
+        writer.close(title=f"Gang run ({len(jobs)} books, {len(forms)} forms)")
+
+    books = []
+    for job_index, job in enumerate(jobs):
+        made = [produced[i] for i, tile in enumerate(tiles) if tile.job == job_index]
+        books.append({
+            "name": job.name,
+            "pdf": str(job.pdf),
+            "quantity": job.quantity,
+            "sheets": len(made),
+            "copies": min(made),
+            "overrun": sum(made) - job.quantity * len(made),
+        })
+
+    press_sheets = sum(form["run"] for form in forms)
+    ticket = {
+        "output": str(output_pdf),
+        "sheet_size_mm": list(layout["sheet_mm"]),
+        "columns": layout["columns"],
+        "rows": layout["rows"],
+        "slots_per_side": slots,
+        "bleed_mm": bleed_mm,
+        "back_side": layout["back_side"],
+        "forms": ticket_forms,
+        "press_sheets": press_sheets,
+        "slot_utilization_percent": round(
+            sum(tile.demand for tile in tiles) / (press_sheets * slots) * 100, 1) if press_sheets else 0.0,
+        "books": books,
+    }
+    _write_ticket(ticket, Path(ticket_path) if ticket_path else Path(output_pdf).with_suffix(".json"))
+    return ticket
+
+
+def _parse_job(spec: str) -> GangJob:
+    """PATH:QUANTITY from the command line."""
+    path, _, quantity = spec.rpartition(":")
+    if not path or not quantity.isdigit():
+        raise ValueError(f"Expected PATH:QUANTITY, got {spec!r}")
+    return GangJob(path, int(quantity))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Combine book PDFs onto shared press sheets.")
+    parser.add_argument("jobs", nargs="+", help="Page PDF and copies, as PATH:QUANTITY")
+    parser.add_argument("-o", "--output", default="output/print/gang_run.pdf", help="Combined PDF path")
+    parser.add_argument("--ticket", default=None, help="Job ticket path (default: <output>.json)")
+    parser.add_argument("--sheet", default="320x450", help="Press sheet size in mm, WxH (default: SRA3)")
+    parser.add_argument("--no-marks", action="store_true", help="Omit marks and labels")
+    args = parser.parse_args()
+
+    try:
+        jobs = [_parse_job(spec) for spec in args.jobs]
+        sheet = tuple(float(v) for v in args.sheet.lower().split("x"))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    for job in jobs:
+        if not os.path.exists(job.pdf):
+            print(f"Not found: {job.pdf}")
+            sys.exit(1)
+
+    start = time.perf_counter()
+    ticket = build_gang_run(jobs, args.output, args.ticket, sheet_mm=sheet, marks=not args.no_marks)
+    elapsed = time.perf_counter() - start
+
+    print(f"Gang run: {len(jobs)} books on {len(ticket['forms'])} forms, "
+          f"{ticket['press_sheets']} press sheets "
+          f"({ticket['columns']}x{ticket['rows']} on {ticket['sheet_size_mm'][0]:g} x "
+          f"{ticket['sheet_size_mm'][1]:g} mm, {ticket['slot_utilization_percent']}% used, "
+          f"back: {ticket['back_side']}) in {elapsed:.2f}s")
+    for book in ticket["books"]:
+        print(f"  {book['name']:<24} {book['quantity']:>5} ordered, {book['copies']:>5} made")
+    print(f"  {args.output}")
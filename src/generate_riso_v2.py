@@ -28,6 +28,13 @@ High contrast. Large solid color areas. Minimal background details.
 2-3 spot colors maximum. Exaggerated expressions. Clean vector-like shapes.
 NO TEXT IN IMAGE. Child-friendly."""
 
+# Attempts per page: an image that fails or drifts outside the book's Riso
+# palette (see riso.palette_gate, which only reports unless
+# riso.PALETTE_GATE_ENFORCED) is generated again. When every attempt is
+# rejected, the best rejected candidate is restored and the page still
+# counts as failed
+PALETTE_ATTEMPTS = 2
+
 # Book-specific character definitions
 CHARACTERS = {
     "volcano": """
@@ -71,8 +78,12 @@ COLOR_PALETTES = {
 }
 
 
-def generate_image(prompt: str, output_name: str, book_key: str) -> bool:
-    """Generate a single Riso-style image."""
+def generate_image(prompt: str, output_name: str, book_key: str, inks: list = None) -> bool:
+    """Generate a single Riso-style image.
+
+    With inks (the book's Riso inks), the saved image must also pass the
+    palette gate; a rejected image is moved aside and False is returned.
+    """
     # Build full prompt with character + style
     character_def = CHARACTERS.get(book_key, "")
     color_palette = COLOR_PALETTES.get(book_key, "")
@@ -124,6 +135,9 @@ def generate_image(prompt: str, output_name: str, book_key: str) -> bool:
                         with open(output_path, "wb") as f:
                             f.write(resp.content)
                         print(f"OK Saved: {output_path}")
+                        if inks:
+                            from riso import palette_gate
+                            return palette_gate(output_path, inks)
                         return True
 
         print(f"X No image URL found")
@@ -150,12 +164,16 @@ def generate_book(book_key: str):
     with open(json_path) as f:
         book = json.load(f)
 
+    from riso import book_inks
+    inks = book_inks(book)
+
     print("="*60)
     print(f"GENERATING RISO V2: {book['title']}")
     print(f"Colors: {book.get('riso_colors', {})}")
     print("="*60)
 
     results = []
+    restored = set()
 
     for page in book.get("pages", []):
         page_num = page.get("page", 0)
@@ -178,7 +196,16 @@ def generate_book(book_key: str):
         if riso_notes:
             image_prompt = f"{image_prompt}\n\nRISO COLOR NOTES: {riso_notes}"
 
-        success = generate_image(image_prompt, filename, book_key)
+        for attempt in range(PALETTE_ATTEMPTS):
+            success = generate_image(image_prompt, filename, book_key, inks)
+            if success:
+                break
+        else:
+            # Out of attempts: keep the closest off-palette image in place,
+            # still reported as a failure
+            from riso import restore_best_candidate
+            if restore_best_candidate(IMAGES_DIR / filename, inks):
+                restored.add(filename)
         results.append((filename, success))
 
     # Summary
@@ -189,7 +216,8 @@ def generate_book(book_key: str):
     print(f"Generated: {success_count}/{len(results)}")
     for filename, success in results:
         status = "OK" if success else "X"
-        print(f"  {status} {filename}")
+        note = " (off-palette: best rejected candidate kept)" if filename in restored else ""
+        print(f"  {status} {filename}{note}")
 
     return results
 
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Resample page images to their placement size before PDF embedding.
+
+Image backends return 1-2K pixel PNGs, but a 106 x 79.5 mm placement only
+needs about 1252 x 939 pixels at 300 DPI. Embedding the raw files makes
+print PDFs large and slow to build. This stage resamples each image to
+exactly its placement size at the target DPI (never upscaling) and stores it
+as a high-quality JPEG, or PNG when the image has transparency.
+
+For CMYK print (PDF/X) the resampled image is also converted from sRGB to
+the press's ICC profile. The colour transform is built once per process
+and applied to whole images (and to lists of layout colours) in one call.
+
+Work is spread over a process pool and results are cached by source content
+hash, target size and (for CMYK) profile hash and rendering intent, so
+rebuilding a book only processes changed images.
+
+Usage:
+    from image_prep import prepare_images
+
+    prepared = prepare_images(["web/books/images/volcano_page01.png"], 106, 79.5)
+    pdf.image(prepared["web/books/images/volcano_page01.png"], x=0, y=0, w=106, h=79.5)
+
+    # CMYK JPEGs for PDF/X
+    prepared = prepare_images(sources, 106, 79.5, cmyk_profile="profiles/coated_fogra39.icc")
+
+    python src/image_prep.py web/books/images/*.png   # warm the cache
+"""
+
+import io
+import os
+import sys
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from PIL import Image, ImageCms
+
+from config import PRINT_SPECS, CMYK_SPECS
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+CACHE_DIR = ROOT_DIR / "output" / ".image_cache"
+
+# Bump when the resampling or encoding changes, to invalidate cached files
+PREP_VERSION = 1
+
+# JPEG settings for print: high quality, no chroma subsampling
+JPEG_QUALITY = 95
+JPEG_SUBSAMPLING = 0
+
+
+# ImageCms rendering intents by name
+RENDERING_INTENTS = {
+    "perceptual": ImageCms.Intent.PERCEPTUAL,
+    "relative_colorimetric": ImageCms.Intent.RELATIVE_COLORIMETRIC,
+    "saturation": ImageCms.Intent.SATURATION,
+    "absolute_colorimetric": ImageCms.Intent.ABSOLUTE_COLORIMETRIC,
+}
+
+# sRGB -> CMYK transforms for this process: (profile path, intent) -> (profile hash, transform)
+_TRANSFORMS = {}
+
+# Converted layout colours: (profile hash, intent, rgb) -> cmyk
+_COLORS = {}
+
+
+def cmyk_transform(profile_path: str, intent: str = CMYK_SPECS["rendering_intent"]) -> tuple:
+    """
+    The sRGB -> CMYK transform for an ICC profile, built once per process.
+
+    Returns:
+        (profile content hash, ImageCms transform)
+    """
+    key = (str(profile_path), intent)
+    if key not in _TRANSFORMS:
+        if intent not in RENDERING_INTENTS:
+            raise ValueError(f"Unknown rendering intent: {intent} (use {', '.join(RENDERING_INTENTS)})")
+        data = Path(profile_path).read_bytes()
+        profile = ImageCms.ImageCmsProfile(io.BytesIO(data))
+        if profile.profile.xcolor_space.strip() != "CMYK":
+            raise ValueError(f"Not a CMYK profile: {profile_path}")
+        transform = ImageCms.buildTransform(
+            ImageCms.createProfile("sRGB"), profile, "RGB", "CMYK",
+            renderingIntent=RENDERING_INTENTS[intent],
+        )
+        _TRANSFORMS[key] = (hashlib.sha256(data).hexdigest(), transform)
+    return _TRANSFORMS[key]
+
+
+def cmyk_colors(colors: list, profile_path: str, intent: str = CMYK_SPECS["rendering_intent"]) -> list:
+    """
+    Convert RGB colours (0-255 tuples) to CMYK (0-255 tuples) through a profile.
+
+    Colours not seen before are converted together, as one row of pixels.
+    """
+    profile_hash, transform = cmyk_transform(profile_path, intent)
+    todo = [c for c in dict.fromkeys(map(tuple, colors)) if (profile_hash, intent, c) not in _COLORS]
+    if todo:
+        row = Image.new("RGB", (len(todo), 1))
+        row.putdata(todo)
+        converted = ImageCms.applyTransform(row, transform)
+        for index, rgb in enumerate(todo):
+            _COLORS[(profile_hash, intent, rgb)] = converted.getpixel((index, 0))
+    return [_COLORS[(profile_hash, intent, tuple(c))] for c in colors]
+
+
+def placement_pixels(width_mm: float, height_mm: float, dpi: int = PRINT_SPECS["dpi"]) -> tuple:
+    """Pixel size of a placement at a DPI, e.g. 106 x 79.5 mm at 300 DPI -> (1252, 939)."""
+    return round(width_mm / 25.4 * dpi), round(height_mm / 25.4 * dpi)
+
+
+def _has_transparency(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _cache_path(source_hash: str, size: tuple, cache_dir: Path, variant: str = "") -> Path:
+    """Cache entry for a source and target size (extension chosen on write)."""
+    return Path(cache_dir) / f"{source_hash[:24]}_{size[0]}x{size[1]}_v{PREP_VERSION}{variant}"
+
+
+def _find_cached(base: Path) -> Optional[Path]:
+    for suffix in (".jpg", ".png"):
+        path = base.with_suffix(suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def prepare_image(source: str, size: tuple, cache_dir: Path = CACHE_DIR,
+                  cmyk_profile: Optional[str] = None,
+                  intent: str = CMYK_SPECS["rendering_intent"],
+                  data: Optional[bytes] = None) -> str:
+    """
+    Resample one image to a pixel size, using the cache when possible.
+
+    Each axis is capped at the source resolution (images are never upscaled;
+    the PDF placement stretches them as before).
+
+    Args:
+        source: Source image path
+        size: Target (width, height) in pixels
+        cache_dir: Where resampled images are stored
+        cmyk_profile: ICC profile to convert to CMYK with (None keeps RGB).
+                      Transparency is flattened onto white paper.
+        intent: Rendering intent for the CMYK conversion
+        data: The source file's contents, if already read (it is then not
+              read again)
+
+    Returns:
+        Path of the resampled image
+    """
+    if data is None:
+        data = Path(source).read_bytes()
+    source_hash = hashlib.sha256(data).hexdigest()
+    variant = ""
+    if cmyk_profile:
+        profile_hash, transform = cmyk_transform(cmyk_profile, intent)
+        variant = f"_cmyk{profile_hash[:12]}_{intent}"
+    base = _cache_path(source_hash, size, cache_dir, variant)
+    cached = _find_cached(base)
+    if cached:
+        return str(cached)
+
+    with Image.open(io.BytesIO(data)) as img:
+        target = (min(size[0], img.width), min(size[1], img.height))
+        transparent = _has_transparency(img)
+        img = img.convert("RGBA" if transparent else "RGB")
+        if target != img.size:
+            img = img.resize(target, Image.LANCZOS)
+        if cmyk_profile:
+            if transparent:
+                paper = Image.new("RGB", img.size, (255, 255, 255))
+                paper.paste(img, mask=img.getchannel("A"))
+                img = paper
+                transparent = False
+            img = ImageCms.applyTransform(img, transform)
+
+        path = base.with_suffix(".png" if transparent else ".jpg")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        if transparent:
+            img.save(tmp_path, "PNG", optimize=True)
+        else:
+            img.save(tmp_path, "JPEG", quality=JPEG_QUALITY, subsampling=JPEG_SUBSAMPLING,
+                     dpi=(PRINT_SPECS["dpi"], PRINT_SPECS["dpi"]))
+        os.replace(tmp_path, path)
+
+    return str(path)
+
+
+def _prepare_task(args: tuple) -> tuple:
+    source, size, cache_dir, cmyk_profile, intent = args
+    return source, prepare_image(source, size, cache_dir, cmyk_profile, intent)
+
+
+def prepare_images(sources: list, width_mm: float, height_mm: float,
+                   dpi: int = PRINT_SPECS["dpi"], cache_dir: Path = CACHE_DIR,
+                   workers: Optional[int] = None, cmyk_profile: Optional[str] = None,
+                   intent: str = CMYK_SPECS["rendering_intent"]) -> dict:
+    """
+    Resample images to a placement size in parallel.
+
+    Args:
+        sources: Source image paths
+        width_mm, height_mm: Placement size on the page
+        dpi: Target resolution
+        cache_dir: Where resampled images are stored
+        workers: Process pool size (default: CPU count, 1 = no pool)
+        cmyk_profile: ICC profile for CMYK output (None keeps RGB)
+        intent: Rendering intent for the CMYK conversion
+
+    Returns:
+        {source path: prepared image path}. Images that fail to load are
+        left out (callers fall back to the source).
+    """
+    size = placement_pixels(width_mm, height_mm, dpi)
+    if cmyk_profile:
+        cmyk_transform(cmyk_profile, intent)  # Fail early on a bad profile
+    tasks = [(str(s), size, Path(cache_dir), cmyk_profile, intent)
+             for s in dict.fromkeys(map(str, sources))]
+
+    workers = workers or os.cpu_count() or 1
+    prepared = {}
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [pool.submit(_prepare_task, task) for task in tasks]
+            for task, future in zip(tasks, futures):
+                try:
+                    source, path = future.result()
+                    prepared[source] = path
+                except Exception as e:
+                    print(f"Warning: Could not prepare image {task[0]}: {e}")
+    else:
+        for task in tasks:
+            try:
+                source, path = _prepare_task(task)
+                prepared[source] = path
+            except Exception as e:
+                print(f"Warning: Could not prepare image {task[0]}: {e}")
+    return prepared
+
+
+if __name__ == "__main__":
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python src/image_prep.py IMAGE [IMAGE ...]")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = prepare_images(sys.argv[1:], PRINT_SPECS["document_width_mm"],
+                             PRINT_SPECS["document_height_mm"] * 0.75)
+    elapsed = time.perf_counter() - start
+
+    before = sum(os.path.getsize(s) for s in results)
+    after = sum(os.path.getsize(p) for p in results.values())
+    print(f"Prepared {len(results)} images in {elapsed:.2f}s")
+    print(f"  {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Saddle-stitch imposition for print-ready press sheets.
+
+create_print_pdf writes pages in reading order. A saddle-stitched book is
+printed as folded sheets, so each sheet side carries two pages that are
+not consecutive: for 24 pages, sheet 1 is 24|1 (front) and 2|23 (back),
+sheet 2 is 22|3 and 4|21, and so on. This module imposes a page PDF into
+those spreads, 2-up (one spread per sheet side) or 4-up (two spreads
+stacked), with crop, fold and registration marks.
+
+Source pages are embedded as form XObjects and copied object by object
+into a PDF that is written as it goes: only object offsets stay in
+memory, and each source object (images, fonts) is copied once however
+many sheets use it.
+
+Usage:
+    from imposition import impose_saddle_stitch
+
+    impose_saddle_stitch("output/print/volcano_curated_print.pdf",
+                         "output/print/volcano_curated_imposed.pdf", up=2)
+
+    python src/imposition.py output/print/volcano_curated_print.pdf --up 4
+"""
+
+import os
+import sys
+import zlib
+from pathlib import Path
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject,
+    IndirectObject, NameObject, NumberObject, StreamObject, TextStringObject,
+)
+
+from config import PRINT_SPECS
+
+# Points per millimetre
+MM = 72 / 25.4
+
+# Sheet furniture, in mm
+SLUG_MM = 12          # Margin around each spread for marks
+MARK_LENGTH_MM = 5    # Crop mark length
+REG_RADIUS_MM = 2.5   # Registration target radius
+MARK_WIDTH_PT = 0.25  # Hairline
+
+
+def saddle_stitch_order(page_count: int) -> list:
+    """
+    Page pairs for each sheet side of a saddle-stitched book.
+
+    Args:
+        page_count: Pages in the book. Blanks pad it to a multiple of 4,
+                    inserted before the last page so the back cover stays
+                    on the outside.
+
+    Returns:
+        [((left, right) front, (left, right) back), ...] per sheet, with
+        1-based page numbers and None for blank pages
+    """
+    total = -(-page_count // 4) * 4
+
+    def page(n):
+        if n == total:
+            return page_count
+        return n if n < page_count else None
+
+    sheets = []
+    for i in range(total // 4):
+        front = (page(total - 2 * i), page(2 * i + 1))
+        back = (page(2 * i + 2), page(total - 2 * i - 1))
+        sheets.append((front, back))
+    return sheets
+
+
+class StreamingPDFWriter:
+    """
+    Writes a PDF object by object, keeping only offsets in memory.
+
+    Objects copied from source PDFs are memoized by (source, object number),
+    so shared resources such as images and fonts are written once.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self._offsets = {}
+        self._next_number = 1
+        self._copied = {}  # (source key, idnum, generation) -> object number
+        self._forms = {}   # (source key, page index) -> (form reference, media box)
+        self._page_numbers = []
+        self._pages_number = self.reserve()
+        self._closed = False
+        self.font = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self._closed:
+            self.close()
+
+    def reserve(self) -> int:
+        """Allocate an object number to write later."""
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def write_object(self, number: int, obj) -> IndirectObject:
+        """Write a pypdf object (with references already remapped) to the file."""
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(self._file)
+        self._file.write(b"\nendobj\n")
+        return IndirectObject(number, 0, None)
+
+    def add_object(self, obj) -> IndirectObject:
+        return self.write_object(self.reserve(), obj)
+
+    def add_stream(self, data: bytes, entries: dict = None, compress: bool = True) -> IndirectObject:
+        """Write a stream object, Flate-compressed by default."""
+        stream = DecodedStreamObject()
+        for key, value in (entries or {}).items():
+            stream[NameObject(key)] = value
+        if compress:
+            data = zlib.compress(data)
+            stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+        stream._data = data
+        return self.add_object(stream)
+
+    def copy(self, obj, source_key: str):
+        """Copy an object from a source PDF, writing referenced objects once."""
+        if isinstance(obj, IndirectObject):
+            ref = (source_key, obj.idnum, obj.generation)
+            number = self._copied.get(ref)
+            if number is None:
+                number = self._copied[ref] = self.reserve()
+                self.write_object(number, self.copy(obj.get_object(), source_key))
+            return IndirectObject(number, 0, None)
+        if isinstance(obj, StreamObject):
+            stream = DecodedStreamObject()
+            for key, value in obj.items():
+                if key != "/Length":
+                    stream[NameObject(key)] = self.copy(value, source_key)
+            stream._data = obj._data  # Still encoded as /Filter says
+            return stream
+        if isinstance(obj, DictionaryObject):
+            copied = DictionaryObject()
+            for key, value in obj.items():
+                if key != "/Parent":  # Never pull in the source page tree
+                    copied[NameObject(key)] = self.copy(value, source_key)
+            return copied
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self.copy(value, source_key) for value in obj)
+        return obj
+
+    def page_form(self, reader: PdfReader, source_key: str, index: int) -> tuple:
+        """
+        Embed a source page as a form XObject (once per source page).
+
+        Returns:
+            (form reference, (x0, y0, x1, y1) media box in points)
+        """
+        key = (source_key, index)
+        if key in self._forms:
+            return self._forms[key]
+
+        page = reader.pages[index]
+        box = tuple(float(v) for v in page.mediabox)
+
+        form = DecodedStreamObject()
+        contents = page.get("/Contents")
+        contents = contents.get_object() if contents is not None else None
+        if isinstance(contents, StreamObject):
+            # Reuse the encoded content stream as is
+            form._data = contents._data
+            for name in ("/Filter", "/DecodeParms"):
+                if name in contents:
+                    form[NameObject(name)] = self.copy(contents[name], source_key)
+        else:
+            parts = [part.get_object().get_data() for part in (contents or [])]
+            form._data = zlib.compress(b"\n".join(parts))
+            form[NameObject("/Filter")] = NameObject("/FlateDecode")
+
+        form[NameObject("/Type")] = NameObject("/XObject")
+        form[NameObject("/Subtype")] = NameObject("/Form")
+        form[NameObject("/BBox")] = ArrayObject(FloatObject(v) for v in box)
+        if "/Resources" in page:
+            form[NameObject("/Resources")] = self.copy(page.raw_get("/Resources"), source_key)
+
+        self._forms[key] = (self.add_object(form), box)
+        return self._forms[key]
+
+    def label_font(self) -> IndirectObject:
+        """Helvetica, for sheet labels (written once)."""
+        if self.font is None:
+            self.font = self.add_object(DictionaryObject({
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }))
+        return self.font
+
+    def add_page(self, width: float, height: float, content: bytes, xobjects: dict = None,
+                 fonts: dict = None, trim_box: tuple = None):
+        """Write a page (sizes in points) that draws content with the given resources."""
+        resources = DictionaryObject()
+        if xobjects:
+            resources[NameObject("/XObject")] = DictionaryObject(
+                {NameObject(f"/{name}"): ref for name, ref in xobjects.items()})
+        if fonts:
+            resources[NameObject("/Font")] = DictionaryObject(
+                {NameObject(f"/{name}"): ref for name, ref in fonts.items()})
+
+        page = DictionaryObject({
+            NameObject("/Type"): NameObject("/Page"),
+            NameObject("/Parent"): IndirectObject(self._pages_number, 0, None),
+            NameObject("/MediaBox"): ArrayObject(FloatObject(v) for v in (0, 0, width, height)),
+            NameObject("/Resources"): resources,
+            NameObject("/Contents"): self.add_stream(content),
+        })
+        if trim_box:
+            page[NameObject("/TrimBox")] = ArrayObject(FloatObject(v) for v in trim_box)
+        self._page_numbers.append(self.add_object(page).idnum)
+
+    def close(self, title: str = None):
+        """Write the page tree, catalog, xref and trailer, then move the file into place."""
+        self._closed = True
+        self.write_object(self._pages_number, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(n, 0, None) for n in self._page_numbers),
+            NameObject("/Count"): NumberObject(len(self._page_numbers)),
+        }))
+        catalog = self.add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self._pages_number, 0, None),
+        }))
+        info = None
+        if title:
+            info = self.add_object(DictionaryObject({
+                NameObject("/Title"): TextStringObject(title),
+                NameObject("/Producer"): TextStringObject("Funbookies imposition"),
+            }))
+
+        xref_offset = self._file.tell()
+        size = self._next_number
+        self._file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for number in range(1, size):
+            self._file.write(f"{self._offsets.get(number, 0):010d} 00000 n \n".encode())
+        trailer = f"trailer\n<< /Size {size} /Root {catalog.idnum} 0 R"
+        if info:
+            trailer += f" /Info {info.idnum} 0 R"
+        self._file.write(f"{trailer} >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._closed = True
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def _fmt(*values) -> str:
+    return " ".join(f"{v:.3f}".rstrip("0").rstrip(".") for v in values)
+
+
+def place_page(name: str, box: tuple, x: float, y: float, clip: tuple) -> str:
+    """Content ops drawing form `name` with its media box origin at (x, y), clipped to clip (x, y, w, h)."""
+    return (f"q {_fmt(*clip)} re W n "
+            f"1 0 0 1 {_fmt(x - box[0], y - box[1])} cm /{name} Do Q\n")
+
+
+def crop_marks(x0: float, y0: float, x1: float, y1: float, offset: float) -> str:
+    """Crop marks outside the corners of a trim box, starting `offset` away from it."""
+    length = MARK_LENGTH_MM * MM
+    ops = []
+    for x, dx in ((x0, -1), (x1, 1)):
+        for y in (y0, y1):
+            # Horizontal mark beside the corner
+            ops.append(f"{_fmt(x + dx * offset, y)} m {_fmt(x + dx * (offset + length), y)} l S")
+    for y, dy in ((y0, -1), (y1, 1)):
+        for x in (x0, x1):
+            ops.append(f"{_fmt(x, y + dy * offset)} m {_fmt(x, y + dy * (offset + length))} l S")
+    return "\n".join(ops) + "\n"
+
+
+def fold_marks(x: float, y0: float, y1: float, offset: float) -> str:
+    """Dashed fold marks above and below the spine."""
+    length = MARK_LENGTH_MM * MM
+    return (f"[2 2] 0 d {_fmt(x, y0 - offset)} m {_fmt(x, y0 - offset - length)} l S "
+            f"{_fmt(x, y1 + offset)} m {_fmt(x, y1 + offset + length)} l S [] 0 d\n")
+
+
+def registration_mark(cx: float, cy: float) -> str:
+    """Circle-and-cross registration target centred on (cx, cy)."""
+    r = REG_RADIUS_MM * MM
+    k = 0.5523 * r  # Bezier circle constant
+    return (f"{_fmt(cx + r, cy)} m "
+            f"{_fmt(cx + r, cy + k, cx + k, cy + r, cx, cy + r)} c "
+            f"{_fmt(cx - k, cy + r, cx - r, cy + k, cx - r, cy)} c "
+            f"{_fmt(cx - r, cy - k, cx - k, cy - r, cx, cy - r)} c "
+            f"{_fmt(cx + k, cy - r, cx + r, cy - k, cx + r, cy)} c S "
+            f"{_fmt(cx - 1.4 * r, cy)} m {_fmt(cx + 1.4 * r, cy)} l S "
+            f"{_fmt(cx, cy - 1.4 * r)} m {_fmt(cx, cy + 1.4 * r)} l S\n")
+
+
+def label(text: str, x: float, y: float) -> str:
+    safe = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return f"BT /F1 6 Tf {_fmt(x, y)} Td ({safe}) Tj ET\n"
+
+
+def place_spread(writer: StreamingPDFWriter, reader: PdfReader, source_key: str, pair: tuple,
+                 x: float, y: float, trim_w: float, trim_h: float, bleed: float,
+                 xobjects: dict, prefix: str = "P") -> str:
+    """
+    Content ops drawing a (left, right) page pair as a spread.
+
+    (x, y) is the trim box's lower-left corner; each page keeps its bleed on
+    the three outside edges and is clipped at the spine. Page forms are added
+    to xobjects as <prefix><page number>.
+    """
+    ops = []
+    spine = x + trim_w
+    for page_number, page_x, clip_x in ((pair[0], x - bleed, x - bleed),
+                                        (pair[1], spine - bleed, spine)):
+        if page_number is None:
+            continue
+        form, box = writer.page_form(reader, source_key, page_number - 1)
+        form_name = f"{prefix}{page_number}"
+        xobjects[form_name] = form
+        ops.append(place_page(form_name, box, page_x, y - bleed,
+                              (clip_x, y - bleed, trim_w + bleed, trim_h + 2 * bleed)))
+    return "".join(ops)
+
+
+def impose_saddle_stitch(input_pdf: str, output_pdf: str = None, up: int = 2,
+                         bleed_mm: float = PRINT_SPECS["bleed_mm"], marks: bool = True) -> dict:
+    """
+    Impose a book's page PDF into saddle-stitch press sheets.
+
+    Args:
+        input_pdf: Page PDF in reading order (e.g. from create_print_pdf)
+        output_pdf: Imposed PDF path (default: <input>_imposed_<up>up.pdf)
+        up: 2 (one spread per sheet side) or 4 (two spreads stacked)
+        bleed_mm: Bleed around each source page's trim box
+        marks: Draw crop, fold and registration marks and sheet labels
+
+    Returns:
+        Summary dict: pages, blank_pages, sheets, sides, output
+    """
+    if up not in (2, 4):
+        raise ValueError(f"Unsupported imposition: {up}-up (use 2 or 4)")
+
+    input_pdf = str(input_pdf)
+    if output_pdf is None:
+        output_pdf = str(Path(input_pdf).with_name(f"{Path(input_pdf).stem}_imposed_{up}up.pdf"))
+
+    reader = PdfReader(input_pdf)
+    page_count = len(reader.pages)
+    if page_count == 0:
+        raise ValueError(f"No pages in {input_pdf}")
+
+    # Sizes in points, from the first page
+    x0, y0, x1, y1 = (float(v) for v in reader.pages[0].mediabox)
+    bleed = bleed_mm * MM
+    trim_w = (x1 - x0) - 2 * bleed
+    trim_h = (y1 - y0) - 2 * bleed
+    slug = SLUG_MM * MM
+
+    cell_w = 2 * trim_w + 2 * bleed + 2 * slug
+    cell_h = trim_h + 2 * bleed + 2 * slug
+    rows = up // 2
+    sheet_w, sheet_h = cell_w, cell_h * rows
+
+    sheets = saddle_stitch_order(page_count)
+    # 4-up: consecutive sheets share a press sheet, one spread per row
+    press_sheets = [sheets[i:i + rows] for i in range(0, len(sheets), rows)]
+    name = Path(input_pdf).stem
+
+    with StreamingPDFWriter(output_pdf) as writer:
+        for sheet_index, group in enumerate(press_sheets, 1):
+            for side_index, side_name in enumerate(("front", "back")):
+                ops = []
+                xobjects = {}
+                spreads = []
+                for row, sheet in enumerate(group):
+                    left, right = sheet[side_index]
+                    # Row 0 at the top of the press sheet
+                    cy = sheet_h - (row + 1) * cell_h
+                    tx0, ty0 = slug + bleed, cy + slug + bleed
+                    spine = tx0 + trim_w
+                    ops.append(place_spread(writer, reader, input_pdf, (left, right),
+                                            tx0, ty0, trim_w, trim_h, bleed, xobjects))
+                    spreads.append((tx0, ty0, spine, cy, left, right))
+
+                if marks:
+                    ops.append(f"q {MARK_WIDTH_PT} w 1 1 1 1 K 1 1 1 1 k\n")
+                    for tx0, ty0, spine, cy, left, right in spreads:
+                        tx1, ty1 = tx0 + 2 * trim_w, ty0 + trim_h
+                        ops.append(crop_marks(tx0, ty0, tx1, ty1, bleed))
+                        ops.append(fold_marks(spine, ty0, ty1, bleed))
+                        for cx, my in ((slug / 2, (ty0 + ty1) / 2), (cell_w - slug / 2, (ty0 + ty1) / 2),
+                                       (spine, cy + slug / 2), (spine, cy + cell_h - slug / 2)):
+                            ops.append(registration_mark(cx, my))
+                        pages = f"{left or 'blank'}|{right or 'blank'}"
+                        ops.append(label(f"{name}  sheet {sheet_index} {side_name}  pages {pages}",
+                                         tx0, cy + cell_h - slug / 2 - 2))
+                    ops.append("Q\n")
+
+                writer.add_page(
+                    sheet_w, sheet_h, "".join(ops).encode("latin-1"), xobjects,
+                    fonts={"F1": writer.label_font()} if marks else None,
+                )
+
+            # Imposed sheets are written; let the reader drop parsed objects
+            reader.resolved_objects.clear()
+
+        writer.close(title=f"{name} ({up}-up saddle stitch)")
+
+    padded = len(sheets) * 4
+    return {
+        "pages": page_count,
+        "blank_pages": padded - page_count,
+        "sheets": len(press_sheets),
+        "sides": len(press_sheets) * 2,
+        "sheet_size_mm": (round(sheet_w / MM, 1), round(sheet_h / MM, 1)),
+        "output": output_pdf,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Impose a book PDF into saddle-stitch press sheets.")
+    parser.add_argument("input", help="Page PDF in reading order")
+    parser.add_argument("-o", "--output", default=None, help="Imposed PDF path")
+    parser.add_argument("--up", type=int, default=2, choices=[2, 4], help="Spreads per sheet side x2")
+    parser.add_argument("--no-marks", action="store_true", help="Omit crop and registration marks")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Not found: {args.input}")
+        sys.exit(1)
+
+    summary = impose_saddle_stitch(args.input, args.output, up=args.up, marks=not args.no_marks)
+    print(f"Imposed {summary['pages']} pages (+{summary['blank_pages']} blank) onto "
+          f"{summary['sheets']} sheets ({summary['sheet_size_mm'][0]} x {summary['sheet_size_mm'][1]} mm)")
+    print(f"  {summary['output']}")
@@ -0,0 +1,124 @@
+"""
+Morphological analysis of inflected words for Funbookies word banks.
+
+Maps inflected forms back to their stems so "hops", "hopped", "running" and
+"cats" are classified through "hop", "run" and "cat". Handles plural and
+verb -s/-es, -ed and -ing, including consonant doubling (hop -> hopped),
+silent-e drop (make -> making) and y -> i (cry -> cried).
+
+Candidates are verified by re-inflecting the stem with the regular spelling
+rules, so "hoping" analyzes as hope + ing and never as hop + ing. Spelling
+alone cannot tell "yell" + ed from "yel" + ed, or "nothing" from "noth" +
+ing, so callers take the first stem that is a real word.
+
+Usage:
+    from morphology import analyze, inflect
+
+    analyze("yelled")  # (("yell", "ed"), ("yel", "ed"))
+    inflect("wish", "s")  # "wishes"
+    inflect("go", "s")  # "goes"
+"""
+
+from functools import lru_cache
+
+VOWELS = set("aeiou")
+
+# Endings that take -es instead of -s
+SIBILANT_ENDINGS = ("s", "x", "z", "ch", "sh")
+
+# Consonant + o stems that take -s, not -es (most take -es: goes, heroes)
+O_PLURAL_S = {"hippo", "rhino", "photo", "piano", "zero", "solo", "memo",
+              "logo", "taco", "kilo", "disco", "halo", "yo"}
+
+
+def vowel_groups(word: str) -> int:
+    """Count vowel letter groups (a rough syllable count); "qu" is a consonant."""
+    word = word.replace("qu", "q")
+    groups = 0
+    previous_vowel = False
+    for letter in word:
+        is_vowel = letter in VOWELS
+        if is_vowel and not previous_vowel:
+            groups += 1
+        previous_vowel = is_vowel
+    return groups
+
+
+def _doubles_final_consonant(stem: str) -> bool:
+    """One-syllable stems ending consonant-vowel-consonant double the consonant (hop -> hopping)."""
+    stem = stem.replace("qu", "q")
+    if len(stem) < 3 or stem[-1] in VOWELS or stem[-1] in "wxy":
+        return False
+    return stem[-2] in VOWELS and stem[-3] not in VOWELS and vowel_groups(stem) == 1
+
+
+def inflect(stem: str, suffix: str) -> str:
+    """
+    Add a suffix ("s", "ed" or "ing") to a stem using regular spelling rules.
+
+    "s" produces "-es" after sibilants and "-ies" after consonant + y.
+    """
+    if suffix == "s":
+        if stem.endswith(SIBILANT_ENDINGS):
+            return stem + "es"
+        if len(stem) > 1 and stem[-1] == "o" and stem[-2] not in VOWELS and stem not in O_PLURAL_S:
+            return stem + "es"
+        if len(stem) > 1 and stem[-1] == "y" and stem[-2] not in VOWELS:
+            return stem[:-1] + "ies"
+        return stem + "s"
+
+    if stem.endswith("e"):
+        if suffix == "ed":
+            return stem + "d"  # liked, freed
+        if not stem.endswith("ee") and vowel_groups(stem[:-1]) > 0:
+            # Silent e: like -> liking (but see -> seeing, be -> being)
+            return stem[:-1] + suffix
+    if suffix == "ed" and len(stem) > 1 and stem[-1] == "y" and stem[-2] not in VOWELS:
+        return stem[:-1] + "ied"
+    if _doubles_final_consonant(stem):
+        return stem + stem[-1] + suffix
+    return stem + suffix
+
+
+@lru_cache(maxsize=65536)
+def analyze(word: str) -> tuple:
+    """
+    Split a lowercase word into possible (stem, suffix) pairs.
+
+    Suffix is "s", "es", "ed" or "ing". Returns an empty tuple for words
+    that are not regular inflections. The unchanged base comes before the
+    undoubled or e-restored stem ("yelled": yell before yel), so the first
+    analysis whose stem is a real word is the right one.
+    """
+    candidates = []
+
+    if word.endswith("ing"):
+        base = word[:-3]
+        candidates.append((base, "ing"))
+        if len(base) > 1 and base[-1] == base[-2]:
+            candidates.append((base[:-1], "ing"))
+        else:
+            candidates.append((base + "e", "ing"))
+    elif word.endswith("ed"):
+        base = word[:-2]
+        if base.endswith("i"):
+            candidates.append((base[:-1] + "y", "ed"))
+        candidates.append((base, "ed"))
+        if len(base) > 1 and base[-1] == base[-2]:
+            candidates.append((base[:-1], "ed"))
+        else:
+            candidates.append((base + "e", "ed"))
+    elif word.endswith("s") and not word.endswith("ss"):
+        if word.endswith("ies"):
+            candidates.append((word[:-3] + "y", "es"))
+        if word.endswith("es"):
+            candidates.append((word[:-2], "es"))
+        candidates.append((word[:-1], "s"))
+
+    analyses = []
+    for stem, suffix in candidates:
+        if len(stem) < 2 or not stem.isalpha():
+            continue
+        if inflect(stem, "s" if suffix == "es" else suffix) == word and (stem, suffix) not in analyses:
+            analyses.append((stem, suffix))
+    return tuple(analyses)
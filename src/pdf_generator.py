@@ -1,32 +1,161 @@
 """
 Print-ready PDF generator for Funbookies Pixi-style books.
 Creates 10x10cm books ready for professional printing.
+
+Usage:
+    python src/pdf_generator.py                      # every illustrated book, in parallel
+    python src/pdf_generator.py volcano_curated --workers 4
+    python src/pdf_generator.py --impose 2             # plus imposed press sheets
+    python src/pdf_generator.py --cmyk --icc-profile profiles/coated_fogra39.icc   # CMYK
+
+CMYK output is PDF/X-3 when FUNBOOKIES_PDF_FONT names a bold TTF to embed
+(see CMYK_SPECS in config.py).
 """
 
+import os
+import re
 import json
+import time
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 from fpdf import FPDF
+from fpdf.drawing import DeviceCMYK
+from fpdf.enums import OutputIntentSubType
+from fpdf.output import PDFICCProfile
 from PIL import Image
-from config import PRINT_SPECS, BOOK_SPECS, BRAND
+from config import PRINT_SPECS, BOOK_SPECS, BRAND, CMYK_SPECS
+from image_prep import prepare_images, cmyk_colors
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / 'web' / 'books'
+PRINT_OUTPUT_DIR = ROOT_DIR / 'output' / 'print'
+
+# Image placement on illustrated pages: full bleed width, top 75%
+IMAGE_WIDTH_MM = 106
+IMAGE_HEIGHT_MM = 106 * 0.75
+
+# Registered print characterizations, as ICC profile descriptions name them
+# ("Coated FOGRA39 (ISO 12647-2:2004)", "CGATS TR 006")
+CHARACTERIZATION_PATTERN = re.compile(r"\b(FOGRA\d+|CGATS TR \d+|JC\d{4,6}|IFRA\d+)(?![0-9])")
 
 
 class PixiPDF(FPDF):
-    """Custom PDF class for Pixi-style children's books."""
+    """Custom PDF class for Pixi-style children's books.
+
+    With a CMYK profile, RGB layout colours are converted through it as
+    they are set, so the page furniture prints in the same CMYK as the
+    converted images.
+    """
 
-    def __init__(self):
+    def __init__(self, cmyk_profile: Optional[str] = None,
+                 intent: str = CMYK_SPECS["rendering_intent"]):
         # 10x10cm with 3mm bleed = 106x106mm
         super().__init__(unit='mm', format=(106, 106))
         self.set_auto_page_break(False)
         self.bleed = 3  # mm
         self.trim_size = 100  # mm
+        self.cmyk_profile = cmyk_profile
+        self.intent = intent
+        self.embedded_font = False
 
     def add_fonts(self):
         """Add child-friendly fonts."""
-        # Use built-in Helvetica (bold for readability)
-        pass
+        # Use built-in Helvetica (bold for readability). PDF/X needs every
+        # font embedded, so CMYK output embeds the configured TTF instead.
+        if self.cmyk_profile and CMYK_SPECS["font"]:
+            self.add_font("body", "B", CMYK_SPECS["font"])
+            self.embedded_font = True
+
+    def set_font(self, family=None, style="", size=0):
+        if self.embedded_font and family and family.lower() == "helvetica":
+            family = "body"
+        super().set_font(family, style, size)
+
+    def _device_color(self, r, g, b):
+        """RGB (or grey) arguments as a DeviceCMYK colour in CMYK mode."""
+        if not self.cmyk_profile or not isinstance(r, (int, float)):
+            return (r, g, b)
+        rgb = (int(r), int(r), int(r)) if g == -1 else (int(r), int(g), int(b))
+        c, m, y, k = cmyk_colors([rgb], self.cmyk_profile, self.intent)[0]
+        return (DeviceCMYK(c / 255, m / 255, y / 255, k / 255),)
+
+    def set_draw_color(self, r, g=-1, b=-1):
+        super().set_draw_color(*self._device_color(r, g, b))
+
+    def set_fill_color(self, r, g=-1, b=-1):
+        super().set_fill_color(*self._device_color(r, g, b))
+
+    def set_text_color(self, r, g=-1, b=-1):
+        super().set_text_color(*self._device_color(r, g, b))
+
+    def add_pdfx_output_intent(self):
+        """Declare the press condition (and embed its profile) for PDF/X."""
+        identifier, condition = output_condition(self.cmyk_profile)
+        self.add_output_intent(
+            OutputIntentSubType.PDFX,
+            output_condition_identifier=identifier,
+            output_condition=condition,
+            registry_name=CMYK_SPECS["registry_name"],
+            dest_output_profile=PDFICCProfile(
+                contents=Path(self.cmyk_profile).read_bytes(), n=4, alternate="DeviceCMYK"),
+            info=condition,
+        )
+
+
+def output_condition(profile_path: str) -> tuple:
+    """
+    Output condition of the press an ICC profile characterizes.
+
+    A profile whose description names a registered characterization is
+    declared under that name ("FOGRA39"); any other profile is declared
+    "Custom", described by its own description.
 
+    Returns:
+        (output_condition_identifier, output_condition)
+    """
+    from PIL import ImageCms
 
-def create_print_pdf(book_json_path: str, images_dir: str, output_path: str = None) -> str:
+    description = ImageCms.getProfileDescription(ImageCms.getOpenProfile(str(profile_path))).strip()
+    description = description or Path(profile_path).stem
+    match = CHARACTERIZATION_PATTERN.search(description)
+    return (match.group(1) if match else "Custom"), description
+
+
+def _finish_pdfx(path: str, title: str, pdfx: bool = True):
+    """
+    Add the page boxes and document keys PDF/X requires (fpdf2 cannot set
+    them). With pdfx=False (fonts not embedded) the file is not marked as
+    PDF/X.
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import NameObject, RectangleObject
+
+    reader = PdfReader(path)
+    writer = PdfWriter(clone_from=reader)
+    bleed = PRINT_SPECS["bleed_mm"] * 72 / 25.4
+    for page in writer.pages:
+        x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+        page.bleedbox = RectangleObject((x0, y0, x1, y1))
+        page.trimbox = RectangleObject((x0 + bleed, y0 + bleed, x1 - bleed, y1 - bleed))
+    metadata = {"/Title": title}
+    created = (reader.metadata or {}).get("/CreationDate")
+    if created:
+        metadata["/ModDate"] = created
+    if pdfx:
+        metadata["/GTS_PDFXVersion"] = CMYK_SPECS["pdfx_version"]
+    writer.add_metadata(metadata)
+    # add_metadata only writes strings; /Trapped must be a name
+    writer._info[NameObject("/Trapped")] = NameObject("/False")
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def create_print_pdf(book_json_path: str, images_dir: str, output_path: str = None,
+                     prepare: bool = True, workers: Optional[int] = None,
+                     cmyk_profile: Optional[str] = None,
+                     intent: str = CMYK_SPECS["rendering_intent"]) -> str:
     """
     Create a print-ready PDF from a book JSON file.
 
@@ -34,50 +163,102 @@ def create_print_pdf(book_json_path: str, images_dir: str, output_path: str = No
         book_json_path: Path to the book JSON file (e.g., volcano_curated.json)
         images_dir: Path to directory containing page images
         output_path: Optional output path for PDF
+        prepare: Resample images to their placement size at 300 DPI before
+                 embedding (cached; see image_prep.py)
+        workers: Process pool size for image preparation
+        cmyk_profile: ICC profile for CMYK PDF/X output: images and layout
+                      colours are converted through it and it becomes the
+                      output intent (None: RGB)
+        intent: Rendering intent for the CMYK conversion
 
     Returns:
         Path to generated PDF
     """
+    if cmyk_profile and not prepare:
+        raise ValueError("CMYK output converts images while preparing them; it needs prepare=True")
+
     # Load book data
     with open(book_json_path) as f:
         book = json.load(f)
 
     title = book.get('title', 'Untitled')
-    word_list = book.get('word_list', {})
     pages = book.get('pages', [])
+    images_path = Path(images_dir)
+
+    # Resample all page images up front (in parallel, cached)
+    prepared = {}
+    if prepare:
+        sources = [images_path / p['image'] for p in pages
+                   if p.get('image') and p.get('type') != 'wordlist' and (images_path / p['image']).exists()]
+        prepared = prepare_images(sources, IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM, workers=workers,
+                                  cmyk_profile=cmyk_profile, intent=intent)
+
+    page_images = {}
+    for index, page_data in enumerate(pages):
+        if page_data.get('image') and (images_path / page_data['image']).exists():
+            image_path = images_path / page_data['image']
+            page_images[index] = prepared.get(str(image_path), str(image_path))
+
+    # Determine output path
+    if output_path is None:
+        safe_title = "".join(c for c in title if c.isalnum() or c in ' -_').strip().replace(' ', '_').lower()
+        output_path = f"output/{safe_title}_print.pdf"
+
+    return write_print_pdf(title, book.get('word_list', {}), pages, page_images, output_path,
+                           cmyk_profile, intent)
+
+
+def write_print_pdf(title: str, word_list: dict, pages: list, page_images: dict, output_path: str,
+                    cmyk_profile: Optional[str] = None,
+                    intent: str = CMYK_SPECS["rendering_intent"]) -> str:
+    """
+    Lay out and write a print PDF from already loaded book data.
 
+    Args:
+        title: Book title
+        word_list: The book's word list (for the wordlist page)
+        pages: Page dicts from the book JSON (type, text)
+        page_images: {index into pages: image file to place}; pages without
+                     one are laid out as text only
+        output_path: Where the PDF is written
+        cmyk_profile: ICC profile for PDF/X output (images must already be
+                      converted through it)
+        intent: Rendering intent for the layout colours
+
+    Returns:
+        Path to generated PDF
+    """
     # Create PDF
-    pdf = PixiPDF()
+    pdf = PixiPDF(cmyk_profile, intent)
     pdf.add_fonts()
+    if cmyk_profile:
+        pdf.set_title(title)
+        pdf.add_pdfx_output_intent()
 
-    images_path = Path(images_dir)
-
-    for page_data in pages:
+    for index, page_data in enumerate(pages):
         pdf.add_page()
         page_type = page_data.get('type', 'story')
         text = page_data.get('text', '')
-        image_file = page_data.get('image')
 
         if page_type == 'wordlist':
             # Word list page - no image, just styled text
             render_wordlist_page(pdf, word_list)
-        elif image_file:
+        elif index in page_images:
             # Page with image
-            image_path = images_path / image_file
-            if image_path.exists():
-                render_image_page(pdf, str(image_path), text, page_type)
-            else:
-                render_text_only_page(pdf, text, page_type)
+            render_image_page(pdf, page_images[index], text, page_type)
         else:
             render_text_only_page(pdf, text, page_type)
 
-    # Determine output path
-    if output_path is None:
-        safe_title = "".join(c for c in title if c.isalnum() or c in ' -_').strip().replace(' ', '_').lower()
-        output_path = f"output/{safe_title}_print.pdf"
-
+    # Write atomically: a reader (or a parallel build) never sees a partial PDF
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    pdf.output(output_path)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    pdf.output(tmp_path)
+    if cmyk_profile:
+        if not pdf.embedded_font:
+            print(f"Note: {Path(output_path).name} is CMYK but not PDF/X "
+                  f"(set FUNBOOKIES_PDF_FONT to a bold TTF to embed)")
+        _finish_pdfx(tmp_path, title, pdfx=pdf.embedded_font)
+    os.replace(tmp_path, output_path)
 
     return output_path
 
@@ -88,12 +269,9 @@ def render_image_page(pdf: PixiPDF, image_path: str, text: str, page_type: str):
     page_size = 106  # mm with bleed
     trim_size = 100  # mm
 
-    # Image area: full bleed width, top 70% of page
-    image_height = page_size * 0.75  # 75% for image including bleed overlap
-
     # Place image to fill top portion (with bleed)
     try:
-        pdf.image(image_path, x=0, y=0, w=page_size, h=image_height)
+        pdf.image(image_path, x=0, y=0, w=IMAGE_WIDTH_MM, h=IMAGE_HEIGHT_MM)
     except Exception as e:
         print(f"Warning: Could not load image {image_path}: {e}")
 
@@ -236,40 +414,151 @@ def render_text_only_page(pdf: PixiPDF, text: str, page_type: str):
     pdf.multi_cell(trim_size - 10, 8, text, align='C')
 
 
-def generate_all_books():
-    """Generate print PDFs for all curated books."""
-    books_dir = Path(__file__).parent.parent / 'web' / 'books'
-    images_dir = books_dir / 'images'
-    output_dir = Path(__file__).parent.parent / 'output' / 'print'
+def discover_print_books(books_dir: Path = BOOKS_DIR) -> list:
+    """Find illustrated books (book JSONs with at least one page image)."""
+    books = []
+    for path in sorted(Path(books_dir).glob('*.json')):
+        try:
+            with open(path) as f:
+                book = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pages = book.get('pages') if isinstance(book, dict) else None
+        if isinstance(pages, list) and any(isinstance(p, dict) and p.get('image') for p in pages):
+            books.append(path)
+    return books
+
+
+def _build_book(book_path: str, images_dir: str, output_path: str, prepare: bool,
+                image_workers: Optional[int], impose: Optional[int] = None,
+                cmyk_profile: Optional[str] = None, intent: str = CMYK_SPECS["rendering_intent"]) -> dict:
+    """Pool task: build one book's print PDF (and press sheets). Returns a result summary."""
+    start = time.perf_counter()
+    imposed = None
+    try:
+        create_print_pdf(book_path, images_dir, output_path, prepare=prepare, workers=image_workers,
+                         cmyk_profile=cmyk_profile, intent=intent)
+        if impose:
+            from imposition import impose_saddle_stitch
+            imposed = impose_saddle_stitch(output_path, up=impose)['output']
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {
+        'book': Path(book_path).stem,
+        'output': output_path,
+        'imposed': imposed,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def generate_all_books(books: Optional[list] = None, workers: Optional[int] = None,
+                       books_dir: Path = BOOKS_DIR, images_dir: Path = None,
+                       output_dir: Path = PRINT_OUTPUT_DIR, prepare: bool = True,
+                       impose: Optional[int] = None, cmyk_profile: Optional[str] = None,
+                       intent: str = CMYK_SPECS["rendering_intent"]) -> list:
+    """
+    Generate print PDFs for all illustrated books, in parallel.
+
+    Args:
+        books: Book names to build (default: every book with page images)
+        workers: Process pool size (default: CPU count, 1 = no pool)
+        books_dir: Directory of book JSON files
+        images_dir: Directory of page images (default: books_dir/images)
+        output_dir: Where PDFs are written
+        prepare: Resample images before embedding (see image_prep.py)
+        impose: Also write saddle-stitch press sheets, 2-up or 4-up (see imposition.py)
+        cmyk_profile: ICC profile for CMYK PDF/X output (<book>_pdfx.pdf)
+        intent: Rendering intent for the CMYK conversion
+
+    Returns:
+        Paths of the PDFs that were created
+    """
+    start = time.perf_counter()
+    books_dir = Path(books_dir)
+    images_dir = Path(images_dir) if images_dir else books_dir / 'images'
+    output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Curated books ready for print
-    curated_books = [
-        'volcano_curated.json',
-        'castle_rats.json',
-        'jungle_zee.json',
+    if books is None:
+        book_paths = discover_print_books(books_dir)
+    else:
+        book_paths = []
+        for name in books:
+            book_path = books_dir / (name if name.endswith('.json') else f"{name}.json")
+            if book_path.exists():
+                book_paths.append(book_path)
+            else:
+                print(f"Not found: {book_path}")
+
+    workers = workers or os.cpu_count() or 1
+    # One pool level only: with several books in flight, each prepares its
+    # images serially; a single book gets the image pool instead
+    parallel = workers > 1 and len(book_paths) > 1
+    suffix = "pdfx" if cmyk_profile else "print"
+    tasks = [
+        (str(book_path), str(images_dir), str(output_dir / f"{book_path.stem}_{suffix}.pdf"),
+         prepare, 1 if parallel else workers, impose, cmyk_profile, intent)
+        for book_path in book_paths
     ]
 
-    results = []
-    for book_file in curated_books:
-        book_path = books_dir / book_file
-        if book_path.exists():
-            try:
-                safe_name = book_file.replace('.json', '')
-                output_path = output_dir / f"{safe_name}_print.pdf"
-                result = create_print_pdf(str(book_path), str(images_dir), str(output_path))
-                results.append(result)
-                print(f"Created: {result}")
-            except Exception as e:
-                print(f"Failed {book_file}: {e}")
+    if parallel:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_build_book, *zip(*tasks)))
+    else:
+        results = [_build_book(*task) for task in tasks]
+
+    created = []
+    for result in results:
+        if result['error']:
+            print(f"Failed {result['book']}: {result['error']}")
         else:
-            print(f"Not found: {book_path}")
+            created.append(result['output'])
+            print(f"Created: {result['output']} ({result['seconds']:.2f}s)")
+            if result['imposed']:
+                print(f"  Imposed: {result['imposed']}")
+
+    elapsed = time.perf_counter() - start
+    busy = sum(r['seconds'] for r in results)
+    print(f"\nBuilt {len(created)}/{len(results)} books in {elapsed:.2f}s "
+          f"({busy:.2f}s of work, {min(workers, len(tasks)) if parallel else 1} worker(s))")
 
-    return results
+    return created
 
 
 if __name__ == "__main__":
-    pdfs = generate_all_books()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate print-ready PDFs for the catalog.")
+    parser.add_argument("books", nargs="*", help="Book names (default: every book with page images)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", default=str(PRINT_OUTPUT_DIR), help="Where PDFs are written")
+    parser.add_argument("--no-prepare", action="store_true", help="Embed original images without resampling")
+    parser.add_argument("--impose", type=int, choices=[2, 4], default=None,
+                        help="Also write saddle-stitch press sheets (2-up or 4-up)")
+    parser.add_argument("--cmyk", action="store_true", help="CMYK output through an ICC profile (PDF/X-3 with FUNBOOKIES_PDF_FONT set)")
+    parser.add_argument("--icc-profile", default=CMYK_SPECS["icc_profile"],
+                        help="CMYK ICC profile (default: $FUNBOOKIES_CMYK_PROFILE)")
+    parser.add_argument("--intent", default=CMYK_SPECS["rendering_intent"],
+                        choices=["perceptual", "relative_colorimetric", "saturation", "absolute_colorimetric"],
+                        help="Rendering intent for CMYK conversion")
+    args = parser.parse_args()
+
+    if args.cmyk and not args.icc_profile:
+        parser.error("--cmyk needs an ICC profile: pass --icc-profile or set FUNBOOKIES_CMYK_PROFILE")
+    if args.cmyk and args.no_prepare:
+        parser.error("--cmyk converts images while preparing them; drop --no-prepare")
+
+    pdfs = generate_all_books(
+        books=args.books or None,
+        workers=args.workers,
+        output_dir=Path(args.output_dir),
+        prepare=not args.no_prepare,
+        impose=args.impose,
+        cmyk_profile=args.icc_profile if args.cmyk else None,
+        intent=args.intent,
+    )
     print(f"\nGenerated {len(pdfs)} print-ready PDFs")
     for pdf in pdfs:
         print(f"  {pdf}")
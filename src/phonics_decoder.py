@@ -0,0 +1,271 @@
+"""
+Rule-based grapheme decoder for Funbookies word banks.
+
+Decides whether a word is decodable, and at which level, from phonics rules
+instead of literal word lists, so words like "plop" or "chomp" count as
+decodable even when they are not in word_banks.json.
+
+A decodable word is one closed syllable:
+
+    onset + short vowel + coda          (cvc, digraph, blend)
+    onset + vowel + consonant + "e"     (magic_e)
+
+where the onset is empty, a single consonant, a digraph or an initial
+blend, and the coda is a single consonant, a digraph, a doubled letter
+(ss, ff, ll, zz) or a final blend. The word's level is that of its hardest
+grapheme:
+
+    yellow: single consonants only (cat, up, fox)
+    orange: + digraphs (chip, duck, moss)
+    red:    + blends (plop, chomp, stand)
+    purple: + magic e (cake, shine, stove)
+
+Words that fit this shape but are not read by its rules are not decodable:
+a magic e that does not lengthen the vowel (have, some, done), a single
+vowel made long by its coda (find, wild, cold, most, roll), a after w or qu
+(want, wash, squash), a or u before l (ball, talk, full, pull) and o read
+as u (son, won, front). Run this module to check these cases.
+
+The digraph and blend inventories come from the word bank data.
+
+Usage:
+    from phonics_decoder import GraphemeDecoder
+
+    decoder = GraphemeDecoder.from_word_bank_data(data["decodable"])
+    decoder.decode("chomp")  # ("red", "blend")
+    decoder.decode("lava")   # None
+    decoder.decode("want")   # None (a after w is not short a)
+
+    python src/phonics_decoder.py   # Check decoding of regular and irregular words
+"""
+
+from typing import Optional
+
+from config import LEVELS
+
+# Pattern for each grapheme rank (the rank indexes LEVELS), easiest first
+PATTERN_BY_RANK = ["cvc", "digraph", "blend", "magic_e"]
+
+VOWELS = set("aeiou")
+
+# Single consonants that start a syllable ("qu" acts as one consonant)
+SINGLE_ONSETS = set("bcdfghjklmnprstvwyz") | {"qu"}
+
+# Single consonants that end a short-vowel syllable. Excludes r (r-controlled
+# vowels), w and y (vowel teams), and letters usually spelled otherwise at the
+# end of a word (k -> ck, j -> dge, v -> ve, c, h, q).
+SINGLE_CODAS = set("bdfglmnpstxz")
+
+# Single consonants between the vowel and a magic e (cake, nice, gave, rose)
+MAGIC_E_CODAS = set("bcdfgklmnpstvz")
+
+# Codas that make a single vowel long (find, wild, cold, bolt)
+LONG_VOWEL_CODAS = {"i": {"nd", "ld"}, "o": {"ld", "lt"}}
+
+# a before these codas is not short a (ball, talk, salt, bald)
+BROAD_A_CODAS = {"ll", "lk", "lt", "ld"}
+
+# After w, wh or qu, a sounds like o (want, wash, swap, squash) except before
+# these codas (wag, wax, swam, quack, twang)
+W_SHORT_A_CODAS = {"g", "gg", "ck", "x", "ng", "nk", "m"}
+
+# Words that fit the patterns above but are not read by them: magic e that
+# does not lengthen the vowel, long o before -ost/-oll/-th/-ss, u read as oo
+# and o read as u
+IRREGULAR_WORDS = frozenset({
+    "have", "give", "live", "love", "glove", "shove", "dove", "some", "come",
+    "done", "gone", "none", "one", "move", "prove", "lose", "whose",
+    "most", "post", "host", "ghost", "roll", "toll", "poll", "troll",
+    "scroll", "stroll", "both", "gross",
+    "full", "pull", "bull", "push", "bush", "put", "puss",
+    "son", "won", "ton", "from", "of", "front", "month", "monk",
+})
+
+
+class GraphemeDecoder:
+    """Decide decodability of a word from its graphemes. Results are memoized."""
+
+    def __init__(self, onset_digraphs: set, coda_digraphs: set, doubled_codas: set,
+                 onset_blends: set, coda_blends: set):
+        self.onset_digraphs = set(onset_digraphs)
+        self.coda_digraphs = set(coda_digraphs)
+        self.doubled_codas = set(doubled_codas)
+        self.onset_blends = set(onset_blends)
+        self.coda_blends = set(coda_blends)
+        self._cache = {}
+
+    @classmethod
+    def from_word_bank_data(cls, decodable: dict) -> "GraphemeDecoder":
+        """
+        Build the grapheme inventories from word_banks.json's "decodable" section.
+
+        Digraph keys with "initial"/"final" word lists are onset/coda digraphs;
+        a key like "ss_ff_ll_zz" lists doubled codas. Blend categories named
+        "initial_*" hold onset blends and "final" holds coda blends.
+        """
+        onset_digraphs, coda_digraphs, doubled = set(), set(), set()
+        for key, positions in decodable.get("digraphs", {}).items():
+            if "_" in key:
+                doubled.update(part for part in key.split("_") if len(part) == 2)
+                continue
+            if not isinstance(positions, dict) or "initial" in positions:
+                onset_digraphs.add(key)
+            if not isinstance(positions, dict) or "final" in positions:
+                coda_digraphs.add(key)
+
+        onset_blends, coda_blends = set(), set()
+        for category, blends in decodable.get("blends", {}).items():
+            if not isinstance(blends, dict):
+                continue
+            if category.startswith("initial"):
+                onset_blends.update(blends.keys())
+            elif category.startswith("final"):
+                coda_blends.update(blends.keys())
+
+        return cls(onset_digraphs, coda_digraphs, doubled, onset_blends, coda_blends)
+
+    def decode(self, word: str) -> Optional[tuple]:
+        """
+        Decode a lowercase word.
+
+        Returns:
+            (level, pattern) for the lowest level the word is decodable at,
+            e.g. ("red", "blend"), or None if the rules do not cover it.
+        """
+        try:
+            return self._cache[word]
+        except KeyError:
+            result = self._cache[word] = self._decode(word)
+            return result
+
+    def is_decodable(self, word: str, level: str) -> bool:
+        """Check if the rules make a word decodable at the given level."""
+        decoded = self.decode(word)
+        return decoded is not None and LEVELS.index(decoded[0]) <= LEVELS.index(level)
+
+    def segment(self, word: str) -> Optional[tuple]:
+        """
+        Split a lowercase one-syllable word around its vowel.
+
+        The split is by spelling only: irregular words split too
+        ("push" -> ("p", "u", "sh", False)).
+
+        Returns:
+            (onset, vowel, coda, magic_e), e.g. ("sh", "i", "n", True) for
+            "shine", or None if the word does not have exactly one vowel
+            letter (plus a magic e) - "school", "lava".
+        """
+        if not word.isalpha() or not word.isascii():
+            return None
+
+        # Magic e: ...vowel + consonant + e (a trailing e after a consonant
+        # is never a syllable of its own in these words)
+        magic_e = len(word) >= 3 and word[-1] == "e" and word[-2] not in VOWELS and word[-3] in VOWELS
+        stem = word[:-1] if magic_e else word
+
+        # Exactly one vowel letter ("qu" counts as a consonant)
+        vowel_positions = [
+            i for i, letter in enumerate(stem)
+            if letter in VOWELS and not (letter == "u" and i > 0 and stem[i - 1] == "q")
+        ]
+        if len(vowel_positions) != 1:
+            return None
+
+        position = vowel_positions[0]
+        return stem[:position], stem[position], stem[position + 1:], magic_e
+
+    def _decode(self, word: str) -> Optional[tuple]:
+        segments = None if word in IRREGULAR_WORDS else self.segment(word)
+        if segments is None:
+            return None
+
+        onset, vowel, coda, magic_e = segments
+        if not magic_e and not _is_short_vowel(onset, vowel, coda):
+            return None
+
+        onset_rank = self._onset_rank(onset)
+        coda_rank = self._magic_e_coda_rank(coda) if magic_e else self._coda_rank(coda)
+        if onset_rank is None or coda_rank is None:
+            return None
+
+        rank = max(onset_rank, coda_rank)
+        return LEVELS[rank], PATTERN_BY_RANK[rank]
+
+    def _onset_rank(self, onset: str) -> Optional[int]:
+        if onset == "" or onset in SINGLE_ONSETS:
+            return 0
+        if onset in self.onset_digraphs:
+            return 1
+        if onset in self.onset_blends:
+            return 2
+        return None
+
+    def _coda_rank(self, coda: str) -> Optional[int]:
+        if coda in SINGLE_CODAS:
+            return 0
+        if coda in self.coda_digraphs or coda in self.doubled_codas:
+            return 1
+        if coda in self.coda_blends:
+            return 2
+        return None  # Including open syllables (he, go) - long vowels
+
+    def _magic_e_coda_rank(self, coda: str) -> Optional[int]:
+        return 3 if coda in MAGIC_E_CODAS else None
+
+
+def _is_short_vowel(onset: str, vowel: str, coda: str) -> bool:
+    """Check that a closed syllable's vowel has its short sound."""
+    if coda in LONG_VOWEL_CODAS.get(vowel, ()):
+        return False
+    if vowel == "a":
+        if coda in BROAD_A_CODAS:
+            return False
+        if onset.endswith(("w", "wh", "qu")) and coda not in W_SHORT_A_CODAS:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from pathlib import Path
+
+    with open(Path(__file__).parent / "word_banks.json") as f:
+        decoder = GraphemeDecoder.from_word_bank_data(json.load(f)["decodable"])
+
+    expected = {
+        # Regular words at each level
+        "cat": ("yellow", "cvc"), "fox": ("yellow", "cvc"), "up": ("yellow", "cvc"),
+        "chip": ("orange", "digraph"), "duck": ("orange", "digraph"),
+        "moss": ("orange", "digraph"), "doll": ("orange", "digraph"),
+        "dull": ("orange", "digraph"),
+        "plop": ("red", "blend"), "chomp": ("red", "blend"), "lost": ("red", "blend"),
+        "cake": ("purple", "magic_e"), "shine": ("purple", "magic_e"),
+        "stove": ("purple", "magic_e"), "five": ("purple", "magic_e"),
+        "wag": ("yellow", "cvc"), "wax": ("yellow", "cvc"),
+        "swam": ("red", "blend"), "quack": ("orange", "digraph"),
+        # Irregular magic e
+        "have": None, "some": None, "done": None, "gone": None, "none": None,
+        "move": None, "love": None, "live": None, "give": None, "come": None,
+        # Long vowel before the coda
+        "find": None, "kind": None, "mind": None, "wild": None, "child": None,
+        "cold": None, "bolt": None, "most": None, "post": None, "roll": None,
+        "both": None,
+        # a after w/wh/qu, a and u before l, u as oo
+        "want": None, "wash": None, "what": None, "swap": None, "squash": None,
+        "ball": None, "fall": None, "talk": None, "salt": None,
+        "full": None, "pull": None, "push": None,
+        # o read as u
+        "son": None, "won": None, "ton": None, "from": None, "of": None,
+        # Not one closed syllable
+        "lava": None, "he": None, "go": None,
+    }
+
+    failures = 0
+    for word, want in expected.items():
+        got = decoder.decode(word)
+        if got != want:
+            failures += 1
+            print(f"  {word}: expected {want}, got {got}")
+    print(f"{len(expected) - failures}/{len(expected)} words decode as expected")
+    sys.exit(1 if failures else 0)
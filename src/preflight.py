@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Print preflight for page images: resolution, bleed, safe margin, blank and
+corrupt files.
+
+Each page image is checked against where create_print_pdf places it (full
+width, 106 x 79.5 mm from the top-left corner of the bleed box) and the
+PRINT_SPECS bleed and safe margin:
+
+- effective DPI at the placement size (from the image header only)
+- stretching, when the image aspect differs from the placement
+- bleed coverage: art that stops short of the bleed (a white margin) or a
+  uniform frame in the bleed, on the three edges that are trimmed
+- detail near the trim: strong edges between the bleed and the safe line,
+  where the cut may slice through them
+- near-blank and corrupt (unreadable or truncated) images
+
+Pixel checks run with NumPy on a downsampled copy of each image, across a
+process pool. Results are cached by file size and modification time, so a
+rerun only opens images that changed, and a JSON report is written for CI
+or the review UI.
+
+Usage:
+    python src/preflight.py                       # every book in web/books
+    python src/preflight.py volcano_v2 castle_rats
+    python src/preflight.py --workers 8 --output output/preflight_report.json
+
+    from preflight import preflight_catalog
+    report = preflight_catalog()
+    print(report["summary"])
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from config import PRINT_SPECS
+from pdf_generator import IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM
+from validate_catalog import discover_books
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / "web" / "books"
+CACHE_PATH = ROOT_DIR / "output" / "preflight_cache.json"
+REPORT_PATH = ROOT_DIR / "output" / "preflight_report.json"
+
+# Bump when the measurements change, to invalidate cached results
+PREFLIGHT_VERSION = 1
+
+# Page types that are printed with an image when one exists
+IMAGE_PAGE_TYPES = ["cover", "story"]
+
+# Edges of the placement that are trimmed (the bottom edge meets the text area)
+TRIMMED_EDGES = ["left", "top", "right"]
+
+# Long side of the downsampled copy used for pixel checks
+ANALYSIS_SIZE = 512
+
+# Thresholds
+MIN_DPI_ERROR = 200           # Below this the print is visibly soft
+MAX_STRETCH = 0.02            # Aspect difference before stretching is reported
+WHITE_LEVEL = 245             # Channel value treated as paper white
+UNCOVERED_BLEED = 0.5         # More paper white in the bleed than next to it, by this share
+FRAME_STD = 6.0               # A bleed strip flatter than this ...
+FRAME_CONTRAST = 40.0         # ... and this different from the art inside is a frame
+TRIM_DETAIL_RATIO = 2.0       # Edge detail near the trim vs the safe area
+BLANK_STD = 4.0               # Luminance spread of a near-blank image
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def resolve_page_images(book_path: Path, book: dict, books_dir: Path = BOOKS_DIR) -> dict:
+    """
+    Find each page's image file.
+
+    Books name their art in four ways: an "image" field (files in
+    books_dir/images), v2 books in images_v2/<book>_pageNN.png, level
+    books in <book>_images/page_NN_<slug>.png, and story books
+    (<name>_story.json, read by the web reader) in images/<name>_pageNN.png.
+
+    Returns:
+        {page number: image path} for pages with an existing image
+    """
+    books_dir = Path(books_dir)
+    stem = Path(book_path).stem
+    level = book.get("level") or book.get("phonics_level")
+    level_dir = None
+    if level and stem.endswith(f"_{level}"):
+        level_dir = books_dir / f"{stem[:-len(level) - 1]}_images"
+
+    images = {}
+    for page in book.get("pages", []):
+        if not isinstance(page, dict) or "page" not in page:
+            continue
+        number = page["page"]
+        path = None
+        if page.get("image"):
+            path = books_dir / "images" / page["image"]
+        elif stem.endswith("_v2"):
+            path = books_dir / "images_v2" / f"{stem}_page{number:02d}.png"
+        elif level_dir is not None and level_dir.is_dir():
+            matches = sorted(level_dir.glob(f"page_{number:02d}_*.png")) or \
+                sorted(level_dir.glob(f"page_{number:02d}.png"))
+            path = matches[0] if matches else None
+        elif stem.endswith("_story"):
+            path = books_dir / "images" / f"{stem[:-len('_story')]}_page{number:02d}.png"
+        if path is not None and path.exists():
+            images[number] = path
+    return images
+
+
+def _edge_strips(array: np.ndarray, edge: str, width: int) -> tuple:
+    """(outer, inner) strips of `width` pixels along an edge of an HxW[xC] array."""
+    if edge == "left":
+        return array[:, :width], array[:, width:2 * width]
+    if edge == "right":
+        return array[:, -width:], array[:, -2 * width:-width]
+    if edge == "top":
+        return array[:width], array[width:2 * width]
+    return array[-width:], array[-2 * width:-width]
+
+
+def _zone_mask(shape: tuple, edge: str, width: int) -> np.ndarray:
+    mask = np.zeros(shape, dtype=bool)
+    _edge_strips(mask, edge, width)[0][...] = True
+    return mask
+
+
+def analyze_image(path: str, placement_mm: tuple = (IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM)) -> dict:
+    """
+    Measure one image for preflight.
+
+    Args:
+        path: Image file
+        placement_mm: (width, height) the image is printed at
+
+    Returns:
+        Metrics dict: width_px, height_px, effective_dpi, stretch, luma_std,
+        and per trimmed edge the bleed white share (outer and inner), bleed
+        strip flatness and contrast, and trim-zone detail ratio. On failure,
+        {"error": message}.
+    """
+    width_mm, height_mm = placement_mm
+    try:
+        with Image.open(path) as img:
+            # Header only so far
+            width, height = img.size
+            metrics = {
+                "width_px": width,
+                "height_px": height,
+                "format": img.format,
+                "mode": img.mode,
+                "effective_dpi": round(min(width / (width_mm / 25.4), height / (height_mm / 25.4)), 1),
+                "stretch": round((width / height) / (width_mm / height_mm) - 1, 4),
+            }
+            factor = max(1, max(width, height) // ANALYSIS_SIZE)
+            if img.format == "JPEG":
+                img.draft("RGB", (width // factor, height // factor))
+            img = img.convert("RGB")
+            if factor > 1 and img.width > ANALYSIS_SIZE:
+                img = img.reduce(factor)
+            rgb = np.asarray(img, dtype=np.float32)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    luma = rgb @ LUMA
+    white = (rgb >= WHITE_LEVEL).all(axis=2)
+    metrics["luma_std"] = round(float(luma.std()), 2)
+
+    # Gradient magnitude, for where the detail is
+    detail = np.zeros_like(luma)
+    detail[:, 1:] += np.abs(np.diff(luma, axis=1))
+    detail[1:, :] += np.abs(np.diff(luma, axis=0))
+
+    # Strip widths in analysis pixels (the image is stretched to the placement)
+    px_per_mm = (luma.shape[1] / width_mm, luma.shape[0] / height_mm)
+    edges = {}
+    for edge in TRIMMED_EDGES:
+        scale = px_per_mm[0] if edge in ("left", "right") else px_per_mm[1]
+        bleed = max(1, round(PRINT_SPECS["bleed_mm"] * scale))
+        safe = max(bleed + 1, round((PRINT_SPECS["bleed_mm"] + PRINT_SPECS["safe_margin_mm"]) * scale))
+
+        white_outer, white_inner = _edge_strips(white, edge, bleed)
+        luma_outer, luma_inner = _edge_strips(luma, edge, bleed)
+        trim_zone = _zone_mask(luma.shape, edge, safe)
+        trim_detail = float(detail[trim_zone].mean())
+        safe_detail = float(detail[~trim_zone].mean()) or 1e-6
+
+        edges[edge] = {
+            "bleed_white": round(float(white_outer.mean()), 3),
+            "inner_white": round(float(white_inner.mean()), 3),
+            "bleed_std": round(float(luma_outer.std()), 2),
+            "bleed_contrast": round(abs(float(luma_outer.mean()) - float(luma_inner.mean())), 2),
+            "trim_detail_ratio": round(trim_detail / safe_detail, 2),
+        }
+    metrics["edges"] = edges
+    return metrics
+
+
+def preflight_issues(metrics: dict, dpi: int = PRINT_SPECS["dpi"]) -> list:
+    """Turn analyze_image metrics into [{"check", "severity", "message"}, ...]."""
+    if "error" in metrics:
+        return [{"check": "corrupt", "severity": "error", "message": metrics["error"]}]
+
+    issues = []
+
+    def add(check, severity, message):
+        issues.append({"check": check, "severity": severity, "message": message})
+
+    if metrics["luma_std"] < BLANK_STD:
+        add("blank", "error", f"Image is nearly blank (luminance spread {metrics['luma_std']})")
+
+    effective = metrics["effective_dpi"]
+    if effective < dpi:
+        add("dpi", "error" if effective < MIN_DPI_ERROR else "warning",
+            f"{effective:.0f} DPI at placement size (need {dpi})")
+
+    if abs(metrics["stretch"]) > MAX_STRETCH:
+        axis = "horizontally" if metrics["stretch"] < 0 else "vertically"
+        add("aspect", "warning",
+            f"{metrics['width_px']}x{metrics['height_px']} is stretched {abs(metrics['stretch']) * 100:.0f}% "
+            f"{axis} to fit the placement")
+
+    for edge, values in metrics["edges"].items():
+        if values["bleed_white"] - values["inner_white"] > UNCOVERED_BLEED:
+            add("bleed", "error", f"Art stops short of the {edge} bleed "
+                f"({values['bleed_white'] * 100:.0f}% paper white)")
+        elif values["bleed_std"] < FRAME_STD and values["bleed_contrast"] > FRAME_CONTRAST:
+            add("bleed", "warning", f"Uniform frame in the {edge} bleed will trim unevenly")
+        if values["trim_detail_ratio"] > TRIM_DETAIL_RATIO:
+            add("safe_margin", "warning", f"Detail within {PRINT_SPECS['bleed_mm'] + PRINT_SPECS['safe_margin_mm']}mm "
+                f"of the {edge} edge ({values['trim_detail_ratio']}x the safe area) may be cut")
+    return issues
+
+
+def _analyze_task(path: str) -> tuple:
+    return path, analyze_image(path)
+
+
+def _image_key(path: Path) -> str:
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _load_cache(cache_path: Path) -> dict:
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != PREFLIGHT_VERSION or cache.get("spec") != _spec():
+        return {}
+    return cache.get("images", {})
+
+
+def _write_json(path: Path, data: dict):
+    """Write JSON atomically (readers never see a half-written file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _spec() -> dict:
+    return {
+        "dpi": PRINT_SPECS["dpi"],
+        "bleed_mm": PRINT_SPECS["bleed_mm"],
+        "safe_margin_mm": PRINT_SPECS["safe_margin_mm"],
+        "placement_mm": [IMAGE_WIDTH_MM, IMAGE_HEIGHT_MM],
+    }
+
+
+def preflight_catalog(books: Optional[list] = None, books_dir: Path = BOOKS_DIR,
+                      workers: Optional[int] = None, cache_path: Optional[Path] = CACHE_PATH,
+                      output_path: Optional[Path] = REPORT_PATH) -> dict:
+    """
+    Preflight the page images of every book (or the named books) in a directory.
+
+    Args:
+        books: Book names (JSON stems) to check (default: all)
+        books_dir: Directory of book JSON files
+        workers: Process pool size (default: CPU count, 1 = no pool)
+        cache_path: Per-image metrics cache (None disables)
+        output_path: Where to write the JSON report (None to skip)
+
+    Returns:
+        Report dict with "summary" and one entry per book under "books"
+    """
+    start = time.perf_counter()
+    books_dir = Path(books_dir)
+    cache = _load_cache(Path(cache_path)) if cache_path else {}
+
+    book_paths = discover_books(books_dir)
+    if books:
+        wanted = set(books)
+        book_paths = [p for p in book_paths if p.stem in wanted]
+        missing = wanted - {p.stem for p in book_paths}
+        if missing:
+            raise ValueError(f"Unknown books: {', '.join(sorted(missing))}")
+
+    # Resolve every page image; only changed images need opening
+    resolved = []
+    todo = {}
+    for book_path in book_paths:
+        with open(book_path) as f:
+            book = json.load(f)
+        images = {number: (path, _image_key(path))
+                  for number, path in resolve_page_images(book_path, book, books_dir).items()}
+        resolved.append((book_path, book, images))
+        for path, key in images.values():
+            if key not in cache:
+                todo[key] = str(path)
+
+    workers = workers or os.cpu_count() or 1
+    tasks = list(todo.values())
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = dict(pool.map(_analyze_task, tasks, chunksize=4))
+    else:
+        results = dict(_analyze_task(path) for path in tasks)
+    for key, path in todo.items():
+        cache[key] = results[path]
+
+    entries = []
+    totals = {"images": 0, "errors": 0, "warnings": 0}
+    for book_path, book, images in resolved:
+        pages = []
+        for page in book.get("pages", []):
+            if not isinstance(page, dict) or page.get("type") not in IMAGE_PAGE_TYPES:
+                continue
+            number = page.get("page")
+            if number not in images:
+                if images:  # Books without any art are text-only by design
+                    pages.append({"page": number, "image": None, "issues": [{
+                        "check": "missing", "severity": "warning",
+                        "message": "No image found; page prints as text only"}]})
+                continue
+            path, key = images[number]
+            metrics = cache[key]
+            pages.append({
+                "page": number,
+                "image": os.path.relpath(path, books_dir),
+                "width_px": metrics.get("width_px"),
+                "height_px": metrics.get("height_px"),
+                "effective_dpi": metrics.get("effective_dpi"),
+                "issues": preflight_issues(metrics),
+            })
+
+        issues = [i for p in pages for i in p["issues"]]
+        errors = sum(1 for i in issues if i["severity"] == "error")
+        warnings = len(issues) - errors
+        totals["images"] += len(images)
+        totals["errors"] += errors
+        totals["warnings"] += warnings
+        entries.append({
+            "book": book_path.stem,
+            "file": book_path.name,
+            "images": len(images),
+            "ok": errors == 0,
+            "errors": errors,
+            "warnings": warnings,
+            "pages": pages,
+        })
+
+    report = {
+        "books_dir": str(books_dir),
+        "spec": _spec(),
+        "summary": {
+            "books": len(entries),
+            "images": totals["images"],
+            "errors": totals["errors"],
+            "warnings": totals["warnings"],
+            "analyzed": len(tasks),
+            "cached": totals["images"] - len(tasks),
+            "seconds": round(time.perf_counter() - start, 3),
+        },
+        "books": entries,
+    }
+
+    if cache_path:
+        live = {key for _, _, images in resolved for _, key in images.values()}
+        _write_json(Path(cache_path), {
+            "version": PREFLIGHT_VERSION,
+            "spec": _spec(),
+            "images": {k: v for k, v in cache.items() if k in live},
+        })
+    if output_path:
+        _write_json(Path(output_path), report)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preflight book page images for print.")
+    parser.add_argument("books", nargs="*", help="Book names (default: all books)")
+    parser.add_argument("--books-dir", default=str(BOOKS_DIR), help="Directory of book JSON files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default=str(REPORT_PATH), help="Report JSON path")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every issue")
+    args = parser.parse_args()
+
+    try:
+        report = preflight_catalog(
+            books=args.books or None,
+            books_dir=Path(args.books_dir),
+            workers=args.workers,
+            cache_path=None if args.no_cache else CACHE_PATH,
+            output_path=Path(args.output),
+        )
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print("=" * 60)
+    print("PRINT PREFLIGHT")
+    print("=" * 60)
+    for entry in report["books"]:
+        if not entry["images"]:
+            continue
+        status = "OK" if entry["ok"] else "X"
+        dpis = [p["effective_dpi"] for p in entry["pages"] if p.get("effective_dpi")]
+        print(f"  {status} {entry['book']:<20} images {entry['images']:>3}  "
+              f"min DPI {min(dpis) if dpis else 0:6.1f}  "
+              f"errors {entry['errors']:>3}  warnings {entry['warnings']:>3}")
+        if args.verbose:
+            for page in entry["pages"]:
+                for issue in page["issues"]:
+                    print(f"      p{page['page']:>2} {issue['severity']:<7} {issue['message']}")
+
+    summary = report["summary"]
+    print(f"\nImages: {summary['images']} in {summary['books']} books, "
+          f"{summary['errors']} errors, {summary['warnings']} warnings "
+          f"({summary['analyzed']} analyzed, {summary['cached']} cached, {summary['seconds']}s)")
+    print(f"Report: {args.output}")
+
+    sys.exit(0 if summary["errors"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+"""
+Risograph spot-colour separation.
+
+v2 books declare 2-3 Riso inks ("riso_colors" in the book JSON). This
+module splits each page image into one grayscale master per drum: white is
+no ink, black is full ink, greys are tints for the Riso's screening.
+
+Inks overprint, so each pixel is matched against every combination of ink
+tints (TINT_LEVELS per ink, mixed with a multiply model on white paper),
+compared in CIE Lab. The match is precomputed for a 32-level RGB grid, so
+separating an image is index arithmetic and one table lookup per pixel,
+all in NumPy.
+
+Layers are cached per image content hash and palette, and a book's images
+are separated across a process pool. Per book the output is:
+    output/riso/<book>/pageNN_<ink>.png     one master per drum
+    output/riso/<book>/pageNN_preview.jpg   simulated print
+    output/riso/<book>/<book>_separations.pdf
+        one page per drum per book page, lightest ink first (print order)
+
+The same lookup table scores palette compliance: the fraction of pixels no
+ink overprint can reproduce, the number of effective colours and the amount
+of smooth shading. Images are downsampled and scored in one NumPy batch;
+palette_gate() uses the scores to accept or reject freshly generated images
+(report-only unless PALETTE_GATE_ENFORCED); restore_best_candidate() puts the
+closest reject back when every attempt fails. The limits are calibrated from
+approved art with calibrate_limits().
+
+Usage:
+    from riso import separate_book, score_book
+
+    summary = separate_book("web/books/volcano_v2.json")
+    scores = score_book("web/books/volcano_v2.json")
+
+    python src/riso.py volcano_v2
+    python src/riso.py web/books/castle_v2.json --workers 4
+    python src/riso.py volcano_v2 --score    # palette compliance only
+    python src/riso.py volcano_v2 jungle_v2 castle_v2 --calibrate
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import struct
+import hashlib
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from config import PRINT_SPECS
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / "web" / "books"
+OUTPUT_DIR = ROOT_DIR / "output" / "riso"
+CACHE_DIR = ROOT_DIR / "output" / ".riso_cache"
+
+# Bump when the separation changes, to invalidate cached layers
+RISO_VERSION = 1
+
+# Riso ink colours (sRGB, as Riso publishes them for screen previews)
+RISO_INKS = {
+    "Black": (0, 0, 0),
+    "Blue": (0, 120, 191),
+    "Bright Red": (241, 80, 96),
+    "Burgundy": (145, 78, 114),
+    "Fluorescent Orange": (255, 116, 119),
+    "Fluorescent Pink": (255, 72, 176),
+    "Fluorescent Yellow": (255, 233, 22),
+    "Green": (0, 169, 92),
+    "Medium Blue": (50, 85, 164),
+    "Orange": (255, 108, 47),
+    "Purple": (118, 91, 167),
+    "Risofederal Blue": (61, 85, 136),
+    "Teal": (0, 131, 138),
+    "Yellow": (255, 232, 0),
+}
+
+# Ink coverage steps per drum (0 = none, 1 = solid)
+TINT_LEVELS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+# RGB bits per channel in the lookup grid (5 -> 32 levels)
+LUT_BITS = 5
+
+# PNG compression for layers (masters are flat; higher levels cost time for little size)
+LAYER_COMPRESS_LEVEL = 3
+
+# Palette compliance scoring: images are scored on a copy this size (long side)
+SCORE_SIZE = 256
+
+# A pixel is off-palette when it is further than this (CIE76 delta E) from
+# every ink overprint the book's drums can produce
+OFF_PALETTE_DELTA_E = 20.0
+
+# RGB bits per channel when counting effective colours (4 -> 4096 bins)
+COLOR_BITS = 4
+
+# Shading is measured on SHADING_BLOCK-pixel block means (so Riso grain
+# averages out); luminance steps (0-255) per pixel in SHADING_GRADIENT count
+# as smooth shading: flatter is a flat fill, steeper is an edge
+SHADING_BLOCK = 4
+SHADING_GRADIENT = (0.25, 3.0)
+
+# Gate limits: an image is out of palette when any score exceeds its limit.
+# Calibrated with calibrate_limits() as the CALIBRATION_PERCENTILE of the
+# approved v2 art (CALIBRATION_BOOKS, 54 page images), rounded up
+CALIBRATION_BOOKS = ["volcano_v2", "jungle_v2", "castle_v2"]
+CALIBRATION_PERCENTILE = 95
+PALETTE_LIMITS = {
+    "off_palette": 0.38,
+    "effective_colors": 28.5,
+    "shading": 0.21,
+}
+
+# The limits still flag a few approved pages, so by default palette_gate
+# only reports images over them; set True to reject (and regenerate) them
+PALETTE_GATE_ENFORCED = False
+
+# Lookup tables for this process:
+# (inks, tints) -> (lut, tints per swatch, swatch colours, distance per grid cell)
+_LUTS = {}
+
+
+def book_inks(book: dict) -> list:
+    """
+    Ink names a book declares in "riso_colors", e.g. ["Black", "Fluorescent Orange", "Yellow"].
+
+    Raises:
+        ValueError: No riso_colors, or an ink not in RISO_INKS
+    """
+    riso_colors = book.get("riso_colors")
+    if not riso_colors:
+        raise ValueError(f"Book '{book.get('title', '')}' declares no riso_colors")
+
+    known = {name.lower(): name for name in RISO_INKS}
+    inks = ["Black"] if "black" in riso_colors else []
+    for key in sorted(k for k in riso_colors if k.startswith("color_")):
+        name = riso_colors[key]["name"] if isinstance(riso_colors[key], dict) else riso_colors[key]
+        if name.lower() not in known:
+            raise ValueError(f"Unknown Riso ink: {name} (known: {', '.join(RISO_INKS)})")
+        inks.append(known[name.lower()])
+    return inks
+
+
+def print_order(inks: list) -> list:
+    """Inks lightest first, the usual drum order (black prints last)."""
+    return sorted(inks, key=lambda ink: -float(srgb_to_lab(np.array(RISO_INKS[ink]) / 255)[0]))
+
+
+def srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB in 0-1 (any shape ending in 3) to CIE Lab (D65)."""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([[0.4124, 0.2126, 0.0193],
+                             [0.3576, 0.7152, 0.1192],
+                             [0.1805, 0.0722, 0.9505]])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def swatches(inks: list, tints: tuple = TINT_LEVELS) -> tuple:
+    """
+    Every overprint of the inks at the tint levels.
+
+    Returns:
+        (tints per swatch, shape S x inks; sRGB colour per swatch in 0-1, shape S x 3)
+    """
+    coverage = np.array(list(itertools.product(tints, repeat=len(inks))))
+    ink_rgb = np.array([RISO_INKS[ink] for ink in inks]) / 255
+    # Multiply: each ink lets through its own colour where it covers the paper
+    colors = np.prod(1 - coverage[:, :, None] * (1 - ink_rgb[None]), axis=1)
+    return coverage, colors
+
+
+def separation_lut(inks: list, tints: tuple = TINT_LEVELS) -> tuple:
+    """
+    Nearest swatch for every cell of the RGB lookup grid (built once per process).
+
+    Returns:
+        (swatch index per grid cell, tints per swatch, swatch colours,
+         Lab distance from each grid cell to its swatch)
+    """
+    key = (tuple(inks), tuple(tints))
+    if key not in _LUTS:
+        coverage, colors = swatches(inks, tints)
+        swatch_lab = srgb_to_lab(colors)
+
+        levels = 1 << LUT_BITS
+        centres = (np.arange(levels) + 0.5) * (256 / levels) / 255
+        grid = np.stack(np.meshgrid(centres, centres, centres, indexing="ij"), axis=-1).reshape(-1, 3)
+        grid_lab = srgb_to_lab(grid)
+
+        lut = np.empty(len(grid), dtype=np.int32)
+        nearest = np.empty(len(grid), dtype=np.float32)
+        for start in range(0, len(grid), 4096):
+            chunk = grid_lab[start:start + 4096]
+            distances = ((chunk[:, None, :] - swatch_lab[None]) ** 2).sum(axis=2)
+            lut[start:start + 4096] = distances.argmin(axis=1)
+            nearest[start:start + 4096] = np.sqrt(distances.min(axis=1))
+        _LUTS[key] = (lut, coverage, colors, nearest)
+    return _LUTS[key]
+
+
+def _grid_index(rgb: np.ndarray) -> np.ndarray:
+    """Lookup grid cell of each pixel of a ...x3 uint8 array."""
+    cells = (rgb >> (8 - LUT_BITS)).astype(np.int32)
+    return (cells[..., 0] << (2 * LUT_BITS)) | (cells[..., 1] << LUT_BITS) | cells[..., 2]
+
+
+def separate_array(rgb: np.ndarray, inks: list, tints: tuple = TINT_LEVELS) -> tuple:
+    """
+    Separate an HxWx3 uint8 image.
+
+    Returns:
+        (layers: inks x H x W uint8 with 255 = no ink, preview: HxWx3 uint8)
+    """
+    lut, coverage, colors, _ = separation_lut(inks, tints)
+    swatch = lut[_grid_index(rgb)]
+    layer_values = np.round(255 * (1 - coverage)).astype(np.uint8)   # S x inks
+    preview_values = np.round(255 * colors).astype(np.uint8)         # S x 3
+    layers = np.moveaxis(layer_values[swatch], -1, 0)
+    return np.ascontiguousarray(layers), preview_values[swatch]
+
+
+def _ink_slug(ink: str) -> str:
+    return ink.lower().replace(" ", "_")
+
+
+def _load_rgb(path: str) -> np.ndarray:
+    with Image.open(path) as img:
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+            paper = Image.new("RGB", img.size, (255, 255, 255))
+            paper.paste(img, mask=img.getchannel("A"))
+            img = paper
+        return np.asarray(img.convert("RGB"))
+
+
+def separate_image(source: str, inks: list, cache_dir: Path = CACHE_DIR) -> dict:
+    """
+    Separate one image into drum layers, using the cache when possible.
+
+    Returns:
+        {"layers": {ink: PNG path}, "preview": PNG path, "coverage": {ink: mean ink 0-1}}
+    """
+    source_hash = hashlib.sha256(Path(source).read_bytes()).hexdigest()
+    palette = "+".join(_ink_slug(ink) for ink in inks)
+    palette_hash = hashlib.sha256(f"{palette}|{TINT_LEVELS}|{LUT_BITS}".encode()).hexdigest()
+    entry = Path(cache_dir) / f"{source_hash[:24]}_{palette_hash[:12]}_v{RISO_VERSION}"
+    manifest_path = entry / "separation.json"
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    layers, preview = separate_array(_load_rgb(source), inks)
+
+    # Build in a temporary directory, then move it into place in one step
+    tmp_entry = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    tmp_entry.mkdir(parents=True, exist_ok=True)
+    dpi = (PRINT_SPECS["dpi"], PRINT_SPECS["dpi"])
+    result = {"layers": {}, "preview": str(entry / "preview.jpg"), "coverage": {}}
+    for ink, layer in zip(inks, layers):
+        name = f"{_ink_slug(ink)}.png"
+        Image.fromarray(layer, "L").save(tmp_entry / name, dpi=dpi, compress_level=LAYER_COMPRESS_LEVEL)
+        result["layers"][ink] = str(entry / name)
+        result["coverage"][ink] = round(1 - float(layer.mean()) / 255, 4)
+    Image.fromarray(preview, "RGB").save(tmp_entry / "preview.jpg", quality=90)
+    with open(tmp_entry / "separation.json", 'w') as f:
+        json.dump(result, f, indent=2)
+    try:
+        os.replace(tmp_entry, entry)
+    except OSError:
+        shutil.rmtree(tmp_entry, ignore_errors=True)  # Another worker got there first
+    return result
+
+
+def _separate_task(args: tuple) -> tuple:
+    page, source, inks, cache_dir = args
+    try:
+        return page, separate_image(source, inks, cache_dir), None
+    except Exception as e:
+        return page, None, f"{type(e).__name__}: {e}"
+
+
+def _png_stream(path: str) -> tuple:
+    """
+    (width, height, data) of an 8-bit grayscale PNG, data being its zlib
+    stream with PNG row filters, which PDF's FlateDecode reads as is.
+    """
+    with open(path, 'rb') as f:
+        png = f.read()
+    width = height = None
+    chunks = []
+    position = 8
+    while position < len(png):
+        length, kind = struct.unpack(">I4s", png[position:position + 8])
+        body = png[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if (depth, color_type, interlace) != (8, 0, 0):
+                raise ValueError(f"Not an 8-bit grayscale PNG: {path}")
+        elif kind == b"IDAT":
+            chunks.append(body)
+        position += 12 + length
+    return width, height, b"".join(chunks)
+
+
+def write_separations_pdf(pages: list, inks: list, output_path: Path, width_mm: float):
+    """
+    One PDF page per drum per book page, in print order.
+
+    Layer PNGs are embedded without re-encoding (see _png_stream).
+
+    Args:
+        pages: [(page number, separate_image result), ...]
+        inks: Inks in print order
+        width_mm: Page width; heights follow each image's aspect
+    """
+    from pypdf.generic import DictionaryObject, NameObject, NumberObject
+    from imposition import MM, StreamingPDFWriter
+
+    with StreamingPDFWriter(output_path) as writer:
+        for _, separation in pages:
+            for ink in inks:
+                width, height, data = _png_stream(separation["layers"][ink])
+                image = writer.add_stream(data, {
+                    "/Type": NameObject("/XObject"),
+                    "/Subtype": NameObject("/Image"),
+                    "/Width": NumberObject(width),
+                    "/Height": NumberObject(height),
+                    "/ColorSpace": NameObject("/DeviceGray"),
+                    "/BitsPerComponent": NumberObject(8),
+                    "/Filter": NameObject("/FlateDecode"),
+                    "/DecodeParms": DictionaryObject({
+                        NameObject("/Predictor"): NumberObject(15),
+                        NameObject("/Colors"): NumberObject(1),
+                        NameObject("/BitsPerComponent"): NumberObject(8),
+                        NameObject("/Columns"): NumberObject(width),
+                    }),
+                }, compress=False)
+                page_w = width_mm * MM
+                page_h = page_w * height / width
+                content = f"q {page_w:.3f} 0 0 {page_h:.3f} 0 0 cm /Im Do Q\n".encode()
+                writer.add_page(page_w, page_h, content, {"Im": image})
+        writer.close(title=f"{output_path.stem} ({', '.join(inks)})")
+
+
+def _load_small(source: str) -> np.ndarray:
+    """An image as RGB on white, downsampled to SCORE_SIZE for scoring."""
+    with Image.open(source) as img:
+        img.draft("RGB", (SCORE_SIZE, SCORE_SIZE))
+        img = img.convert("RGBA") if img.mode in ("RGBA", "LA", "P") else img.convert("RGB")
+        img.thumbnail((SCORE_SIZE, SCORE_SIZE), Image.BOX)
+        if img.mode == "RGBA":
+            paper = Image.new("RGB", img.size, (255, 255, 255))
+            paper.paste(img, mask=img.getchannel("A"))
+            img = paper
+        return np.asarray(img)
+
+
+def palette_scores(arrays: list, inks: list) -> list:
+    """
+    Score RGB arrays (HxWx3 uint8) against a palette, as one batch.
+
+    Pixels of every image are concatenated and scored together: one LUT
+    lookup gives each pixel's distance to the nearest ink overprint, and
+    per-image sums come from np.bincount over image ids.
+
+    Returns:
+        One dict per array:
+            off_palette: fraction of pixels no ink overprint can reproduce
+            effective_colors: exp(entropy) of the colour histogram, i.e. how
+                many equally common colours would give the same spread
+            shading: fraction of pixels in smooth gradients
+    """
+    if not arrays:
+        return []
+    *_, nearest = separation_lut(inks)
+    sizes = np.array([a.shape[0] * a.shape[1] for a in arrays])
+    ids = np.repeat(np.arange(len(arrays)), sizes)
+    pixels = np.concatenate([a.reshape(-1, 3) for a in arrays])
+
+    off = nearest[_grid_index(pixels)] > OFF_PALETTE_DELTA_E
+    off_palette = np.bincount(ids, weights=off, minlength=len(arrays)) / sizes
+
+    shift = 8 - COLOR_BITS
+    bins = pixels.astype(np.int32) >> shift
+    bins = (bins[:, 0] << (2 * COLOR_BITS)) | (bins[:, 1] << COLOR_BITS) | bins[:, 2]
+    n_bins = 1 << (3 * COLOR_BITS)
+    histogram = np.bincount(ids * n_bins + bins, minlength=len(arrays) * n_bins)
+    p = histogram.reshape(len(arrays), n_bins) / sizes[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.where(p > 0, p * np.log(p), 0.0).sum(axis=1)
+    effective_colors = np.exp(entropy)
+
+    low, high = SHADING_GRADIENT
+    k = SHADING_BLOCK
+    shading = []
+    for a in arrays:
+        h, w = a.shape[0] // k * k, a.shape[1] // k * k
+        luma = a[:h, :w].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        blocks = luma.reshape(h // k, k, w // k, k).mean(axis=(1, 3))
+        if min(blocks.shape) < 2:
+            shading.append(0.0)
+            continue
+        gy, gx = np.gradient(blocks)
+        gradient = np.hypot(gx, gy) / k
+        shading.append(float(((gradient > low) & (gradient < high)).mean()))
+
+    return [
+        {
+            "off_palette": round(float(off_palette[i]), 4),
+            "effective_colors": round(float(effective_colors[i]), 1),
+            "shading": round(float(shading[i]), 4),
+        }
+        for i in range(len(arrays))
+    ]
+
+
+def palette_verdict(scores: dict, limits: dict = PALETTE_LIMITS) -> tuple:
+    """
+    Accept or reject an image from its palette scores.
+
+    Returns:
+        (accepted, list of reasons for rejection)
+    """
+    reasons = [
+        f"{name} {scores[name]:g} > {limit:g}"
+        for name, limit in limits.items()
+        if scores[name] > limit
+    ]
+    return not reasons, reasons
+
+
+def score_images(sources: list, inks: list, workers: Optional[int] = None) -> dict:
+    """
+    Palette scores and verdicts for image files.
+
+    Images are decoded and downsampled across a process pool, then scored
+    together in one batch.
+
+    Returns:
+        {source: scores dict + accepted + reasons}. Images that fail to load
+        are left out.
+    """
+    sources = list(dict.fromkeys(map(str, sources)))
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sources))) as pool:
+            futures = [pool.submit(_load_small, source) for source in sources]
+            loaded = []
+            for source, future in zip(sources, futures):
+                try:
+                    loaded.append((source, future.result()))
+                except Exception as e:
+                    print(f"Warning: Could not load image {source}: {e}")
+    else:
+        loaded = []
+        for source in sources:
+            try:
+                loaded.append((source, _load_small(source)))
+            except Exception as e:
+                print(f"Warning: Could not load image {source}: {e}")
+
+    results = {}
+    for (source, _), scores in zip(loaded, palette_scores([a for _, a in loaded], inks)):
+        accepted, reasons = palette_verdict(scores)
+        results[source] = {**scores, "accepted": accepted, "reasons": reasons}
+    return results
+
+
+def palette_gate(path: str, inks: list, enforce: bool = PALETTE_GATE_ENFORCED) -> bool:
+    """
+    Accept/reject gate for a freshly generated image.
+
+    When enforced, a rejected image is moved aside to <name>.rejectedN<ext>,
+    numbered so every attempt is kept for review (and for
+    restore_best_candidate), and the caller can generate it again. Otherwise
+    an image over the limits is only reported and kept.
+
+    Returns:
+        True if the image stays within the palette (or the gate is report-only)
+    """
+    path = Path(path)
+    result = score_images([path], inks, workers=1).get(str(path))
+    if result is None:
+        return False
+    if result["accepted"]:
+        return True
+    if not enforce:
+        print(f"   OFF-PALETTE (report only: {', '.join(result['reasons'])})")
+        return True
+    taken = [candidate.stem.rsplit(".rejected", 1)[1] for candidate in rejected_candidates(path)]
+    number = max((int(n) for n in taken if n.isdigit()), default=0) + 1
+    rejected = path.with_name(f"{path.stem}.rejected{number}{path.suffix}")
+    os.replace(path, rejected)
+    print(f"   REJECTED (palette: {', '.join(result['reasons'])}) -> {rejected.name}")
+    return False
+
+
+def rejected_candidates(path: str) -> list:
+    """Images palette_gate moved aside for a path (<name>.rejectedN<ext>)."""
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.stem}.rejected*{path.suffix}"))
+
+
+def restore_best_candidate(path: str, inks: list) -> Optional[dict]:
+    """
+    Copy the best of an image's rejected candidates back to its path, once
+    every attempt was rejected, so the page keeps its closest image.
+
+    Only an empty path is filled (an image still there was not rejected).
+    The best candidate has the smallest worst overshoot (score / limit over
+    PALETTE_LIMITS). The candidates stay in place for review.
+
+    Returns:
+        The restored candidate's scores, with its file as "candidate", or
+        None if nothing was restored
+    """
+    candidates = rejected_candidates(path)
+    if Path(path).exists() or not candidates:
+        return None
+    results = score_images(candidates, inks, workers=1)
+    if not results:
+        return None
+
+    def overshoot(source):
+        return max(results[source][name] / limit for name, limit in PALETTE_LIMITS.items())
+
+    best = min(results, key=overshoot)
+    shutil.copyfile(best, path)
+    print(f"   RESTORED best rejected candidate {Path(best).name} -> {Path(path).name}")
+    return {**results[best], "candidate": best}
+
+
+def score_book(book_path: str, books_dir: Path = BOOKS_DIR, workers: Optional[int] = None) -> dict:
+    """
+    Palette scores for every page image of a book.
+
+    Returns:
+        {page number: scores dict + accepted + reasons}
+    """
+    from preflight import resolve_page_images
+
+    book_path = Path(book_path)
+    with open(book_path) as f:
+        book = json.load(f)
+    inks = book_inks(book)
+    images = resolve_page_images(book_path, book, books_dir)
+    scores = score_images(list(images.values()), inks, workers)
+    return {page: scores[str(path)] for page, path in sorted(images.items()) if str(path) in scores}
+
+
+def calibrate_limits(book_paths: list, percentile: float = CALIBRATION_PERCENTILE,
+                     books_dir: Path = BOOKS_DIR, workers: Optional[int] = None) -> dict:
+    """
+    Palette limits from approved art: a percentile of each score over the
+    page images of the given books.
+
+    Returns:
+        {score name: limit}, in the shape of PALETTE_LIMITS
+    """
+    scores = []
+    for book_path in book_paths:
+        scores.extend(score_book(book_path, books_dir, workers).values())
+    if not scores:
+        raise ValueError("No page images to calibrate from")
+    return {
+        name: round(float(np.percentile([s[name] for s in scores], percentile)), 3)
+        for name in PALETTE_LIMITS
+    }
+
+
+def separate_book(book_path: str, output_dir: Path = OUTPUT_DIR, books_dir: Path = BOOKS_DIR,
+                  cache_dir: Path = CACHE_DIR, workers: Optional[int] = None,
+                  pdf: bool = True) -> dict:
+    """
+    Separate every page image of a book into its declared Riso inks.
+
+    Args:
+        book_path: Book JSON with riso_colors
+        output_dir: Layers are written to output_dir/<book>/
+        books_dir: Where page images are looked up (see preflight.resolve_page_images)
+        cache_dir: Per-image layer cache
+        workers: Process pool size (default: CPU count, 1 = no pool)
+        pdf: Also write <book>_separations.pdf
+
+    Returns:
+        Summary dict: book, inks (print order), pages, failed, coverage per ink, output, pdf, seconds
+    """
+    from preflight import resolve_page_images
+    from pdf_generator import IMAGE_WIDTH_MM
+
+    start = time.perf_counter()
+    book_path = Path(book_path)
+    with open(book_path) as f:
+        book = json.load(f)
+    inks = print_order(book_inks(book))
+    images = resolve_page_images(book_path, book, books_dir)
+    if not images:
+        raise ValueError(f"No page images found for {book_path.stem}")
+
+    tasks = [(page, str(path), inks, Path(cache_dir)) for page, path in sorted(images.items())]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        separation_lut(inks)  # Fail early on a bad palette
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_separate_task, tasks))
+    else:
+        results = [_separate_task(task) for task in tasks]
+
+    book_dir = Path(output_dir) / book_path.stem
+    book_dir.mkdir(parents=True, exist_ok=True)
+    separated = []
+    failed = {}
+    for page, separation, error in results:
+        if error:
+            failed[page] = error
+            print(f"Warning: Could not separate page {page}: {error}")
+            continue
+        for ink, layer in separation["layers"].items():
+            shutil.copyfile(layer, book_dir / f"page{page:02d}_{_ink_slug(ink)}.png")
+        shutil.copyfile(separation["preview"], book_dir / f"page{page:02d}_preview.jpg")
+        separated.append((page, separation))
+
+    pdf_path = None
+    if pdf and separated:
+        pdf_path = book_dir / f"{book_path.stem}_separations.pdf"
+        write_separations_pdf(separated, inks, pdf_path, IMAGE_WIDTH_MM)
+
+    coverage = {
+        ink: round(sum(s["coverage"][ink] for _, s in separated) / len(separated), 4) if separated else 0.0
+        for ink in inks
+    }
+    return {
+        "book": book_path.stem,
+        "inks": inks,
+        "pages": [page for page, _ in separated],
+        "failed": failed,
+        "coverage": coverage,
+        "output": str(book_dir),
+        "pdf": str(pdf_path) if pdf_path else None,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Separate a v2 book's page images into Riso drum layers.")
+    parser.add_argument("books", nargs="+", help="Book names or JSON paths (e.g. volcano_v2)")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR), help="Where layers are written")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip the separations PDF")
+    parser.add_argument("--score", action="store_true", help="Only score palette compliance")
+    parser.add_argument("--calibrate", action="store_true",
+                        help=f"Print palette limits from the books' art ({CALIBRATION_PERCENTILE}th percentile)")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        book_paths = [Path(name) if name.endswith(".json") else BOOKS_DIR / f"{name}.json" for name in args.books]
+        try:
+            limits = calibrate_limits(book_paths, workers=args.workers)
+        except (OSError, ValueError) as e:
+            print(e)
+            sys.exit(1)
+        print(f"Palette limits ({CALIBRATION_PERCENTILE}th percentile of {len(book_paths)} books):")
+        for name, limit in limits.items():
+            print(f"  {name:<18} {limit:g}  (current {PALETTE_LIMITS[name]:g})")
+        sys.exit(0)
+
+    for name in args.books:
+        book_path = Path(name) if name.endswith(".json") else BOOKS_DIR / f"{name}.json"
+        if not book_path.exists():
+            print(f"Not found: {book_path}")
+            sys.exit(1)
+        if args.score:
+            try:
+                scores = score_book(book_path, workers=args.workers)
+            except ValueError as e:
+                print(e)
+                sys.exit(1)
+            accepted = sum(1 for s in scores.values() if s["accepted"])
+            print(f"{book_path.stem}: {accepted}/{len(scores)} pages within palette")
+            for page, s in scores.items():
+                status = "OK " if s["accepted"] else "REJ"
+                print(f"  {status} page {page:2d}: {s['off_palette'] * 100:5.1f}% off-palette, "
+                      f"{s['effective_colors']:5.1f} colours, {s['shading'] * 100:5.1f}% shading")
+            continue
+        try:
+            summary = separate_book(book_path, Path(args.output_dir), workers=args.workers,
+                                    pdf=not args.no_pdf)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+        print(f"{summary['book']}: {len(summary['pages'])} pages -> {len(summary['inks'])} drums "
+              f"in {summary['seconds']:.2f}s")
+        for ink in summary["inks"]:
+            print(f"  {ink:<20} {summary['coverage'][ink] * 100:5.1f}% average coverage")
+        print(f"  {summary['output']}")
+        if summary["pdf"]:
+            print(f"  {summary['pdf']}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Spelling suggestions for words the word banks do not know.
+
+A SymSpell-style index: every allowed word is stored under all the strings
+reachable by deleting up to max_distance letters. A misspelling shares one
+of those delete-strings with each word within that edit distance, so a
+lookup only generates the misspelling's own deletes and verifies the few
+candidates it finds - no scan over the vocabulary.
+
+Suggestions are ranked by edit distance, then by word frequency (Fry rank
+for the most common words, then sight and heart words, then decodable words).
+Short words are only matched within one edit: two edits away from a
+three-letter word is almost any other short word.
+
+Usage:
+    from word_banks import WordBanks
+
+    wb = WordBanks()
+    wb.suggest_spelling("fihs", level="orange")  # ["fish"]
+
+    index = wb.get_spelling_index("orange")
+    index.suggest("teh")                          # [("the", 1), ("ten", 1)]
+    index.confident_suggestions("wiat")           # [] (want and wit tie)
+"""
+
+from collections import defaultdict
+
+# Words up to this length are matched within one edit only
+SHORT_WORD_LENGTH = 5
+
+# A best match tied on distance must be this many times more frequent than
+# the runner-up to be suggested ("teh": the >> ten; "wiat": want = wit)
+CONFIDENCE_RATIO = 2
+
+# Frequency scores by word source (Fry words score higher by rank)
+FRY_BASE = 1000
+SIGHT_FREQUENCY = 100
+DECODABLE_FREQUENCY = 10
+
+
+def _deletes(word: str, max_distance: int) -> list:
+    """Strings made by deleting letters from word: [{0 deletes}, {1 delete}, ...]."""
+    levels = [{word}]
+    for _ in range(max_distance):
+        levels.append({w[:i] + w[i + 1:] for w in levels[-1] for i in range(len(w))})
+    return levels
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap
+    adjacent letters). Returns max_distance + 1 once the distance is known
+    to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # Shared prefixes and suffixes never add to the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return len(a) or len(b)
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class SpellingIndex:
+    """Delete-based nearest-word index over a fixed vocabulary."""
+
+    def __init__(self, frequencies: dict, max_distance: int = 2):
+        """
+        Args:
+            frequencies: {word: frequency score} - the allowed vocabulary
+            max_distance: Largest edit distance suggestions may have
+        """
+        self.frequencies = {w.lower(): f for w, f in frequencies.items()}
+        self.max_distance = max_distance
+        # One table per number of deleted letters, so short lookups can skip
+        # words that are only reachable with more deletes than they allow
+        self._deletes = [defaultdict(list) for _ in range(max_distance + 1)]
+        for word in sorted(self.frequencies):
+            seen = set()
+            for depth, deletes in enumerate(_deletes(word, max_distance)):
+                for delete in deletes - seen:
+                    self._deletes[depth][delete].append(word)
+                seen |= deletes
+        self._cache = {}
+
+    @classmethod
+    def from_word_banks(cls, wb, level: str, max_distance: int = 2) -> "SpellingIndex":
+        """Index the words a level allows: decodable, sight and heart words."""
+        frequencies = {word: DECODABLE_FREQUENCY for word in wb.level_decodable[level]}
+        for word in wb.level_sight_words[level] | set(wb.heart_words):
+            frequencies[word] = SIGHT_FREQUENCY
+        for rank, word in enumerate(wb.data["sight_words"]["fry_first_100"]):
+            word = word.lower()
+            if word in frequencies:
+                frequencies[word] = FRY_BASE - rank
+        return cls(frequencies, max_distance)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.frequencies
+
+    def suggest(self, word: str, max_distance: int = None, limit: int = 5) -> list:
+        """
+        Nearest vocabulary words to a (misspelled) word.
+
+        Args:
+            word: Word to look up
+            max_distance: Edit distance limit (default: 1 for short words,
+                          else the index's limit)
+            limit: Maximum number of suggestions
+
+        Returns:
+            [(word, distance), ...] closest first, then most frequent first
+        """
+        word = word.lower()
+        if max_distance is None:
+            max_distance = 1 if len(word) <= SHORT_WORD_LENGTH else self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+
+        key = (word, max_distance)
+        ranked = self._cache.get(key)
+        if ranked is None:
+            distances = {}
+            for deletes in _deletes(word, max_distance):
+                for table in self._deletes[:max_distance + 1]:
+                    for delete in deletes:
+                        for candidate in table.get(delete, ()):
+                            if candidate not in distances:
+                                distances[candidate] = edit_distance(word, candidate, max_distance)
+            ranked = sorted(
+                ((w, d) for w, d in distances.items() if d <= max_distance),
+                key=lambda item: (item[1], -self.frequencies[item[0]], item[0])
+            )
+            self._cache[key] = ranked
+        return ranked[:limit]
+
+    def confident_suggestions(self, word: str, limit: int = 5) -> list:
+        """
+        Like suggest(), but [] unless one word clearly stands out: the only
+        word at the smallest distance, or CONFIDENCE_RATIO times as frequent
+        as the next word at that distance.
+        """
+        ranked = self.suggest(word, limit=limit)
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            if self.frequencies[ranked[0][0]] < CONFIDENCE_RATIO * self.frequencies[ranked[1][0]]:
+                return []
+        return ranked
+
+
+if __name__ == "__main__":
+    import time
+    from word_banks import WordBanks
+
+    wb = WordBanks()
+    start = time.perf_counter()
+    index = wb.get_spelling_index("orange")
+    print(f"Built orange index ({len(index.frequencies)} words) in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for typo in ["teh", "hpo", "fihs", "shipp", "jumpd", "splashh", "chikcen"]:
+        start = time.perf_counter()
+        suggestions = index.suggest(typo)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print(f"  {typo:<8} -> {suggestions}  ({elapsed:.0f} us)")
@@ -4,18 +4,165 @@ Story generation using LLM for Funbookies minibooks.
 
 import os
 import json
+import time
+import uuid
 import httpx
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Optional
 from dotenv import load_dotenv
 from config import BOOK_SPECS, BRAND
 
 load_dotenv()
 
 
+@dataclass
+class BatchRequest:
+    """One chat completion in a batch job, tagged with the book it belongs to."""
+    custom_id: str
+    book: str
+    payload: dict
+    page: Optional[int] = None  # None for whole-story requests
+
+
+class OpenAIBatchClient:
+    """
+    Batch protocol client for OpenAI-compatible /files + /batches endpoints.
+
+    Requests are uploaded as one JSONL file, processed asynchronously by the
+    provider (up to the completion window), and downloaded as one JSONL file.
+    """
+
+    def __init__(self, api_key: str, base_url: str, completion_window: str = "24h"):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.completion_window = completion_window
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def submit(self, requests: list) -> str:
+        """Upload requests and start a batch job. Returns the batch id."""
+        lines = [
+            json.dumps({
+                "custom_id": req.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": req.payload,
+            })
+            for req in requests
+        ]
+
+        with httpx.Client(timeout=120.0) as client:
+            upload = client.post(
+                f"{self.base_url}/files",
+                headers=self._headers(),
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", "\n".join(lines).encode(), "application/jsonl")},
+            )
+            upload.raise_for_status()
+
+            response = client.post(
+                f"{self.base_url}/batches",
+                headers=self._headers(),
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": self.completion_window,
+                },
+            )
+            response.raise_for_status()
+            return response.json()["id"]
+
+    def status(self, batch_id: str) -> str:
+        """Return the batch status (validating, in_progress, completed, failed, ...)."""
+        with httpx.Client(timeout=60.0) as client:
+            response = client.get(f"{self.base_url}/batches/{batch_id}", headers=self._headers())
+            response.raise_for_status()
+            return response.json()["status"]
+
+    def results(self, batch_id: str) -> dict:
+        """
+        Download a completed batch.
+
+        Returns dict mapping custom_id to the message content, or to an
+        Exception if that request failed.
+        """
+        outputs = {}
+
+        with httpx.Client(timeout=120.0) as client:
+            response = client.get(f"{self.base_url}/batches/{batch_id}", headers=self._headers())
+            response.raise_for_status()
+            batch = response.json()
+
+            for key in ["output_file_id", "error_file_id"]:
+                file_id = batch.get(key)
+                if not file_id:
+                    continue
+                content = client.get(f"{self.base_url}/files/{file_id}/content", headers=self._headers())
+                content.raise_for_status()
+
+                for line in content.text.splitlines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    body = (item.get("response") or {}).get("body") or {}
+                    if item.get("error") or "choices" not in body:
+                        outputs[item["custom_id"]] = Exception(f"Batch request failed: {item.get('error') or body}")
+                    else:
+                        outputs[item["custom_id"]] = body["choices"][0]["message"]["content"]
+
+        return outputs
+
+
+class LocalBatchClient:
+    """
+    In-process stand-in for the batch protocol, for offline runs and tests.
+
+    Each request is answered by ``responder(payload) -> content``. Jobs report
+    "in_progress" for ``polls_until_done`` status checks before completing,
+    so callers exercise the same submit/poll/collect loop as with a provider.
+    """
+
+    def __init__(self, responder: Optional[Callable[[dict], str]] = None, polls_until_done: int = 1):
+        self.responder = responder or self._placeholder_story
+        self.polls_until_done = polls_until_done
+        self.jobs = {}
+
+    def submit(self, requests: list) -> str:
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        self.jobs[batch_id] = {"requests": list(requests), "polls": 0}
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        job = self.jobs[batch_id]
+        job["polls"] += 1
+        return "completed" if job["polls"] > self.polls_until_done else "in_progress"
+
+    def results(self, batch_id: str) -> dict:
+        outputs = {}
+        for req in self.jobs[batch_id]["requests"]:
+            try:
+                outputs[req.custom_id] = self.responder(req.payload)
+            except Exception as e:
+                outputs[req.custom_id] = e
+        return outputs
+
+    @staticmethod
+    def _placeholder_story(payload: dict) -> str:
+        """Answer with a minimal valid 24-page story."""
+        prompt = payload["messages"][-1]["content"].splitlines()[0].split(": ", 1)[-1]
+        pages = [{"page": 1, "type": "cover", "text": prompt, "image_prompt": prompt}]
+        pages += [
+            {"page": n, "type": "story", "text": f"Page {n}.", "image_prompt": prompt}
+            for n in range(2, BOOK_SPECS["total_pages"] + 1)
+        ]
+        return json.dumps({"title": prompt, "pages": pages})
+
+
 class StoryGenerator:
     """Generate children's stories with page breakdowns."""
 
-    def __init__(self, backend: str = "mulerouter"):
+    def __init__(self, backend: str = "mulerouter", batch_client=None):
         self.backend = backend
 
         self.configs = {
@@ -24,15 +171,19 @@ class StoryGenerator:
                 "base_url": os.getenv("MULEROUTER_BASE_URL", "https://api.mulerouter.ai"),
                 "model": "qwen-plus",
                 "endpoint": "/vendors/openai/v1/chat/completions",
+                "batch_base_url": os.getenv("MULEROUTER_BASE_URL", "https://api.mulerouter.ai") + "/vendors/openai/v1",
             },
             "openrouter": {
                 "api_key": os.getenv("OPENROUTER_API_KEY"),
                 "base_url": "https://openrouter.ai/api/v1",
                 "model": "anthropic/claude-3.5-sonnet",
                 "endpoint": "/chat/completions",
+                "batch_base_url": None,  # No batch API
             },
         }
 
+        self.batch_client = batch_client
+
     def generate_story(
         self,
         topic: str,
@@ -53,6 +204,36 @@ class StoryGenerator:
             Dict with title, pages (text + image_prompt for each)
         """
         config = self.configs[self.backend]
+        payload = self.build_story_payload(topic, age_range, style, model)
+
+        headers = {
+            "Authorization": f"Bearer {config['api_key']}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://funbookies.com",
+            "X-Title": "Funbookies",
+        }
+
+        with httpx.Client(timeout=60.0) as client:
+            response = client.post(
+                f"{config['base_url']}/chat/completions",
+                headers=headers,
+                json=payload,
+            )
+            response.raise_for_status()
+            data = response.json()
+
+        # Extract the story from response
+        return self.parse_json_content(data["choices"][0]["message"]["content"])
+
+    def build_story_payload(
+        self,
+        topic: str,
+        age_range: str = "3-6",
+        style: str = "playful and gentle",
+        model: Optional[str] = None,
+    ) -> dict:
+        """Build the chat completion payload for one story."""
+        config = self.configs[self.backend]
         model = model or config["model"]
 
         story_pages = BOOK_SPECS["story_pages"]
@@ -92,14 +273,7 @@ Make image_prompt descriptions detailed and specific for AI image generation.
 Include: main subject, setting, colors, mood, style (children's book illustration).
 """
 
-        headers = {
-            "Authorization": f"Bearer {config['api_key']}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://funbookies.com",
-            "X-Title": "Funbookies",
-        }
-
-        payload = {
+        return {
             "model": model,
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -109,26 +283,117 @@ Include: main subject, setting, colors, mood, style (children's book illustratio
             "max_tokens": 4000,
         }
 
-        with httpx.Client(timeout=60.0) as client:
-            response = client.post(
-                f"{config['base_url']}/chat/completions",
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-        # Extract the story from response
-        content = data["choices"][0]["message"]["content"]
-
-        # Parse JSON from response (handle markdown code blocks)
+    @staticmethod
+    def parse_json_content(content: str) -> dict:
+        """Parse JSON from an LLM reply (handles markdown code blocks)."""
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0]
         elif "```" in content:
             content = content.split("```")[1].split("```")[0]
 
-        story = json.loads(content.strip())
-        return story
+        return json.loads(content.strip())
+
+    # -------------------------------------------------------------------------
+    # Batch Mode
+    # -------------------------------------------------------------------------
+
+    def story_request(self, book: str, topic: str, **kwargs) -> BatchRequest:
+        """Build a batch request for a whole story. kwargs as for generate_story."""
+        return BatchRequest(
+            custom_id=f"{book}:story",
+            book=book,
+            payload=self.build_story_payload(topic, **kwargs),
+        )
+
+    def page_request(self, book: str, page: int, system_prompt: str, user_prompt: str,
+                     temperature: float = 0.7, max_tokens: int = 1000,
+                     model: Optional[str] = None) -> BatchRequest:
+        """Build a batch request for a single page (rewrite, repair, ...) returning JSON."""
+        return BatchRequest(
+            custom_id=f"{book}:page{page:02d}",
+            book=book,
+            page=page,
+            payload={
+                "model": model or self.configs[self.backend]["model"],
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+        )
+
+    def _get_batch_client(self):
+        if self.batch_client is None:
+            config = self.configs[self.backend]
+            if not config.get("batch_base_url"):
+                raise ValueError(f"Backend '{self.backend}' has no batch API. Pass a batch_client.")
+            self.batch_client = OpenAIBatchClient(config["api_key"], config["batch_base_url"])
+        return self.batch_client
+
+    def submit_batch(self, requests: list) -> str:
+        """Submit requests as one batch job. Returns the batch id."""
+        ids = [req.custom_id for req in requests]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Batch requests need unique custom_ids")
+        return self._get_batch_client().submit(requests)
+
+    def poll_batch(self, batch_id: str, poll_interval: float = 30.0, timeout: float = 24 * 3600) -> str:
+        """Block until a batch job finishes. Returns its final status."""
+        client = self._get_batch_client()
+        deadline = time.monotonic() + timeout
+
+        while True:
+            status = client.status(batch_id)
+            if status in ["completed", "failed", "expired", "cancelled"]:
+                return status
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch {batch_id} still '{status}' after {timeout}s")
+            time.sleep(poll_interval)
+
+    def collect_batch(self, batch_id: str, requests: list) -> dict:
+        """
+        Fan batch results back out to their books.
+
+        Returns:
+            {book: {"story": dict or None, "pages": {page: dict}}}
+            Failed requests are reported and left out.
+        """
+        outputs = self._get_batch_client().results(batch_id)
+        books = {}
+
+        for req in requests:
+            output = outputs.get(req.custom_id)
+            try:
+                if output is None:
+                    raise Exception("No result returned")
+                if isinstance(output, Exception):
+                    raise output
+                result = self.parse_json_content(output)
+            except Exception as e:
+                print(f"  Failed: {req.custom_id} - {e}")
+                continue
+
+            book = books.setdefault(req.book, {"story": None, "pages": {}})
+            if req.page is None:
+                book["story"] = result
+            else:
+                book["pages"][req.page] = result
+
+        return books
+
+    def generate_batch(self, requests: list, poll_interval: float = 30.0,
+                       timeout: float = 24 * 3600) -> dict:
+        """Submit, wait for and collect a batch job. See collect_batch for the result."""
+        batch_id = self.submit_batch(requests)
+        print(f"Submitted batch {batch_id} ({len(requests)} requests)")
+
+        status = self.poll_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+        if status != "completed":
+            raise Exception(f"Batch {batch_id} ended with status '{status}'")
+
+        return self.collect_batch(batch_id, requests)
 
     def enhance_image_prompts(self, story: dict, art_style: str = None) -> dict:
         """Add consistent art style to all image prompts."""
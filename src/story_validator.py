@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Story validation against a level template.
+
+validate_story_words (word_banks.py) checks each word's phonics level. This
+module adds the template's own constraints - words per page, distinct words
+per book, forbidden spelling patterns and sentence patterns - checked in one
+pass over the pages, and merges both into a single report.
+
+Usage:
+    from story_validator import validate_story
+
+    report = validate_story(story_json, level="orange")
+    print(report["valid"], report["issues"], report["template"])
+
+    # Editing loops: only changed pages are validated again
+    validator = IncrementalStoryValidator()
+    report = validator.validate(story_json, level="orange")
+"""
+
+import json
+from typing import Optional
+
+from templates import get_template_rules, normalize_words
+from word_banks import WordBanks
+
+# Page types whose text is read by the child
+TEXT_PAGE_TYPES = ["story", "cover"]
+
+
+def _is_accepted_decodable(classification: dict) -> bool:
+    """Whether the word check counted a word as decodable at the level.
+
+    Sight words, names etc. are taught as whole words, and words above the
+    level are already reported, so the forbidden-pattern check skips them.
+    """
+    return classification["type"] == "decodable" and classification["decodable_at_level"]
+
+
+class TemplateValidator:
+    """Checks story pages against a level template's compiled rules."""
+
+    def __init__(self, level: str):
+        self.level = level
+        self.rules = get_template_rules(level)
+
+    def check_page(self, page_num: int, text: str, word_types: dict = None) -> dict:
+        """
+        Check one page's text.
+
+        Args:
+            page_num: Page number (used in issues)
+            text: Page text
+            word_types: Optional {word: classification} from validate_story_words;
+                        only words it accepted as decodable get the
+                        forbidden-pattern check
+
+        Returns:
+            {"page": int, "words": [...], "issues": [...], "patterns": [categories matched]}
+        """
+        words = normalize_words(text)
+        issues = []
+
+        count_issue = self.rules.check_word_count(words)
+        if count_issue:
+            issues.append({"word": None, "issue": count_issue, "page": page_num})
+
+        word_types = word_types or {}
+        seen = set()
+        for word in words:
+            if word in seen:
+                continue
+            seen.add(word)
+            classification = word_types.get(word)
+            if classification and not _is_accepted_decodable(classification):
+                continue  # Whole words, or already flagged by the word check
+            for name in self.rules.forbidden_in(word):
+                issues.append({"word": word, "issue": f"Uses forbidden pattern '{name}'", "page": page_num})
+
+        return {
+            "page": page_num,
+            "words": words,
+            "issues": issues,
+            "patterns": self.rules.match_sentence_patterns(" ".join(words)),
+        }
+
+    def validate(self, story_json: dict, word_types: dict = None) -> dict:
+        """
+        Check every text page of a story.
+
+        Returns:
+            {
+                "valid": bool,
+                "issues": [{"word": str|None, "issue": str, "page": int|None}, ...],
+                "warnings": [...],  # Pages that follow none of the sentence patterns
+                "distinct_words": int,
+                "pattern_coverage_percent": float,
+                "pattern_counts": {category: pages, ...}
+            }
+        """
+        checked_pages = []
+        for page in story_json.get("pages", []):
+            text = page.get("text", "")
+            page_type = page.get("type")
+            if text and page_type in TEXT_PAGE_TYPES:
+                page_num = page.get("page", 0)
+                checked_pages.append((page_type, self.check_page(page_num, text, word_types)))
+        return self.merge_page_checks(checked_pages)
+
+    def merge_page_checks(self, checked_pages: list) -> dict:
+        """Combine (page_type, check_page result) pairs, in page order, into a story result."""
+        issues = []
+        warnings = []
+        distinct = set()
+        pattern_counts = {}
+        story_pages = 0
+        patterned_pages = 0
+
+        for page_type, checked in checked_pages:
+            distinct.update(checked["words"])
+
+            if page_type == "cover":
+                # Titles are not held to page limits or sentence patterns
+                issues.extend(i for i in checked["issues"] if i["word"] is not None)
+                continue
+
+            issues.extend(checked["issues"])
+            story_pages += 1
+            if checked["patterns"]:
+                patterned_pages += 1
+                for category in checked["patterns"]:
+                    pattern_counts[category] = pattern_counts.get(category, 0) + 1
+            elif self.rules.sentence_matchers:
+                warnings.append({"word": None, "issue": "Follows no template sentence pattern",
+                                 "page": checked["page"]})
+
+        max_distinct = self.rules.max_distinct_words
+        if max_distinct and len(distinct) > max_distinct:
+            issues.append({
+                "word": None,
+                "issue": f"{len(distinct)} distinct words (max {max_distinct})",
+                "page": None
+            })
+
+        return {
+            "valid": not issues,
+            "issues": issues,
+            "warnings": warnings,
+            "distinct_words": len(distinct),
+            "pattern_coverage_percent": (patterned_pages / story_pages * 100) if story_pages else 0.0,
+            "pattern_counts": pattern_counts,
+        }
+
+
+def _merge_reports(result: dict, template: dict) -> dict:
+    """Fold a TemplateValidator result into a validate_story_words report."""
+    result["valid"] = result["valid"] and template["valid"]
+    result["issues"] = result["issues"] + template["issues"]
+    result["warnings"] = template["warnings"]
+    result["template"] = {
+        "valid": template["valid"],
+        "issue_count": len(template["issues"]),
+        "distinct_words": template["distinct_words"],
+        "pattern_coverage_percent": template["pattern_coverage_percent"],
+        "pattern_counts": template["pattern_counts"],
+    }
+    return result
+
+
+def validate_story(story_json: dict, level: str = "orange", word_banks: Optional[WordBanks] = None,
+                   character_names: list = None, topic_words: list = None) -> dict:
+    """
+    Validate a story's words and its conformance to the level template.
+
+    Returns the validate_story_words report with template issues merged into
+    "issues", a "warnings" list, a "template" summary, and "valid" requiring
+    both checks to pass.
+    """
+    word_banks = word_banks or WordBanks()
+    result = word_banks.validate_story_words(
+        story_json, level=level, character_names=character_names, topic_words=topic_words
+    )
+    template = TemplateValidator(level).validate(story_json, result["word_breakdown"])
+    return _merge_reports(result, template)
+
+
+def _at_page(page_result: dict, page_num: int) -> dict:
+    """Copy of a cached page result with its issues stamped with a page number."""
+    restamped = dict(page_result)
+    restamped["issues"] = [dict(issue, page=page_num) for issue in page_result["issues"]]
+    if "page" in restamped:
+        restamped["page"] = page_num
+    return restamped
+
+
+class IncrementalStoryValidator:
+    """
+    Story validation that only re-checks pages whose text changed.
+
+    Page results are cached by (level, character names, topic words, page
+    type, text), so after editing one page only that page is validated
+    again; the rest come from the cache and are merged into the book totals.
+    One instance can serve many books (a review UI or file watcher).
+
+    Usage:
+        validator = IncrementalStoryValidator()
+        report = validator.validate(story_json, level="orange")
+        story_json["pages"][3]["text"] = "Gus ran and ran."
+        report = validator.validate(story_json, level="orange")  # re-checks 1 page
+    """
+
+    def __init__(self, word_banks: Optional[WordBanks] = None, max_pages: int = 20000):
+        self.word_banks = word_banks or WordBanks()
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._pages = {}  # key -> (word result, template check), both stamped page 0
+        self._template_validators = {}
+
+    def _template_validator(self, level: str) -> TemplateValidator:
+        validator = self._template_validators.get(level)
+        if validator is None or validator.rules is not get_template_rules(level):
+            # First use, or the template file changed on disk
+            validator = self._template_validators[level] = TemplateValidator(level)
+        return validator
+
+    def validate(self, story_json: dict, level: str = "orange", character_names: list = None,
+                 topic_words: list = None) -> dict:
+        """
+        Validate a story, re-checking only pages not seen before.
+
+        Returns the same report as validate_story().
+        """
+        character_names, topic_words = self.word_banks.story_names_and_topics(
+            story_json, character_names, topic_words
+        )
+        names_key = frozenset(n.lower() for n in character_names)
+        topics_key = frozenset(w.lower() for w in topic_words)
+        template_validator = self._template_validator(level)
+        rules = template_validator.rules
+
+        word_results = []
+        checked_pages = []
+        for page in story_json.get("pages", []):
+            text = page.get("text", "")
+            page_type = page.get("type")
+            if not text or page_type not in TEXT_PAGE_TYPES:
+                continue
+
+            key = (level, names_key, topics_key, page_type, text)
+            cached = self._pages.get(key)
+            if cached is None or cached[2] is not rules:
+                self.misses += 1
+                words = self.word_banks.validate_page_words(text, level, character_names, topic_words)
+                checked = template_validator.check_page(0, text, words["word_breakdown"])
+                if len(self._pages) >= self.max_pages:
+                    self._pages.pop(next(iter(self._pages)))  # Drop the oldest entry
+                cached = self._pages[key] = (words, checked, rules)
+            else:
+                self.hits += 1
+
+            page_num = page.get("page", 0)
+            word_results.append(_at_page(cached[0], page_num))
+            checked_pages.append((page_type, _at_page(cached[1], page_num)))
+
+        result = self.word_banks.merge_page_validations(level, word_results)
+        return _merge_reports(result, template_validator.merge_page_checks(checked_pages))
+
+    def validate_file(self, path: str, level: Optional[str] = None) -> dict:
+        """Validate a book JSON file at its declared level (or the given one)."""
+        with open(path) as f:
+            story_json = json.load(f)
+        level = level or story_json.get("level") or story_json.get("phonics_level") or "orange"
+        return self.validate(story_json, level=level)
+
+    def clear(self):
+        """Drop all cached page results (e.g. after editing the word banks)."""
+        self._pages.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+if __name__ == "__main__":
+    sample_story = {
+        "title": "Gus and the Big Hill",
+        "character": {"name": "Gus"},
+        "pages": [
+            {"page": 1, "type": "cover", "text": "Gus and the Big Hill"},
+            {"page": 2, "type": "story", "text": "Gus ran up the hill."},
+            {"page": 3, "type": "story", "text": "\"I can do it!\" said Gus."},
+            {"page": 4, "type": "story", "text": "Gus got to the top of the big hill and sat in the sun."},
+            {"page": 5, "type": "story", "text": "Gus had a snack."},
+        ]
+    }
+
+    report = validate_story(sample_story, "orange")
+    print(f"Valid: {report['valid']}")
+    print(f"Accessible: {report['accessible_percent']:.1f}%")
+    print(f"Sentence pattern coverage: {report['template']['pattern_coverage_percent']:.0f}%")
+    for issue in report["issues"] + report["warnings"]:
+        print(f"  Page {issue['page']}: {issue['word'] or ''} {issue['issue']}")
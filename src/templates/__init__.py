@@ -8,32 +8,190 @@ Templates define:
 - Sentence patterns
 - Example stories
 
+Templates are parsed once per process and cached until the file's mtime
+changes. Each template's constraints are compiled into a LevelRules object
+that validators apply directly.
+
 Usage:
-    from templates import get_template, get_template_prompt
+    from templates import get_template, get_template_prompt, get_template_rules
 
     # Get full template data
     template = get_template("orange")
 
     # Get prompt constraints for LLM
     prompt = get_template_prompt("orange")
+
+    # Get compiled constraints for validation
+    rules = get_template_rules("orange")
+    rules.check_word_count(["gus", "ran", "up"])  # None (within limit)
+    rules.forbidden_in("stop")  # ["blends"]
+    rules.match_sentence_patterns("gus ran up the hill")  # ["simple_declarative"]
 """
 
+import re
+import copy
 import json
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
 TEMPLATE_DIR = Path(__file__).parent
 
+# Spelling patterns a template can forbid, as regexes over lowercase words
+FORBIDDEN_PATTERN_REGEXES = {
+    "digraphs": r"ch|sh|th|wh|ck|ng|ph",
+    "blends": r"^(?:spl|spr|str|scr|bl|cl|fl|gl|pl|sl|br|cr|dr|fr|gr|pr|tr|sc|sk|sm|sn|sp|st|sw|tw)"
+              r"|(?:mp|nd|nk|nt|st|sk|sp|ft|lt|lp|lk|pt|ct)$",
+    "magic_e": r"[aeiou][^aeiouwxy]e$",
+    "vowel_teams": r"ai|ay|ea|ee|oa|oe|ie|igh|oo|ou|ow|oi|oy|ue|ew|au|aw",
+    "r_controlled": r"[aeiou]r",
+}
 
-def get_template(level: str) -> dict:
-    """Load a level template by name."""
+# Loaded templates: level -> (mtime_ns, template, rules)
+_REGISTRY = {}
+
+
+@dataclass(frozen=True)
+class ForbiddenPattern:
+    """A spelling pattern a level does not allow yet (e.g. blends at orange)."""
+    name: str
+    regex: re.Pattern
+
+    def matches(self, word: str) -> bool:
+        return self.regex.search(word) is not None
+
+
+@dataclass(frozen=True)
+class SentenceMatcher:
+    """One category of template sentence patterns, compiled into a single regex.
+
+    Matches against normalized text: lowercase words separated by single
+    spaces, punctuation removed (see normalize_words).
+    """
+    category: str
+    regex: re.Pattern
+
+    def matches(self, normalized_text: str) -> bool:
+        return self.regex.search(normalized_text) is not None
+
+
+def normalize_words(text: str) -> list:
+    """Lowercase words of a text with punctuation removed (apostrophes kept)."""
+    text = re.sub(r"[^\w\s']", " ", text)
+    return [w.strip("'") for w in text.lower().split() if w.strip("'")]
+
+
+def _compile_sentence_pattern(pattern: str) -> Optional[str]:
+    """Turn "[Name] saw a [adjective] [noun]." into a regex over normalized words.
+
+    Returns None for patterns made only of slots ("[Sound]! [Sound]!"), which
+    would match any run of words once punctuation is removed.
+    """
+    parts = []
+    literal = False
+    for token in re.split(r"(\[[^\]]+\])", pattern):
+        if token.startswith("["):
+            parts.append(r"[\w']+")  # Any one word fills a slot
+        else:
+            words = normalize_words(token)
+            literal = literal or bool(words)
+            parts.extend(re.escape(w) for w in words)
+    if not literal:
+        return None
+    return r"(?<!\S)" + " ".join(parts) + r"(?!\S)"
+
+
+@dataclass(frozen=True)
+class LevelRules:
+    """Compiled constraints of a level template."""
+    level: str
+    max_words_per_page: int = 8
+    max_distinct_words: Optional[int] = None
+    target_accessible_percent: Optional[float] = None
+    decodable_patterns: tuple = ()
+    forbidden_patterns: tuple = ()  # ForbiddenPattern objects
+    allowed_words: frozenset = field(default_factory=frozenset)  # Exempt from forbidden patterns
+    sentence_matchers: tuple = ()  # SentenceMatcher objects
+
+    def check_word_count(self, words: list) -> Optional[str]:
+        """Return an issue if a page has too many words, else None."""
+        if len(words) > self.max_words_per_page:
+            return f"{len(words)} words on page (max {self.max_words_per_page})"
+        return None
+
+    def forbidden_in(self, word: str, exempt=()) -> list:
+        """Names of the forbidden patterns a lowercase word uses."""
+        if word in self.allowed_words or word in exempt:
+            return []
+        return [pattern.name for pattern in self.forbidden_patterns if pattern.matches(word)]
+
+    def match_sentence_patterns(self, normalized_text: str) -> list:
+        """Categories of template sentence patterns found in normalized text."""
+        return [m.category for m in self.sentence_matchers if m.matches(normalized_text)]
+
+
+def compile_rules(level: str, template: dict) -> LevelRules:
+    """Compile a template's constraints into a LevelRules object."""
+    constraints = template.get("constraints", {})
+    word_lists = template.get("word_lists", {})
+
+    # Sight words and the template's own sound effects are allowed even when
+    # they use a forbidden pattern ("the", "crash" at orange)
+    allowed = set()
+    for key in ["approved_sight_words", "sound_effects"]:
+        words = word_lists.get(key, [])
+        if isinstance(words, list):
+            allowed.update(w.lower() for w in words)
+
+    # Purple lists its patterns as advanced_patterns
+    patterns = template.get("sentence_patterns") or template.get("advanced_patterns") or {}
+    matchers = []
+    for category, examples in patterns.items():
+        compiled = [c for c in map(_compile_sentence_pattern, examples) if c]
+        if compiled:
+            matchers.append(SentenceMatcher(category, re.compile("|".join(f"(?:{c})" for c in compiled))))
+
+    return LevelRules(
+        level=level,
+        max_words_per_page=constraints.get("max_words_per_page", 8),
+        max_distinct_words=constraints.get("max_distinct_words"),
+        target_accessible_percent=constraints.get("target_accessible_percent"),
+        decodable_patterns=tuple(constraints.get("decodable_patterns", [])),
+        forbidden_patterns=tuple(
+            ForbiddenPattern(name, re.compile(FORBIDDEN_PATTERN_REGEXES[name]))
+            for name in constraints.get("forbidden_patterns", [])
+            if name in FORBIDDEN_PATTERN_REGEXES
+        ),
+        allowed_words=frozenset(allowed),
+        sentence_matchers=tuple(matchers),
+    )
+
+
+def _load(level: str) -> tuple:
+    """Return the cached (mtime_ns, template, rules) for a level, reloading if the file changed."""
     template_path = TEMPLATE_DIR / f"level_{level}.json"
 
-    if not template_path.exists():
+    try:
+        mtime = template_path.stat().st_mtime_ns
+    except FileNotFoundError:
         raise ValueError(f"Unknown level: {level}. Available: yellow, orange, red, purple")
 
-    with open(template_path, 'r') as f:
-        return json.load(f)
+    entry = _REGISTRY.get(level)
+    if entry is None or entry[0] != mtime:
+        with open(template_path, 'r') as f:
+            template = json.load(f)
+        entry = _REGISTRY[level] = (mtime, template, compile_rules(level, template))
+    return entry
+
+
+def get_template(level: str) -> dict:
+    """Load a level template by name (a copy - safe to modify)."""
+    return copy.deepcopy(_load(level)[1])
+
+
+def get_template_rules(level: str) -> LevelRules:
+    """Get the compiled constraints of a level template."""
+    return _load(level)[2]
 
 
 def get_all_templates() -> dict:
@@ -53,7 +211,7 @@ def get_template_prompt(level: str) -> str:
 
     Returns a formatted string suitable for including in system prompts.
     """
-    template = get_template(level)
+    template = _load(level)[1]
 
     constraints = template.get("constraints", {})
     word_lists = template.get("word_lists", {})
@@ -97,8 +255,7 @@ def get_template_prompt(level: str) -> str:
 
 def get_example_story(level: str) -> Optional[dict]:
     """Get the example story from a template if available."""
-    template = get_template(level)
-    return template.get("example_story")
+    return copy.deepcopy(_load(level)[1].get("example_story"))
 
 
 def list_levels() -> list:
@@ -108,15 +265,15 @@ def list_levels() -> list:
 
 def get_level_info(level: str) -> dict:
     """Get summary info about a level."""
-    template = get_template(level)
+    _, template, rules = _load(level)
     return {
         "level": level,
         "name": template.get("name", ""),
         "description": template.get("description", ""),
         "target_age": template.get("target_age", ""),
         "target_grade": template.get("target_grade", ""),
-        "max_words_per_page": template.get("constraints", {}).get("max_words_per_page", 8),
-        "decodable_patterns": template.get("constraints", {}).get("decodable_patterns", []),
+        "max_words_per_page": rules.max_words_per_page,
+        "decodable_patterns": list(rules.decodable_patterns),
     }
 
 
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Validate every book in the catalog against its declared phonics level.
+
+Books are validated (word levels and template conformance) in parallel
+across a process pool. Results are cached per book content hash (and
+invalidated when the word banks, level templates or validator code
+change), and a
+consolidated JSON report is written with per-page issues and per-book
+accessible/strict percentages.
+
+Usage:
+    python src/validate_catalog.py                        # all books in web/books
+    python src/validate_catalog.py --workers 8
+    python src/validate_catalog.py --books-dir web/books --output report.json
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import spelling
+import templates
+import story_validator
+from story_validator import validate_story
+from templates import TEMPLATE_DIR
+from word_banks import WordBanks, SYNONYMS_PATH
+
+# Paths
+ROOT_DIR = Path(__file__).parent.parent
+BOOKS_DIR = ROOT_DIR / "web" / "books"
+CACHE_PATH = ROOT_DIR / "output" / "validation_cache.json"
+REPORT_PATH = ROOT_DIR / "output" / "validation_report.json"
+
+# Code a validation result depends on, besides the word banks' own lookup
+# code (see WordBanks.fingerprint): editing any of these re-checks every book
+RULES_SOURCES = [
+    Path(__file__),
+    Path(story_validator.__file__),
+    Path(templates.__file__),
+    Path(spelling.__file__),
+]
+
+# Level assumed for books that do not declare one
+DEFAULT_LEVEL = "orange"
+
+# Word banks for the current process (one per pool worker)
+_WORD_BANKS = None
+
+
+def _get_word_banks() -> WordBanks:
+    global _WORD_BANKS
+    if _WORD_BANKS is None:
+        _WORD_BANKS = WordBanks()
+    return _WORD_BANKS
+
+
+def discover_books(books_dir: Path = BOOKS_DIR) -> list:
+    """Find book JSON files (files with a list of pages) in a directory."""
+    books = []
+    for path in sorted(Path(books_dir).glob("*.json")):
+        try:
+            with open(path) as f:
+                book = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(book, dict) and isinstance(book.get("pages"), list):
+            books.append(path)
+    return books
+
+
+def validate_book(book: dict, name: str = "") -> dict:
+    """Validate one book against its declared level. Returns its report entry."""
+    declared = book.get("level") or book.get("phonics_level")
+    level = declared or DEFAULT_LEVEL
+
+    result = validate_story(book, level=level, word_banks=_get_word_banks())
+
+    page_issues = {}
+    book_issues = []
+    for issue in result["issues"]:
+        if issue["page"] is None:
+            book_issues.append(issue["issue"])
+        else:
+            entry = {"word": issue["word"], "issue": issue["issue"]}
+            if issue.get("suggestions"):
+                entry["suggestions"] = issue["suggestions"]
+            if issue.get("alternatives"):
+                entry["alternatives"] = issue["alternatives"]
+            page_issues.setdefault(str(issue["page"]), []).append(entry)
+
+    return {
+        "book": name,
+        "title": book.get("title", ""),
+        "level": level,
+        "level_declared": declared is not None,
+        "valid": result["valid"],
+        "accessible_percent": round(result["accessible_percent"], 1),
+        "strict_decodable_percent": round(result["strict_decodable_percent"], 1),
+        "word_counts": {
+            "total": result["total_words"],
+            "decodable": result["decodable_count"],
+            "sight_words": result["sight_word_count"],
+            "heart_words": result["heart_word_count"],
+            "exclamations": result["exclamation_count"],
+            "characters": result["character_count"],
+            "vocabulary": result["vocabulary_count"],
+            "unknown": result["unknown_count"],
+        },
+        "template_valid": result["template"]["valid"],
+        "pattern_coverage_percent": round(result["template"]["pattern_coverage_percent"], 1),
+        "unpatterned_pages": [w["page"] for w in result["warnings"]],
+        "page_issues": page_issues,
+        "book_issues": book_issues,
+        "spelling_suggestions": result["suggestions"],
+    }
+
+
+def _validate_file(path: str, content_hash: str) -> tuple:
+    """Pool task: validate a book file. Returns (content_hash, entry)."""
+    with open(path, 'rb') as f:
+        book = json.loads(f.read())
+    return content_hash, validate_book(book, Path(path).stem)
+
+
+def rules_fingerprint() -> str:
+    """Hash of everything a validation result depends on besides the book."""
+    digest = hashlib.sha256(_get_word_banks().fingerprint().encode())
+    digest.update(SYNONYMS_PATH.read_bytes())
+    for path in sorted(TEMPLATE_DIR.glob("level_*.json")):
+        digest.update(path.read_bytes())
+    for path in RULES_SOURCES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _load_cache(cache_path: Path, fingerprint: str) -> dict:
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("rules") != fingerprint:
+        return {}  # Word banks or templates changed: every book needs re-checking
+    return cache.get("books", {})
+
+
+def _write_json(path: Path, data: dict):
+    """Write JSON atomically (readers never see a half-written file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def validate_catalog(books_dir: Path = BOOKS_DIR, workers: Optional[int] = None,
+                     cache_path: Optional[Path] = CACHE_PATH,
+                     output_path: Optional[Path] = REPORT_PATH) -> dict:
+    """
+    Validate every book in a directory against its declared level.
+
+    Args:
+        books_dir: Directory of book JSON files
+        workers: Process pool size (default: CPU count, 1 = no pool)
+        cache_path: Per-book result cache, keyed by content hash (None disables)
+        output_path: Where to write the JSON report (None to skip)
+
+    Returns:
+        Report dict with "summary" and one entry per book under "books"
+    """
+    start = time.perf_counter()
+    fingerprint = rules_fingerprint()
+    cache = _load_cache(Path(cache_path), fingerprint) if cache_path else {}
+
+    # Hash every book; only books whose content changed need validating
+    books = []
+    todo = []
+    for path in discover_books(books_dir):
+        content_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+        books.append((path, content_hash))
+        if content_hash not in cache:
+            todo.append((str(path), content_hash))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            results = list(pool.map(_validate_file, *zip(*todo)))
+    else:
+        results = [_validate_file(path, content_hash) for path, content_hash in todo]
+
+    for content_hash, entry in results:
+        cache[content_hash] = entry
+
+    entries = []
+    for path, content_hash in books:
+        entry = dict(cache[content_hash])
+        entry["book"] = path.stem  # Identical files share a cache entry
+        entry["file"] = path.name
+        entries.append(entry)
+
+    report = {
+        "books_dir": str(books_dir),
+        "rules": fingerprint,
+        "summary": {
+            "books": len(entries),
+            "valid": sum(1 for e in entries if e["valid"]),
+            "invalid": sum(1 for e in entries if not e["valid"]),
+            "validated": len(todo),
+            "cached": len(entries) - len(todo),
+            "seconds": round(time.perf_counter() - start, 3),
+        },
+        "books": entries,
+    }
+
+    if cache_path:
+        live = {content_hash for _, content_hash in books}
+        _write_json(Path(cache_path), {
+            "rules": fingerprint,
+            "books": {h: e for h, e in cache.items() if h in live},
+        })
+    if output_path:
+        _write_json(Path(output_path), report)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate all books against their phonics level.")
+    parser.add_argument("--books-dir", default=str(BOOKS_DIR), help="Directory of book JSON files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default=str(REPORT_PATH), help="Report JSON path")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    args = parser.parse_args()
+
+    report = validate_catalog(
+        books_dir=Path(args.books_dir),
+        workers=args.workers,
+        cache_path=None if args.no_cache else CACHE_PATH,
+        output_path=Path(args.output),
+    )
+
+    print("=" * 60)
+    print("CATALOG VALIDATION")
+    print("=" * 60)
+    for entry in report["books"]:
+        status = "OK" if entry["valid"] else "X"
+        level = entry["level"] if entry["level_declared"] else f"{entry['level']}?"
+        issue_count = sum(len(issues) for issues in entry["page_issues"].values())
+        print(f"  {status} {entry['book']:<20} {level:<8} "
+              f"accessible {entry['accessible_percent']:5.1f}%  "
+              f"strict {entry['strict_decodable_percent']:5.1f}%  "
+              f"patterns {entry['pattern_coverage_percent']:5.1f}%  "
+              f"issues {issue_count}")
+
+    summary = report["summary"]
+    print(f"\nValid: {summary['valid']}/{summary['books']} "
+          f"({summary['validated']} validated, {summary['cached']} cached, {summary['seconds']}s)")
+    print(f"Report: {args.output}")
+
+    sys.exit(0 if summary["invalid"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
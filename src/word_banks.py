@@ -20,6 +20,9 @@ Usage:
     # Validate a story's word list
     wb.validate_story_words(story_json, level="orange")
 
+    # Simpler replacements for a word that is too hard
+    wb.suggest_alternatives("beautiful", level="purple")  # ["nice", "pretty", "fine"]
+
     # Get sight words for a level
     wb.get_sight_words(level="pre_primer")
 
@@ -28,22 +31,178 @@ Usage:
     wb.get_heart_word_info("said")  # {"tricky": "ai", "sounds_like": "sed", ...}
 """
 
+import os
 import json
+import pickle
+import hashlib
+from bisect import bisect_left
 from pathlib import Path
 from typing import Optional
 
+import config
+import morphology
+import phonics_decoder
+from morphology import analyze, inflect
+from phonics_decoder import GraphemeDecoder
+from config import LEVELS
+
+# Bump when the snapshot layout changes. Snapshots are also invalidated when
+# any of the source files that build the lookups change (config holds LEVELS).
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SOURCES = [Path(__file__), Path(phonics_decoder.__file__), Path(morphology.__file__),
+                    Path(config.__file__)]
+
+# Bundled lexicon of simpler replacements for hard words
+SYNONYMS_PATH = Path(__file__).parent / "synonyms.json"
+
+# Suffixes carried over onto a replacement word ("-ed" is skipped: too many
+# replacements are irregular verbs - "ran", not "runned")
+INFLECT_ALTERNATIVES = {"s", "es", "ing"}
+
+# Word counts of a page validation, summed into the story report
+PAGE_COUNT_KEYS = [
+    "total_words", "decodable_count", "sight_word_count", "heart_word_count",
+    "exclamation_count", "character_count", "vocabulary_count", "unknown_count",
+]
+
+
+class WordClassification(dict):
+    """
+    Read-only classification record for one word at one level.
+
+    Records are built once in the per-level lookup tables and shared by every
+    lookup, so they must never be modified. Being a dict keeps them
+    compatible with ``classification["type"]`` and ``json.dump``.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("WordClassification records are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (WordClassification, (dict(self),))
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 
 class WordBanks:
-    def __init__(self, json_path: Optional[str] = None):
+    # Attributes set in __init__; everything else is built on first use
+    _INSTANCE_ATTRS = {"json_path", "snapshot_path", "use_snapshot", "_loaded"}
+
+    def __init__(self, json_path: Optional[str] = None, snapshot_path: Optional[str] = None,
+                 use_snapshot: bool = True):
+        """
+        Word banks are loaded lazily, on first attribute access.
+
+        Loading reads a compiled snapshot of the built lookups
+        (__pycache__/word_banks.snapshot next to the JSON) when it is still
+        current, and otherwise parses the JSON, builds the lookups and
+        rewrites the snapshot.
+        """
         if json_path is None:
             json_path = Path(__file__).parent / "word_banks.json"
 
-        with open(json_path, 'r') as f:
+        self.json_path = Path(json_path)
+        if snapshot_path is None:
+            snapshot_path = self.json_path.parent / "__pycache__" / f"{self.json_path.stem}.snapshot"
+        self.snapshot_path = Path(snapshot_path)
+        self.use_snapshot = use_snapshot
+        self._loaded = False
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set yet
+        if name.startswith("__") or self.__dict__.get("_loaded", True):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._load()
+        return getattr(self, name)
+
+    def _load(self):
+        """Load lookups from the snapshot, or build them from the JSON."""
+        self._loaded = True
+
+        state = self._read_snapshot() if self.use_snapshot else None
+        if state is not None:
+            self.__dict__.update(state)
+            return
+
+        with open(self.json_path, 'r') as f:
             self.data = json.load(f)
 
         # Build lookup sets for fast validation
         self._build_lookups()
 
+        if self.use_snapshot:
+            self._write_snapshot()
+
+    # -------------------------------------------------------------------------
+    # Compiled Snapshot
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _builder_fingerprint() -> str:
+        """Hash of the code that builds the lookups."""
+        digest = hashlib.sha256(str(SNAPSHOT_VERSION).encode())
+        for source in SNAPSHOT_SOURCES:
+            digest.update(source.read_bytes())
+        return digest.hexdigest()
+
+    def fingerprint(self) -> str:
+        """Hash identifying the word bank content and lookup code, for caching results."""
+        digest = hashlib.sha256(self._builder_fingerprint().encode())
+        digest.update(_file_sha256(self.json_path).encode())
+        return digest.hexdigest()
+
+    def _read_snapshot(self) -> Optional[dict]:
+        """
+        Return the snapshot state if it matches the current JSON, else None.
+
+        The snapshot holds a small header pickle followed by the state pickle,
+        so stale snapshots are rejected without unpickling the lookups. A
+        changed mtime or size alone does not invalidate it (e.g. after a git
+        checkout) as long as the JSON's content hash still matches.
+        """
+        try:
+            stat = os.stat(self.json_path)
+            with open(self.snapshot_path, 'rb') as f:
+                header = pickle.load(f)
+                if header.get("builder") != self._builder_fingerprint():
+                    return None
+                if (header.get("mtime_ns"), header.get("size")) != (stat.st_mtime_ns, stat.st_size):
+                    if header.get("sha256") != _file_sha256(self.json_path):
+                        return None
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _write_snapshot(self):
+        """Write the built lookups to the snapshot file (best effort)."""
+        state = {k: v for k, v in self.__dict__.items() if k not in self._INSTANCE_ATTRS}
+        stat = os.stat(self.json_path)
+        header = {
+            "builder": self._builder_fingerprint(),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_sha256(self.json_path),
+        }
+
+        tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{os.getpid()}.tmp")
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            # Read-only install: keep working without a snapshot
+            tmp_path.unlink(missing_ok=True)
+
     def _build_lookups(self):
         """Build fast lookup structures from the word bank data."""
 
@@ -103,6 +262,28 @@ class WordBanks:
         for level_words in self.sight_words.values():
             self.all_sight_words.update(level_words)
 
+        # Every listed word (decodable, sight, heart and topic vocabulary):
+        # the stems an inflected form may be built on, so strings the rules
+        # happen to decode ("noth" in "nothing") are never taken as stems
+        self.listed_words = self.level_decodable["purple"] | self.all_sight_words | set(self.heart_words)
+        sight_lists = self.data["sight_words"]
+        self.listed_words.update(w.lower() for w in sight_lists["dolch"].get("nouns", []))
+        self.listed_words.update(w.lower() for w in sight_lists.get("fry_first_100", []))
+        topics = list(self.data.get("topic_vocabulary", {}).values())
+        while topics:
+            topic = topics.pop()
+            if isinstance(topic, dict):
+                topics.extend(topic.values())
+            else:
+                self.listed_words.update(w.lower() for w in topic)
+
+        # Letter pairs of listed words, with ^ and $ marking the word's start
+        # and end, for telling plausible spellings from typos ("fihs" has "hs$")
+        self.letter_pairs = set()
+        for word in self.listed_words:
+            padded = f"^{word}$"
+            self.letter_pairs.update(padded[i:i + 2] for i in range(len(padded) - 1))
+
         # Common exclamations and interjections (not in standard lists but OK)
         self.exclamations = {"wow", "oh", "ooh", "ah", "uh", "hey", "yay", "boo", "ow", "oof", "whoa", "yikes", "oops", "phew", "hmm", "shh", "psst"}
 
@@ -114,6 +295,112 @@ class WordBanks:
             "purple": self.sight_words["pre_primer"] | self.sight_words["primer"] | self.sight_words["first_grade"] | self.sight_words["second_grade"],
         }
 
+        # Words by phonics pattern, for pattern filters
+        self.pattern_words = {
+            "cvc": self.cvc_words,
+            "digraph": self.digraph_words,
+            "blend": self.blend_words,
+            "magic_e": self.magic_e_words,
+        }
+
+        # Suffix index for rhymes and word families: all decodable words
+        # spelled backwards and sorted, so the words sharing any ending form
+        # one contiguous range found by binary search
+        self.suffix_index = sorted(word[::-1] for word in self.level_decodable["purple"])
+
+        # Lowest level at which each inflectional suffix is allowed
+        self.inflection_levels = {
+            suffix: level for suffix, level in self.data.get("inflections", {}).items()
+            if not suffix.startswith("_")
+        }
+
+        # Rule-based decoder for words missing from the lists (memoized)
+        self.decoder = GraphemeDecoder.from_word_bank_data(self.data["decodable"])
+
+        # Precompiled classification tables: level -> {word: WordClassification}
+        self._records = {}
+        self.classification_tables = {
+            level: self._build_classification_table(level) for level in LEVELS
+        }
+
+        # Per-word records for names and unknown words, created on first use
+        self._character_records = {}
+        self._vocabulary_records = {}
+
+    @staticmethod
+    def _new_record(word: str, word_type: str, decodable_at_level: bool = False,
+                    pattern: str = None, heart_info: dict = None,
+                    requires_level: str = None, **extra) -> WordClassification:
+        fields = {
+            "word": word,
+            "type": word_type,
+            "decodable_at_level": decodable_at_level,
+            "pattern": pattern,
+            "heart_info": heart_info,
+        }
+        if requires_level:
+            fields["requires_level"] = requires_level
+        fields.update(extra)
+        return WordClassification(fields)
+
+    def _record(self, word: str, word_type: str, decodable_at_level: bool = False,
+                pattern: str = None, heart_info: dict = None,
+                requires_level: str = None) -> WordClassification:
+        """Return the shared table record for these fields (identical records are reused across levels)."""
+        key = (word, word_type, decodable_at_level, pattern, requires_level)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = self._new_record(
+                word, word_type, decodable_at_level, pattern, heart_info, requires_level)
+        return record
+
+    def _build_classification_table(self, level: str) -> dict:
+        """
+        Map every known word to its classification at the given level.
+
+        Rules are applied from lowest to highest precedence so later rules
+        overwrite earlier ones, mirroring the checks in classify_word.
+        """
+        table = {}
+        level_decodable = self.level_decodable.get(level, self.level_decodable["orange"])
+
+        # Decodable at a higher level (the lowest such level wins)
+        for check_level in reversed(LEVELS[1:]):
+            for word in self.level_decodable[check_level]:
+                table[word] = self._record(word, "decodable", pattern=self._get_pattern(word),
+                                          requires_level=check_level)
+
+        # Sight word at any level
+        for word in self.all_sight_words:
+            table[word] = self._record(word, "sight_word")
+
+        # Heart words (even if not in level's sight word list)
+        for word, info in self.heart_words.items():
+            table[word] = self._record(word, "heart_word", heart_info=info)
+
+        # Sight words at this level
+        for word in self.level_sight_words.get(level, set()):
+            if word in self.heart_words:
+                table[word] = self._record(word, "heart_word", heart_info=self.heart_words[word])
+            else:
+                table[word] = self._record(word, "sight_word")
+
+        # Decodable at this level
+        for word in level_decodable:
+            table[word] = self._record(word, "decodable", True, pattern=self._get_pattern(word))
+
+        # Exclamations (always allowed)
+        for word in self.exclamations:
+            table[word] = self._record(word, "exclamation", True)
+
+        return table
+
+    def _get_classification_table(self, level: str) -> dict:
+        table = self.classification_tables.get(level)
+        if table is None:
+            table = self.classification_tables[level] = self._build_classification_table(level)
+        return table
+
     # -------------------------------------------------------------------------
     # Word Validation
     # -------------------------------------------------------------------------
@@ -121,7 +408,14 @@ class WordBanks:
     def is_decodable(self, word: str, level: str = "orange") -> bool:
         """Check if a word is decodable at the given level."""
         word = word.lower().strip()
-        return word in self.level_decodable.get(level, self.level_decodable["orange"])
+        if word in self.level_decodable.get(level, self.level_decodable["orange"]):
+            return True
+        if self.decoder.is_decodable(word, level if level in LEVELS else "orange"):
+            return True
+
+        # Inflected form of a decodable stem (hops, jumped)
+        record = self._classify_inflection(word, level, self._get_classification_table(level))
+        return record is not None and record["type"] == "decodable" and record["decodable_at_level"]
 
     def is_sight_word(self, word: str, level: str = "pre_primer") -> bool:
         """Check if a word is in the sight word list for the given level."""
@@ -145,76 +439,87 @@ class WordBanks:
         """
         Classify a word into its type for the given level.
 
-        Returns dict with:
-            - type: "decodable", "sight_word", "heart_word", "exclamation", "character", "vocabulary", "unknown"
+        Returns a read-only dict (WordClassification) with:
+            - type: "decodable", "sight_word", "heart_word", "exclamation", "character", "vocabulary"
+              (words in no list and not decodable by rule are "vocabulary")
             - decodable_at_level: bool
             - pattern: phonics pattern if decodable
             - heart_info: dict if heart word
+            - requires_level: level needed, if decodable only at a higher level
         """
-        word = word.lower().strip()
-        character_names = [n.lower() for n in (character_names or [])]
+        names = {n.lower() for n in character_names} if character_names else ()
+        return self._classify(word.lower().strip(), level, self._get_classification_table(level), names)
 
-        result = {
-            "word": word,
-            "type": "unknown",
-            "decodable_at_level": False,
-            "pattern": None,
-            "heart_info": None
-        }
-
-        # Check if it's a character name (always allowed)
+    def _classify(self, word: str, level: str, table: dict, character_names) -> WordClassification:
+        """Classify a lowercased word with a level table and lowercased names."""
+        # Character names are always allowed
         if word in character_names:
-            result["type"] = "character"
-            result["decodable_at_level"] = True  # Characters are always OK
-            return result
-
-        # Check if exclamation (always allowed)
-        if word in self.exclamations:
-            result["type"] = "exclamation"
-            result["decodable_at_level"] = True  # Exclamations are always OK
-            return result
-
-        # Check if decodable at this level
-        if self.is_decodable(word, level):
-            result["type"] = "decodable"
-            result["decodable_at_level"] = True
-            result["pattern"] = self._get_pattern(word)
-            return result
-
-        # Check if sight word at this level
-        if word in self.level_sight_words.get(level, set()):
-            result["type"] = "sight_word"
-
-            # Also check if it's a heart word
-            if self.is_heart_word(word):
-                result["heart_info"] = self.get_heart_word_info(word)
-                result["type"] = "heart_word"
-
-            return result
-
-        # Check if heart word (even if not in level's sight word list)
-        if self.is_heart_word(word):
-            result["type"] = "heart_word"
-            result["heart_info"] = self.get_heart_word_info(word)
-            return result
-
-        # Check if it's a sight word at ANY level
-        if word in self.all_sight_words:
-            result["type"] = "sight_word"
-            return result
-
-        # Check if decodable at a higher level
-        for check_level in ["orange", "red", "purple"]:
-            if self.is_decodable(word, check_level):
-                result["type"] = "decodable"
-                result["decodable_at_level"] = False
-                result["pattern"] = self._get_pattern(word)
-                result["requires_level"] = check_level
-                return result
+            record = self._character_records.get(word)
+            if record is None:
+                record = self._character_records[word] = self._new_record(word, "character", True)
+            return record
+
+        record = table.get(word)
+        if record is not None:
+            return record
+
+        # Not in the lists: decode from phonics rules and remember the result
+        decoded = self.decoder.decode(word)
+        if decoded is not None:
+            decoded_level, pattern = decoded
+            if LEVELS.index(decoded_level) <= LEVELS.index(level if level in LEVELS else "orange"):
+                record = self._record(word, "decodable", True, pattern=pattern)
+            else:
+                record = self._record(word, "decodable", pattern=pattern, requires_level=decoded_level)
+            table[word] = record
+            return record
+
+        # Inflected form of a known stem (hops, hopped, running)
+        record = self._classify_inflection(word, level, table)
+        if record is not None:
+            table[word] = record
+            return record
 
         # Unknown word - treat as vocabulary (topic word)
-        result["type"] = "vocabulary"
-        return result
+        record = self._vocabulary_records.get(word)
+        if record is None:
+            record = self._vocabulary_records[word] = self._new_record(word, "vocabulary")
+        return record
+
+    def _classify_inflection(self, word: str, level: str, table: dict) -> Optional[WordClassification]:
+        """
+        Classify a word as a suffix added to a listed stem, or return None.
+
+        The word takes its stem's classification when both the stem and the
+        suffix are allowed at this level. Otherwise it is reported as
+        decodable at the harder of the two levels.
+        """
+        level_rank = LEVELS.index(level if level in LEVELS else "orange")
+
+        for stem, suffix in analyze(word):
+            if stem not in self.listed_words:
+                continue
+            stem_record = self._classify(stem, level, table, ())
+            stem_type = stem_record["type"]
+            if stem_type not in ("decodable", "sight_word", "heart_word"):
+                continue
+
+            needed_rank = LEVELS.index(self.inflection_levels.get(suffix, "purple"))
+            if stem_type == "decodable" and not stem_record["decodable_at_level"]:
+                needed_rank = max(needed_rank, LEVELS.index(stem_record["requires_level"]))
+
+            if needed_rank <= level_rank:
+                return self._new_record(
+                    word, stem_type, stem_record["decodable_at_level"],
+                    pattern=stem_record["pattern"], heart_info=stem_record["heart_info"],
+                    stem=stem, suffix=suffix,
+                )
+            return self._new_record(
+                word, "decodable", pattern=stem_record["pattern"],
+                requires_level=LEVELS[needed_rank], stem=stem, suffix=suffix,
+            )
+
+        return None
 
     def _get_pattern(self, word: str) -> str:
         """Determine the phonics pattern of a decodable word."""
@@ -314,6 +619,48 @@ class WordBanks:
                 words.extend(val)
         return words
 
+    def get_feature_index(self):
+        """
+        Get the bitset feature index over every word in the banks (built once).
+
+        Requires NumPy. See word_features.WordFeatureIndex for feature names.
+        """
+        index = getattr(self, "_feature_index", None)
+        if index is None:
+            from word_features import WordFeatureIndex
+            index = self._feature_index = WordFeatureIndex.from_word_banks(self)
+        return index
+
+    def get_spelling_index(self, level: str = "orange"):
+        """Get the spelling-suggestion index over a level's allowed words (built once per level)."""
+        indexes = getattr(self, "_spelling_indexes", None)
+        if indexes is None:
+            indexes = self._spelling_indexes = {}
+        level = level if level in LEVELS else "orange"
+        index = indexes.get(level)
+        if index is None:
+            from spelling import SpellingIndex
+            index = indexes[level] = SpellingIndex.from_word_banks(self, level)
+        return index
+
+    def suggest_spelling(self, word: str, level: str = "orange", limit: int = 5) -> list:
+        """
+        Nearest decodable or sight words at a level, for a likely misspelling.
+
+        Words the word banks or synonym lexicon know get no suggestions, nor
+        do plausible spellings (every letter pair occurs in a known word, as
+        in "wait" or "moat"), nor lookups without a clear best match.
+        """
+        word = word.lower()
+        if word in self.listed_words or word in self._synonym_words() or self._is_plausible_spelling(word):
+            return []
+        return [w for w, _ in self.get_spelling_index(level).confident_suggestions(word, limit=limit)]
+
+    def _is_plausible_spelling(self, word: str) -> bool:
+        """Check that every letter pair of a word (with its start and end) occurs in a listed word."""
+        padded = f"^{word}$"
+        return all(padded[i:i + 2] in self.letter_pairs for i in range(len(padded) - 1))
+
     # -------------------------------------------------------------------------
     # Story Validation
     # -------------------------------------------------------------------------
@@ -340,24 +687,56 @@ class WordBanks:
                 "exclamation_count": int,
                 "character_count": int,
                 "vocabulary_count": int,
-                "unknown_count": int,
+                "unknown_count": int (words that need a higher level),
                 "accessible_percent": float (decodable + sight + heart + exclamations + characters),
                 "strict_decodable_percent": float (only decodable words),
                 "issues": [{"word": str, "issue": str, "page": int}, ...],
-                "word_breakdown": {word: classification, ...}
+                "word_breakdown": {word: classification, ...},
+                "suggestions": {word: [allowed words it may be a typo of], ...}
             }
         """
+        character_names, topic_words = self.story_names_and_topics(story_json, character_names, topic_words)
+        topic_words_lower = {w.lower() for w in topic_words}
+        names_lower = {n.lower() for n in character_names}
+        table = self._get_classification_table(level)
+
+        page_results = []
+        for page in story_json.get("pages", []):
+            text = page.get("text", "")
+            if text and page.get("type") in ["story", "cover"]:
+                page_results.append(self._validate_words(
+                    self._extract_words(text), level, table, names_lower, topic_words_lower,
+                    page.get("page", 0)
+                ))
+
+        return self.merge_page_validations(level, page_results)
+
+    def story_names_and_topics(self, story_json: dict, character_names: list = None,
+                               topic_words: list = None) -> tuple:
+        """
+        Resolve the character names and topic words a story is validated with.
+
+        Explicit lists win; otherwise names come from story["character"] and
+        topic words from story["word_list"].
+
+        Returns:
+            (character_names, topic_words)
+        """
         # Auto-detect character names from story if not provided
         if character_names is None:
             character_names = []
             char_data = story_json.get("character", {})
             if isinstance(char_data, dict) and "name" in char_data:
                 character_names.append(char_data["name"])
+            elif isinstance(char_data, dict) and isinstance(char_data.get("names"), list):
+                character_names.extend(char_data["names"])
             elif isinstance(char_data, str):
-                # Try to extract first word as name
-                first_word = char_data.split()[0] if char_data else ""
-                if first_word and first_word[0].isupper():
-                    character_names.append(first_word)
+                # Leading capitalized words: "Zee, a sloth", "Rita and Rico are rats"
+                for word in char_data.replace(",", " , ").split():
+                    if word[0].isupper():
+                        character_names.append(word.strip(".!?"))
+                    elif word != "and":
+                        break
 
         # Auto-detect topic words from word_list if present
         if topic_words is None:
@@ -369,12 +748,26 @@ class WordBanks:
                 if isinstance(vocab, dict):
                     topic_words.extend(vocab.get("topic", []))
 
-        topic_words_lower = [w.lower() for w in topic_words]
+        return character_names, topic_words
+
+    def validate_page_words(self, text: str, level: str = "orange", character_names: list = None,
+                            topic_words: list = None, page: int = 0) -> dict:
+        """
+        Validate the words of one page's text.
 
+        Returns the page's word counts, issues and word_breakdown, in the form
+        merge_page_validations() combines into a story report.
+        """
+        return self._validate_words(
+            self._extract_words(text), level, self._get_classification_table(level),
+            {n.lower() for n in character_names or []}, {w.lower() for w in topic_words or []}, page
+        )
+
+    def _validate_words(self, words: list, level: str, table: dict, names_lower: set,
+                        topic_words_lower: set, page: int) -> dict:
+        """Classify a page's words and count them by type."""
         result = {
-            "valid": True,
-            "level": level,
-            "total_words": 0,
+            "total_words": len(words),
             "decodable_count": 0,
             "sight_word_count": 0,
             "heart_word_count": 0,
@@ -382,30 +775,14 @@ class WordBanks:
             "character_count": 0,
             "vocabulary_count": 0,
             "unknown_count": 0,
-            "accessible_percent": 0.0,
-            "strict_decodable_percent": 0.0,
             "issues": [],
-            "word_breakdown": {}
+            "word_breakdown": {},
+            "suggestions": {}
         }
 
-        # Extract all words from story
-        all_words = []
-        for page in story_json.get("pages", []):
-            text = page.get("text", "")
-            if text and page.get("type") in ["story", "cover"]:
-                # Extract words (remove punctuation)
-                words = self._extract_words(text)
-                for word in words:
-                    all_words.append({"word": word, "page": page.get("page", 0)})
-
-        result["total_words"] = len(all_words)
-
         # Classify each word
-        for item in all_words:
-            word = item["word"]
-            page = item["page"]
-
-            classification = self.classify_word(word, level, character_names)
+        for word in words:
+            classification = self._classify(word, level, table, names_lower)
             result["word_breakdown"][word] = classification
 
             word_type = classification["type"]
@@ -417,7 +794,8 @@ class WordBanks:
                     result["issues"].append({
                         "word": word,
                         "issue": f"Requires level '{classification.get('requires_level', 'higher')}'",
-                        "page": page
+                        "page": page,
+                        "alternatives": self.suggest_alternatives(word, level)
                     })
                     result["unknown_count"] += 1
             elif word_type == "sight_word":
@@ -434,19 +812,50 @@ class WordBanks:
                     result["vocabulary_count"] += 1
                 else:
                     result["vocabulary_count"] += 1
+                    # Possible typo of an allowed word ("fihs" for "fish")
+                    suggestions = self.suggest_spelling(word, level)
+                    if suggestions:
+                        result["suggestions"][word] = suggestions
                     # Only flag as issue if it's not a recognized topic word
                     # result["issues"].append({
                     #     "word": word,
                     #     "issue": "Unknown vocabulary word",
                     #     "page": page
                     # })
-            else:
-                result["unknown_count"] += 1
-                result["issues"].append({
-                    "word": word,
-                    "issue": "Unknown word - not in any word bank",
-                    "page": page
-                })
+
+        return result
+
+    @staticmethod
+    def merge_page_validations(level: str, page_results: list) -> dict:
+        """
+        Combine per-page validations (in page order) into a story report.
+
+        Returns the same dict as validate_story_words().
+        """
+        result = {
+            "valid": True,
+            "level": level,
+            "total_words": 0,
+            "decodable_count": 0,
+            "sight_word_count": 0,
+            "heart_word_count": 0,
+            "exclamation_count": 0,
+            "character_count": 0,
+            "vocabulary_count": 0,
+            "unknown_count": 0,
+            "accessible_percent": 0.0,
+            "strict_decodable_percent": 0.0,
+            "issues": [],
+            "word_breakdown": {},
+            "suggestions": {}
+        }
+
+        for page_result in page_results:
+            for key in PAGE_COUNT_KEYS:
+                result[key] += page_result[key]
+            result["issues"].extend(page_result["issues"])
+            result["word_breakdown"].update(page_result["word_breakdown"])
+            result["suggestions"].update(page_result.get("suggestions", {}))
 
         # Calculate percentages
         if result["total_words"] > 0:
@@ -485,28 +894,74 @@ class WordBanks:
         """
         Suggest decodable alternatives for a word that's too advanced.
 
-        Returns list of simpler synonyms or related words.
-        """
-        # Simple synonym mapping
-        synonyms = {
-            "beautiful": ["nice", "pretty"],
-            "happy": ["glad"],
-            "scared": ["sad"],
-            "quickly": ["fast"],
-            "slowly": ["slow"],
-            "large": ["big"],
-            "small": ["little"],
-            "begin": ["start"],
-            "finish": ["end", "stop"],
-            "want": ["wish"],
-            "because": ["so"],
-        }
-
+        Returns list of simpler synonyms or related words (closest meaning
+        first), each decodable or a sight/heart word at the level.
+        """
         word = word.lower()
-        suggestions = synonyms.get(word, [])
+        table = self.get_synonym_table(level)
+        suggestions = table.get(word)
+        if suggestions is not None:
+            return list(suggestions)
+
+        # Inflected form of a listed word: "hurrying" -> "rushing"
+        for stem, suffix in analyze(word):
+            if suffix in INFLECT_ALTERNATIVES and stem in table:
+                suffix = "s" if suffix == "es" else suffix
+                inflected = [inflect(s, suffix) for s in table[stem] if " " not in s]
+                return [s for s in inflected if self._is_allowed_phrase(s, level)]
+        return []
+
+    def _is_allowed_phrase(self, phrase: str, level: str) -> bool:
+        """Check that every word of a replacement is decodable, or a sight or heart word, at a level."""
+        return all(self._is_allowed_word(w, level) for w in phrase.split())
+
+    def _is_allowed_word(self, word: str, level: str) -> bool:
+        if self.is_decodable(word, level) or self.is_sight_word(word, level) or self.is_heart_word(word):
+            return True
+        # Inflected sight or heart word ("looking"), with the suffix allowed at the level
+        record = self.classify_word(word, level)
+        stem = record.get("stem")
+        return (stem is not None and record["type"] in ("sight_word", "heart_word")
+                and (self.is_sight_word(stem, level) or self.is_heart_word(stem)))
+
+    def _synonym_words(self) -> set:
+        """Every single word in the synonym lexicon, as a headword or replacement."""
+        words = getattr(self, "_synonym_word_set", None)
+        if words is None:
+            words = self._synonym_word_set = set()
+            for word, replacements in self._load_synonym_lexicon().items():
+                words.add(word)
+                for replacement in replacements:
+                    words.update(replacement.split())
+        return words
 
-        # Filter to only include words decodable at level
-        return [s for s in suggestions if self.is_decodable(s, level) or self.is_sight_word(s, level)]
+    def _load_synonym_lexicon(self) -> dict:
+        lexicon = getattr(self, "_synonym_lexicon", None)
+        if lexicon is None:
+            with open(SYNONYMS_PATH, 'r') as f:
+                lexicon = self._synonym_lexicon = json.load(f)["words"]
+        return lexicon
+
+    def get_synonym_table(self, level: str = "orange") -> dict:
+        """
+        Get {word: (replacements allowed at level, ...)} from the bundled
+        synonym lexicon (built once per level).
+        """
+        tables = getattr(self, "_synonym_tables", None)
+        if tables is None:
+            tables = self._synonym_tables = {}
+        table = tables.get(level)
+        if table is None:
+            lexicon = self._load_synonym_lexicon()
+
+            table = tables[level] = {}
+            for word, replacements in lexicon.items():
+                # Single words first (they keep the page's word count), then phrases
+                ranked = sorted((r for r in replacements if self._is_allowed_phrase(r, level)),
+                                key=lambda r: len(r.split()))
+                if ranked:
+                    table[word] = tuple(ranked)
+        return table
 
     # -------------------------------------------------------------------------
     # Story Generation Helpers
@@ -533,32 +988,44 @@ class WordBanks:
             "sound_effects": random.sample(sound_pool, min(5, len(sound_pool)))
         }
 
-    def get_rhyming_words(self, word: str, level: str = "orange") -> list:
+    def find_by_suffix(self, suffix: str, level: str = None, pattern: str = None) -> list:
+        """
+        Find decodable words ending in a suffix of any length, sorted alphabetically.
+
+        Args:
+            suffix: Ending to match ("at", "ash", "-op")
+            level: Only words decodable at this level
+            pattern: Only words of this pattern ("cvc", "digraph", "blend", "magic_e")
+        """
+        key = suffix.lower().lstrip("-")[::-1]
+        start = bisect_left(self.suffix_index, key)
+        end = bisect_left(self.suffix_index, key + "\uffff", start)
+
+        words = [reversed_word[::-1] for reversed_word in self.suffix_index[start:end]]
+        if level is not None:
+            allowed = self.level_decodable.get(level, self.cvc_words)
+            words = [w for w in words if w in allowed]
+        if pattern is not None:
+            allowed = self.pattern_words.get(pattern, set())
+            words = [w for w in words if w in allowed]
+
+        return sorted(words)
+
+    def get_rhyming_words(self, word: str, level: str = "orange", suffix_length: int = 2) -> list:
         """Find words that rhyme with the given word at the specified level."""
         word = word.lower()
 
         # Simple rhyme detection: same ending
-        if len(word) < 2:
+        if len(word) < suffix_length:
             return []
 
-        ending = word[-2:]  # Last two letters
-        rhymes = []
-
-        for w in self.level_decodable.get(level, self.cvc_words):
-            if w != word and w.endswith(ending):
-                rhymes.append(w)
+        rhymes = [w for w in self.find_by_suffix(word[-suffix_length:], level=level) if w != word]
 
         return rhymes[:10]  # Limit results
 
     def get_word_family(self, pattern: str) -> list:
         """Get all words in a word family (e.g., '-at', '-op', '-ug')."""
-        family = []
-
-        for word in self.cvc_words:
-            if word.endswith(pattern):
-                family.append(word)
-
-        return sorted(family)
+        return self.find_by_suffix(pattern, pattern="cvc")
 
     # -------------------------------------------------------------------------
     # Prompt Generation
@@ -0,0 +1,199 @@
+"""
+Bitset feature index for multi-constraint word queries.
+
+Every word in the word banks is tagged with features such as its vowel
+sound, digraphs, blends, sight word level and syllable count. Each feature
+is stored as a NumPy bitset over the whole lexicon (one bit per word), so a
+query like "short-a words with a sh digraph, decodable at orange, ending in
+-ash" is a handful of vectorized ANDs instead of chained list filters.
+
+Feature names:
+    vowel:short_a .. vowel:short_u, vowel:a_e .. vowel:u_e
+    digraph:ch, digraph:sh, ... (including doubled ss, ff, ll, zz)
+    blend:bl, blend:st, ... (initial and final blends; both tagged in
+                             one-syllable words, from the decoder's split)
+    pattern:cvc, pattern:digraph, pattern:blend, pattern:magic_e
+    level:yellow .. level:purple   (decodable at that level, cumulative)
+    sight, sight:pre_primer .. sight:second_grade
+    heart, magic_e, topic, sound_effect
+    syllables:1, syllables:2, syllables:3+
+
+Usage:
+    from word_banks import WordBanks
+
+    index = WordBanks().get_feature_index()
+    index.query(all_of=["vowel:short_a", "digraph:sh", "level:orange"], suffix="ash")
+    # ["bash", "cash", "dash", ...]
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+from config import LEVELS
+from morphology import vowel_groups
+
+VOWELS = set("aeiou")
+
+
+def _vowel_feature(word: str, pattern: str) -> str:
+    """Vowel feature of a one-vowel decodable word: short_a, or a_e for magic e."""
+    vowel = next(letter for letter in word.replace("qu", "q") if letter in VOWELS)
+    return f"vowel:{vowel}_e" if pattern == "magic_e" else f"vowel:short_{vowel}"
+
+
+class WordFeatureIndex:
+    """Lexicon with one packed bitset per feature."""
+
+    def __init__(self, features: dict):
+        """
+        Args:
+            features: {feature_name: iterable of words having that feature}.
+                The lexicon is every word named by any feature.
+        """
+        lexicon = set()
+        for words in features.values():
+            lexicon.update(words)
+
+        self.words = sorted(lexicon)
+        self.size = len(self.words)
+        self._positions = {word: i for i, word in enumerate(self.words)}
+
+        # One row per feature, one bit per word
+        self.feature_names = sorted(features)
+        self._feature_rows = {name: row for row, name in enumerate(self.feature_names)}
+        matrix = np.zeros((len(self.feature_names), self.size), dtype=bool)
+        for name, words in features.items():
+            matrix[self._feature_rows[name], [self._positions[w] for w in words]] = True
+        self.bitsets = np.packbits(matrix, axis=1)
+
+        # Words spelled backwards and sorted: every ending is one contiguous range
+        order = sorted(range(self.size), key=lambda i: self.words[i][::-1])
+        self._suffix_order = np.array(order, dtype=np.int64)
+        self._suffix_keys = [self.words[i][::-1] for i in order]
+
+    @classmethod
+    def from_word_banks(cls, word_banks) -> "WordFeatureIndex":
+        """Tag every word in the word banks with its features."""
+        features = defaultdict(set)
+
+        for vowel, words in word_banks.data["decodable"]["cvc"].items():
+            features[f"vowel:{vowel}"].update(w.lower() for w in words)
+        for vowel, words in word_banks.data["decodable"]["magic_e"].items():
+            features[f"vowel:{vowel}"].update(w.lower() for w in words)
+
+        for pattern, words in word_banks.pattern_words.items():
+            features[f"pattern:{pattern}"].update(words)
+        features["magic_e"].update(word_banks.magic_e_words)
+
+        for sight_level, words in word_banks.sight_words.items():
+            features[f"sight:{sight_level}"].update(words)
+        features["sight"].update(word_banks.all_sight_words)
+        features["heart"].update(word_banks.heart_words)
+
+        for category in word_banks.data["topic_vocabulary"]:
+            if not category.startswith("_"):
+                features["topic"].update(w.lower() for w in word_banks.get_topic_vocabulary(category))
+        features["sound_effect"].update(w.lower() for w in word_banks.get_sound_effects())
+
+        # Keep single words only (topic vocabulary has a few phrases)
+        lexicon = set(word_banks.level_decodable["purple"]) | word_banks.all_sight_words
+        lexicon |= set(word_banks.heart_words)
+        for name in ["topic", "sound_effect"]:
+            features[name] = {w for w in features[name] if w.isalpha()}
+            lexicon |= features[name]
+
+        decoder = word_banks.decoder
+        graphemes = [
+            # (feature kind, onset graphemes, coda graphemes)
+            ("digraph", decoder.onset_digraphs, decoder.coda_digraphs | decoder.doubled_codas),
+            ("blend", decoder.onset_blends, decoder.coda_blends),
+        ]
+
+        for word in lexicon:
+            # Digraphs and blends inside the decoder's onset and coda, so
+            # letters that only look like one across a vowel or syllable
+            # break are not tagged ("ch" in school)
+            segments = decoder.segment(word)
+            if segments is not None:
+                onset, _, coda, _ = segments
+                for kind, onset_graphemes, coda_graphemes in graphemes:
+                    for grapheme in onset_graphemes:
+                        if grapheme in onset:
+                            features[f"{kind}:{grapheme}"].add(word)
+                    for grapheme in coda_graphemes:
+                        if grapheme in coda:
+                            features[f"{kind}:{grapheme}"].add(word)
+
+            # Silent final e is not a syllable (cake, shine)
+            syllables = max(1, vowel_groups(word[:-1] if word.endswith("e") and len(word) > 2 else word))
+            features["syllables:3+" if syllables >= 3 else f"syllables:{syllables}"].add(word)
+
+            # Decodable at each level (cumulative)
+            for level in LEVELS:
+                if word in word_banks.level_decodable[level] or word_banks.decoder.is_decodable(word, level):
+                    features[f"level:{level}"].add(word)
+
+            # Vowel sound of rule-decodable words (digraph and blend words
+            # are not grouped by vowel in the word bank)
+            decoded = word_banks.decoder.decode(word)
+            if decoded is not None:
+                features[_vowel_feature(word, decoded[1])].add(word)
+
+        return cls(features)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def mask(self, feature: str) -> np.ndarray:
+        """Packed bitset of the words having a feature."""
+        row = self._feature_rows.get(feature)
+        if row is None:
+            raise ValueError(f"Unknown feature: {feature}")
+        return self.bitsets[row]
+
+    def suffix_mask(self, suffix: str) -> np.ndarray:
+        """Packed bitset of the words ending in a suffix."""
+        key = suffix.lower().lstrip("-")[::-1]
+        start = bisect_left(self._suffix_keys, key)
+        end = bisect_left(self._suffix_keys, key + "\uffff", start)
+
+        bits = np.zeros(self.size, dtype=bool)
+        bits[self._suffix_order[start:end]] = True
+        return np.packbits(bits)
+
+    def query_mask(self, all_of=(), any_of=(), none_of=(), suffix: str = None) -> np.ndarray:
+        """Combine feature bitsets: every all_of, at least one any_of, no none_of."""
+        result = np.full(self.bitsets.shape[1], 0xFF, dtype=np.uint8)
+
+        if all_of:
+            result &= np.bitwise_and.reduce([self.mask(f) for f in all_of])
+        if any_of:
+            result &= np.bitwise_or.reduce([self.mask(f) for f in any_of])
+        if none_of:
+            result &= ~np.bitwise_or.reduce([self.mask(f) for f in none_of])
+        if suffix:
+            result &= self.suffix_mask(suffix)
+
+        return result
+
+    def query(self, all_of=(), any_of=(), none_of=(), suffix: str = None) -> list:
+        """Words matching a feature query, in alphabetical order."""
+        mask = self.query_mask(all_of, any_of, none_of, suffix)
+        return [self.words[i] for i in np.flatnonzero(np.unpackbits(mask, count=self.size))]
+
+    def count(self, all_of=(), any_of=(), none_of=(), suffix: str = None) -> int:
+        """Number of words matching a feature query."""
+        mask = self.query_mask(all_of, any_of, none_of, suffix)
+        return int(np.unpackbits(mask, count=self.size).sum())
+
+    def features_of(self, word: str) -> list:
+        """Feature names of one word."""
+        position = self._positions.get(word.lower())
+        if position is None:
+            return []
+        byte, bit = divmod(position, 8)
+        column = (self.bitsets[:, byte] >> (7 - bit)) & 1
+        return [self.feature_names[row] for row in np.flatnonzero(column)]